@@ -0,0 +1,274 @@
+# bench.py
+# 端對端壓力測試（python manage.py bench）：以 seed 資料中的使用者登入，
+# 對 main.app 的路由以固定的並行數送出請求，回報每個路由的
+# p50 / p95 / p99 延遲、吞吐量與每個請求的查詢數，結果存成 JSON 供 CI 比較
+#
+# 預設在同一個程序內透過 ASGI 呼叫 main.app（不經過網路與 uvicorn），可計算查詢數；
+# 指定 base_url 時改對執行中的伺服器送出 HTTP 請求（無法計算查詢數）
+# DB_BACKEND=sqlite 時連資料庫也在同一個程序內（不需要 PostgreSQL）
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import db
+import instrumentation
+import seed
+
+DEFAULT_CONCURRENCY = (1, 10, 50)
+DEFAULT_REQUESTS = 200
+DEFAULT_UPLOAD_SIZE = 64 * 1024
+
+# seed 使用者的密碼（seed.py 的 _SEED_USERS）
+SEED_PASSWORD = "password"
+
+# 路由名稱 -> (登入身分, 產生 (method, path, 額外參數) 的函式, 預期的狀態碼)
+SCENARIOS = {
+    "client_dashboard": (
+        "client", lambda f: ("GET", "/client/dashboard", {}), 200),
+    "view_bids": (
+        "client", lambda f: ("GET", f"/client/project/{f['bid_project_id']}/bids", {}), 200),
+    "contractor_dashboard": (
+        "contractor", lambda f: ("GET", "/contractor/dashboard", {}), 200),
+    "contractor_search": (
+        "contractor", lambda f: ("GET", "/contractor/dashboard?q=project+42", {}), 200),
+    "view_project": (
+        "contractor", lambda f: ("GET", f"/contractor/project/{f['open_project_id']}", {}), 200),
+    "upload_deliverable": (
+        "contractor",
+        lambda f: ("POST", f"/contractor/project/{f['assigned_project_id']}/upload", {
+            "data": {"message": "bench"},
+            "files": {"file": ("bench.bin", f["upload_body"])},
+        }),
+        303),
+}
+
+
+def _fixtures(upload_size: int) -> dict:
+    """從 seed 資料挑出測試用的使用者與專案"""
+    pattern = seed.SEED_PREFIX.replace("_", r"\_") + "%"
+    with db.get_db() as conn:
+        cur = conn.cursor()
+        # 投標最多的 open 專案與其委託人
+        cur.execute("""
+            SELECT p.id, u.username FROM projects p
+            JOIN users u ON p.client_id = u.id
+            JOIN bids b ON b.project_id = p.id
+            WHERE u.username LIKE %s AND p.status = 'open'
+            GROUP BY p.id, u.username
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+        """, (pattern,))
+        row = cur.fetchone()
+        if row is None:
+            raise RuntimeError("no seed data; run `python manage.py seed` or pass --seed")
+        bid_project_id, client_username = row
+        # 承接中專案最多的接案人
+        cur.execute("""
+            SELECT u.username, MIN(p.id) FROM projects p
+            JOIN users u ON p.contractor_id = u.id
+            WHERE u.username LIKE %s AND p.status = 'assigned'
+            GROUP BY u.username
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+        """, (pattern,))
+        contractor_username, assigned_project_id = cur.fetchone()
+        cur.execute("SELECT MAX(id) FROM projects WHERE status = 'open'")
+        open_project_id = cur.fetchone()[0]
+    return {
+        "client": client_username,
+        "contractor": contractor_username,
+        "bid_project_id": bid_project_id,
+        "assigned_project_id": assigned_project_id,
+        "open_project_id": open_project_id,
+        "upload_body": os.urandom(upload_size),
+    }
+
+
+def _percentiles(latencies) -> dict:
+    ordered = sorted(latencies)
+    if len(ordered) >= 2:
+        q = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else None
+    ms = (lambda v: round(v * 1000, 3) if v is not None else None)
+    return {
+        "p50": ms(p50),
+        "p95": ms(p95),
+        "p99": ms(p99),
+        "mean": ms(statistics.fmean(ordered)) if ordered else None,
+        "max": ms(ordered[-1]) if ordered else None,
+    }
+
+
+async def _send(client, method, path, kwargs):
+    """送出一個請求，回傳 (狀態碼, 秒數, 查詢數)"""
+    # 同一個程序內呼叫 app 時，QueryInstrumentationMiddleware 沿用這裡的統計
+    with instrumentation.track() as stats:
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - start
+    return response.status_code, elapsed, stats.queries
+
+
+async def _run_scenario(client, method, path, kwargs, expected, concurrency, requests, warmup):
+    for _ in range(warmup):
+        await _send(client, method, path, kwargs)
+
+    latencies, queries, errors = [], [], 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            status, elapsed, count = await _send(client, method, path, kwargs)
+            latencies.append(elapsed)
+            queries.append(count)
+            if status != expected:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "latency_ms": _percentiles(latencies),
+        "queries_per_request": round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+async def _login(client, username):
+    response = await client.post("/login", data={"username": username, "password": SEED_PASSWORD})
+    if response.status_code != 303:
+        raise RuntimeError(f"login failed for {username}: {response.status_code}")
+
+
+async def run_benchmark(routes=None, concurrency=DEFAULT_CONCURRENCY, requests=DEFAULT_REQUESTS,
+                        warmup=10, base_url=None, upload_size=DEFAULT_UPLOAD_SIZE) -> dict:
+    """
+    對 routes（SCENARIOS 的 key，預設全部）在每個並行數下各送出 requests 個請求。
+    回傳 {"meta": {...}, "results": [{"route", "concurrency", "latency_ms", ...}]}
+    """
+    import httpx
+
+    routes = list(routes or SCENARIOS)
+    unknown = set(routes) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"unknown routes: {', '.join(sorted(unknown))}")
+    fixtures = _fixtures(upload_size)
+
+    in_process = base_url is None
+    if in_process:
+        import main
+
+        db.init_pool()
+        await db.init_async_pool()
+        transport = httpx.ASGITransport(app=main.app)
+        base_url = "http://bench"
+    else:
+        transport = None
+
+    results = []
+    try:
+        clients = {
+            role: httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60)
+            for role in ("client", "contractor")
+        }
+        try:
+            for role, client in clients.items():
+                await _login(client, fixtures[role])
+            for name in routes:
+                role, build, expected = SCENARIOS[name]
+                method, path, kwargs = build(fixtures)
+                for level in concurrency:
+                    stats = await _run_scenario(
+                        clients[role], method, path, kwargs, expected, level, requests, warmup
+                    )
+                    if not in_process:
+                        stats["queries_per_request"] = None
+                    results.append({"route": name, "concurrency": level, **stats})
+        finally:
+            for client in clients.values():
+                await client.aclose()
+    finally:
+        if in_process:
+            await db.close_async_pool()
+            db.close_pool()
+
+    return {"meta": _meta(concurrency, requests, in_process, base_url), "results": results}
+
+
+def _meta(concurrency, requests, in_process, base_url) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with db.get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM projects),
+                   (SELECT COUNT(*) FROM bids), (SELECT COUNT(*) FROM reviews)
+        """)
+        users, projects, bids, reviews = cur.fetchone()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "mode": "in-process" if in_process else base_url,
+        "backend": db.DB_BACKEND if in_process else None,
+        "concurrency": list(concurrency),
+        "requests_per_level": requests,
+        "pool_max_size": db.POOL_CONFIG["max_size"] if in_process else None,
+        "rows": {"users": users, "projects": projects, "bids": bids, "reviews": reviews},
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2) -> list:
+    """
+    比較兩次結果，回傳 p95 延遲變慢超過 tolerance（比例）或查詢數增加的項目說明；
+    只比較兩邊都有的 (route, concurrency)
+    """
+    before = {(r["route"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = before.get((r["route"], r["concurrency"]))
+        if old is None:
+            continue
+        name = f"{r['route']} @ {r['concurrency']}"
+        old_p95, new_p95 = old["latency_ms"]["p95"], r["latency_ms"]["p95"]
+        if old_p95 and new_p95 and new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old_p95} ms -> {new_p95} ms")
+        old_q, new_q = old.get("queries_per_request"), r.get("queries_per_request")
+        if old_q is not None and new_q is not None and new_q > old_q:
+            regressions.append(f"{name}: queries/request {old_q} -> {new_q}")
+    return regressions
+
+
+def format_results(report: dict) -> str:
+    """以表格列出結果（manage.py bench 的標準輸出）"""
+    lines = [f"{'route':<22}{'conc':>5}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'q/req':>8}{'err':>6}"]
+    for r in report["results"]:
+        lat = r["latency_ms"]
+        queries = r["queries_per_request"]
+        lines.append(
+            f"{r['route']:<22}{r['concurrency']:>5}{r['throughput_rps']:>10}"
+            f"{lat['p50']:>10}{lat['p95']:>10}{lat['p99']:>10}"
+            f"{queries if queries is not None else '-':>8}{r['errors']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def save_results(report: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,166 @@
+# cache.py
+# 程序內的 LRU + TTL 快取，用於每個請求都會查的單筆資料（專案、使用者）。
+# 寫入時在本程序立即失效（同一個交易之後的讀取不會拿到舊資料），commit 後再失效一次
+# （連線的 after_commit：失效到 commit 之間其他請求讀到的仍是舊資料，可能又被放回快取），
+# 並在同一個交易中送出 NOTIFY：commit 後其他 worker 的 LISTEN 連線（events.listen()）也會失效，rollback 則不會送出
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import db
+import events
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 10000))
+CACHE_TTL = float(os.getenv("CACHE_TTL", 30))
+# 設為 0 時只在本程序失效（單一 worker 或沒有 LISTEN 權限時）；
+# SQLite 後端沒有 LISTEN/NOTIFY，一律只在本程序失效（多個 worker 時最多晚 CACHE_TTL 秒看到其他 worker 的寫入）
+CACHE_NOTIFY = db.DB_BACKEND == "postgres" and os.getenv("CACHE_NOTIFY", "1") != "0"
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+
+class TTLCache:
+    """執行緒安全的 LRU 快取，每筆資料在 ttl 秒後過期，超過 max_size 時淘汰最久未使用的資料"""
+
+    def __init__(self, name: str, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (到期時間, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str) -> TTLCache:
+    """取得（必要時建立）名為 name 的快取"""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(name)
+        return _caches[name]
+
+
+def cache_stats() -> dict:
+    """{快取名稱: 命中 / 未命中 / 淘汰等計數}"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {c.name: c.stats() for c in caches}
+
+
+def _cache_metric(field: str):
+    return lambda: {(name,): stats[field] for name, stats in cache_stats().items()}
+
+
+metrics.Callback("cache_entries", "Entries currently held in each cache",
+                 _cache_metric("size"), labels=("cache",))
+for _field in ("hits", "misses", "evictions", "invalidations"):
+    metrics.Callback(f"cache_{_field}_total", f"Cache {_field} per cache",
+                     _cache_metric(_field), kind="counter", labels=("cache",))
+
+
+def _invalidate_local(names, keys):
+    for name in names:
+        get_cache(name).invalidate(*keys)
+
+
+def _payload(names, keys) -> str:
+    return json.dumps({"caches": list(names), "keys": list(keys)})
+
+
+def _invalidate_now_and_after_commit(cur, names, keys):
+    _invalidate_local(names, keys)
+    cur.connection.after_commit.append(lambda: _invalidate_local(names, keys))
+
+
+def invalidate(cur, names, *keys):
+    """在本程序失效 names 快取中的 keys（現在與 commit 後），並以 cur 在目前交易中送出 NOTIFY（同步版）"""
+    _invalidate_now_and_after_commit(cur, names, keys)
+    if CACHE_NOTIFY:
+        events.notify(cur, INVALIDATION_CHANNEL, _payload(names, keys))
+
+
+async def ainvalidate(cur, names, *keys):
+    """在本程序失效 names 快取中的 keys（現在與 commit 後），並以 cur 在目前交易中送出 NOTIFY（非同步版）"""
+    _invalidate_now_and_after_commit(cur, names, keys)
+    if CACHE_NOTIFY:
+        await events.anotify(cur, INVALIDATION_CHANNEL, _payload(names, keys))
+
+
+def _on_invalidation(payload):
+    message = json.loads(payload)
+    _invalidate_local(message["caches"], message["keys"])
+
+
+def _clear_all():
+    # LISTEN 連線中斷期間可能漏掉通知，重新連線後清空所有快取
+    with _caches_lock:
+        caches = list(_caches.values())
+    for c in caches:
+        c.clear()
+
+
+if CACHE_NOTIFY:
+    events.on_notify(INVALIDATION_CHANNEL, _on_invalidation, on_connect=_clear_all)
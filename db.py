@@ -1,5 +1,17 @@
-from contextlib import contextmanager
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
 import psycopg2
+import psycopg2.extensions
+import psycopg_pool
+from psycopg_pool import AsyncConnectionPool
+
+import instrumentation
+import metrics
 
 DATABASE_CONFIG = {
     'host': 'localhost',
@@ -9,14 +21,493 @@ DATABASE_CONFIG = {
     'port': 5432
 }
 
+# 資料庫後端：postgres（預設）或 sqlite（嵌入式，不需要另外的資料庫服務，見 sqlite_backend.py）
+DB_BACKEND = os.getenv('DB_BACKEND', 'postgres')
+if DB_BACKEND not in ('postgres', 'sqlite'):
+    raise ValueError(f"unsupported DB_BACKEND: {DB_BACKEND!r}")
+
+SQLITE_CONFIG = {
+    'path': os.getenv('SQLITE_PATH', 'work_platform.sqlite3'),
+    'busy_timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 5)),  # 等待寫入鎖最多幾秒
+}
+
+# 版本化的 schema 變更（依檔名排序套用，記錄在 schema_migrations）
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# 連線池設定（可用環境變數覆寫）
+POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),          # 取得連線最多等待秒數
+    'check_after': float(os.getenv('DB_POOL_CHECK_AFTER', 30)),  # 閒置超過幾秒才做健康檢查
+}
+
+
+class PoolTimeout(Exception):
+    """等待連線逾時"""
+
+
+# 連線 / 交易操作可能丟出的驅動程式例外
+_DRIVER_ERRORS = (psycopg2.Error, sqlite3.Error)
+
+
+class ConnectionPool:
+    """執行緒安全的連線池；connect 為建立連線的函式（預設 psycopg2.connect）"""
+
+    def __init__(self, min_size=2, max_size=10, timeout=5.0, check_after=30.0,
+                 connect=psycopg2.connect, **conn_kwargs):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("invalid pool size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self._connect_func = connect
+        self._conn_kwargs = conn_kwargs
+        self._cond = threading.Condition()
+        self._idle = deque()        # (conn, 歸還時間)
+        self._in_use = set()
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            'connections_opened': 0,
+            'connections_discarded': 0,
+            'acquired': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = self._connect_func(**self._conn_kwargs)
+        with self._cond:
+            self._stats['connections_opened'] += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._stats['connections_discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        if conn.closed:
+            return False
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except _DRIVER_ERRORS:
+            return False
+
+    def getconn(self, timeout=None):
+        """取得連線；池滿時最多等待 timeout 秒"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            conn = None
+            idle_since = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                while not self._idle and len(self._in_use) >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"no connection available within {timeout}s")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    if self._closed:
+                        raise PoolTimeout("connection pool is closed")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    create = True
+                # 先佔位，避免建立連線期間超過上限
+                placeholder = object()
+                self._in_use.add(placeholder)
+
+            try:
+                if create:
+                    conn = self._connect()
+                elif conn.closed or (time.monotonic() - idle_since > self.check_after
+                                     and not self._is_alive(conn)):
+                    self._discard(conn)
+                    conn = None
+            except Exception:
+                with self._cond:
+                    self._in_use.discard(placeholder)
+                    self._cond.notify()
+                raise
+
+            with self._cond:
+                self._in_use.discard(placeholder)
+                if conn is None:
+                    self._cond.notify()
+                    continue
+                self._in_use.add(conn)
+                waited = time.monotonic() - start
+                self._stats['acquired'] += 1
+                self._stats['wait_time_total'] += waited
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+                return conn
+
+    def putconn(self, conn, discard=False):
+        """歸還連線；壞掉或交易未結束的連線直接丟棄"""
+        if not discard and not conn.closed:
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except _DRIVER_ERRORS:
+                    discard = True
+        with self._cond:
+            self._in_use.discard(conn)
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        """連線池狀態：使用中、閒置、等待中、取得連線的等待時間"""
+        with self._cond:
+            acquired = self._stats['acquired']
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                **self._stats,
+                'wait_time_avg': self._stats['wait_time_total'] / acquired if acquired else 0.0,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+
+_pool = None
+_async_pool = None
+_current_uow = ContextVar("current_uow", default=None)
+
+
+def init_pool(**overrides) -> ConnectionPool:
+    """建立全域連線池（由 main.py 的 lifespan 呼叫）"""
+    global _pool
+    if _pool is None:
+        if DB_BACKEND == 'sqlite':
+            import sqlite_backend
+            _pool = ConnectionPool(**{**POOL_CONFIG, **overrides}, connect=sqlite_backend.connect, **SQLITE_CONFIG)
+        else:
+            _pool = ConnectionPool(**{**POOL_CONFIG, **overrides}, **DATABASE_CONFIG,
+                                   connection_factory=instrumentation.InstrumentedConnection)
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def _connect():
+    """不經過連線池直接建立連線"""
+    if DB_BACKEND == 'sqlite':
+        import sqlite_backend
+        return sqlite_backend.connect(**SQLITE_CONFIG)
+    return psycopg2.connect(**DATABASE_CONFIG, connection_factory=instrumentation.InstrumentedConnection)
+
+
+def get_pool_stats() -> dict:
+    return _pool.stats() if _pool is not None else {}
+
+
 @contextmanager
 def get_db():
-    conn = psycopg2.connect(**DATABASE_CONFIG)
+    # 沒有啟用連線池時（例如獨立腳本）直接建立連線
+    if _pool is None:
+        start = time.perf_counter()
+        conn = _connect()
+        instrumentation.record_acquire(time.perf_counter() - start)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return
+
+    start = time.perf_counter()
+    conn = _pool.getconn()
+    instrumentation.record_acquire(time.perf_counter() - start)
+    broken = False
     try:
         yield conn
         conn.commit()
     except Exception:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except _DRIVER_ERRORS:
+            broken = True
         raise
     finally:
-        conn.close()
\ No newline at end of file
+        _pool.putconn(conn, discard=broken or bool(conn.closed))
+
+
+
+def run_migrations(directory=MIGRATIONS_DIR) -> list:
+    """依序套用尚未執行的 migrations/*.sql，每個檔案一個交易；回傳本次套用的版本"""
+    if DB_BACKEND == 'sqlite':
+        import sqlite_backend
+        # SQLite 版的 schema 在 migrations/sqlite/（與上層同名、同樣的索引）
+        return sqlite_backend.run_migrations(os.path.join(directory, "sqlite"), **SQLITE_CONFIG)
+    applied = []
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    try:
+        cur = conn.cursor()
+        # 避免多個程序同時執行 migration
+        cur.execute("SELECT pg_advisory_lock(hashtext('schema_migrations'))")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(255) PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+        conn.commit()
+        cur.execute("SELECT version FROM schema_migrations")
+        done = {row[0] for row in cur.fetchall()}
+        for name in sorted(f for f in os.listdir(directory) if f.endswith(".sql")):
+            version = name[:-len(".sql")]
+            if version in done:
+                continue
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                sql = f.read()
+            try:
+                cur.execute(sql)
+                cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+        cur.execute("SELECT pg_advisory_unlock(hashtext('schema_migrations'))")
+        conn.commit()
+    finally:
+        conn.close()
+    return applied
+
+
+async def _aconnect():
+    """不經過連線池直接建立非同步連線"""
+    if DB_BACKEND == 'sqlite':
+        import sqlite_backend
+        return await sqlite_backend.aconnect(**SQLITE_CONFIG)
+    return await instrumentation.InstrumentedAsyncConnection.connect(
+        **_async_conn_kwargs(), cursor_factory=instrumentation.InstrumentedAsyncCursor
+    )
+
+
+def _async_conn_kwargs() -> dict:
+    # psycopg 3 使用 libpq 的 dbname 參數名稱
+    kwargs = dict(DATABASE_CONFIG)
+    kwargs['dbname'] = kwargs.pop('database')
+    return kwargs
+
+
+async def init_async_pool(cursor_factory=None, **overrides) -> AsyncConnectionPool:
+    """
+    建立全域非同步連線池（由 main.py 的 lifespan 呼叫）
+    cursor_factory：PostgreSQL 連線使用的 cursor 類別，預設為統計查詢的 InstrumentedAsyncCursor
+    （SQLite 後端在 sqlite_backend.Cursor 統計）
+    """
+    global _async_pool
+    if _async_pool is None:
+        config = {**POOL_CONFIG, **overrides}
+        if DB_BACKEND == 'sqlite':
+            import sqlite_backend
+            pool = sqlite_backend.AsyncConnectionPool(
+                min_size=config['min_size'],
+                max_size=config['max_size'],
+                timeout=config['timeout'],
+                cursor_factory=cursor_factory,
+                **SQLITE_CONFIG,
+            )
+            await pool.open()
+            _async_pool = pool
+            return _async_pool
+        kwargs = _async_conn_kwargs()
+        kwargs['cursor_factory'] = cursor_factory or instrumentation.InstrumentedAsyncCursor
+        pool = AsyncConnectionPool(
+            kwargs=kwargs,
+            connection_class=instrumentation.InstrumentedAsyncConnection,
+            min_size=config['min_size'],
+            max_size=config['max_size'],
+            timeout=config['timeout'],
+            max_idle=max(config['check_after'] * 10, 60),
+            open=False,
+        )
+        await pool.open(wait=True)
+        _async_pool = pool
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_async_pool_stats() -> dict:
+    return _async_pool.get_stats() if _async_pool is not None else {}
+
+
+def _pool_connections() -> dict:
+    sync, aio = get_pool_stats(), get_async_pool_stats()
+    values = {}
+    if sync:
+        values[("sync", "in_use")] = sync['in_use']
+        values[("sync", "idle")] = sync['idle']
+    if aio:
+        values[("async", "in_use")] = aio.get('pool_size', 0) - aio.get('pool_available', 0)
+        values[("async", "idle")] = aio.get('pool_available', 0)
+    return values
+
+
+def _pool_connections_opened() -> dict:
+    sync, aio = get_pool_stats(), get_async_pool_stats()
+    values = {}
+    if sync:
+        values[("sync",)] = sync['connections_opened']
+    if aio:
+        values[("async",)] = aio.get('connections_num', 0)
+    return values
+
+
+metrics.Callback("db_pool_connections", "Pooled database connections by state",
+                 _pool_connections, labels=("pool", "state"))
+metrics.Callback("db_connections_opened_total", "Database connections opened by the pools",
+                 _pool_connections_opened, kind="counter", labels=("pool",))
+
+
+class AsyncUnitOfWork:
+    """一個請求共用一條連線、一個交易；第一次查詢時才取得連線"""
+
+    def __init__(self):
+        self.conn = None
+
+    async def connection(self):
+        if self.conn is None:
+            start = time.perf_counter()
+            if _async_pool is None:
+                self.conn = await _aconnect()
+            else:
+                try:
+                    self.conn = await _async_pool.getconn()
+                except psycopg_pool.PoolTimeout as exc:
+                    raise PoolTimeout(str(exc)) from exc
+            instrumentation.record_acquire(time.perf_counter() - start)
+        return self.conn
+
+    async def commit(self):
+        if self.conn is not None:
+            await self.conn.commit()
+
+    async def rollback(self):
+        if self.conn is not None:
+            await self.conn.rollback()
+
+    async def close(self, rollback=False):
+        """結束交易並歸還連線"""
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        try:
+            if rollback:
+                await conn.rollback()
+            else:
+                await conn.commit()
+        finally:
+            if _async_pool is None:
+                await conn.close()
+            else:
+                await _async_pool.putconn(conn)
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """在此區塊內的 get_async_db() 都共用同一條連線與交易，結束時 commit（例外時 rollback）"""
+    uow = AsyncUnitOfWork()
+    token = _current_uow.set(uow)
+    try:
+        yield uow
+    except BaseException:
+        await uow.close(rollback=True)
+        raise
+    else:
+        await uow.close()
+    finally:
+        try:
+            _current_uow.reset(token)
+        except ValueError:
+            # 結束時可能已不在原本的 context（例如回應送出後才清理）
+            _current_uow.set(None)
+
+
+@asynccontextmanager
+async def get_async_db():
+    """非同步版的 get_db：不阻塞 event loop"""
+    uow = _current_uow.get()
+    if uow is not None:
+        # 由 unit of work 負責 commit / rollback
+        yield await uow.connection()
+        return
+
+    start = time.perf_counter()
+    if _async_pool is None:
+        conn = await _aconnect()
+        instrumentation.record_acquire(time.perf_counter() - start)
+        try:
+            yield conn
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            await conn.close()
+        return
+
+    try:
+        async with _async_pool.connection() as conn:
+            instrumentation.record_acquire(time.perf_counter() - start)
+            try:
+                yield conn
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+    except psycopg_pool.PoolTimeout as exc:
+        raise PoolTimeout(str(exc)) from exc
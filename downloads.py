@@ -0,0 +1,162 @@
+# downloads.py
+# 檔案下載回應：強 ETag、Last-Modified、條件式 GET（304）、單一範圍的 Range 請求（206 / 416），
+# 伺服器支援 ASGI zerocopysend 擴充時以 sendfile 傳送，否則在 thread pool 分塊讀檔
+import asyncio
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+from starlette.responses import Response
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 256 * 1024))
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 比對（弱比較：忽略 W/ 前綴），支援 * 與逗號分隔的多個值"""
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) <= since
+
+
+def _parse_range(header: str, size: int):
+    """
+    解析 Range 標頭，回傳 (start, end)（含 end）；
+    格式不支援或包含多個範圍時回傳 None（回完整內容），無法滿足時回傳 "unsatisfiable"
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # bytes=-N：最後 N 個位元組
+            length = int(last)
+            if length <= 0:
+                return "unsatisfiable"
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class FileDownloadResponse(Response):
+    """
+    以附件方式下載 path 的檔案。
+    etag 為不含引號的強驗證值（例如內容的 SHA-256）；未提供時以檔案大小與修改時間組成。
+    """
+
+    def __init__(self, path: str, filename: str, etag: str = None, media_type: str = None):
+        self.path = path
+        self.status_code = 200
+        self.background = None
+        st = os.stat(path)
+        if not stat.S_ISREG(st.st_mode):
+            raise FileNotFoundError(path)
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.etag = f'"{etag or f"{st.st_mtime_ns:x}-{st.st_size:x}"}"'
+        self.media_type = media_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        self.filename = filename
+        self.init_headers({})
+
+    def _base_headers(self):
+        return [
+            ("etag", self.etag),
+            ("last-modified", formatdate(self.mtime, usegmt=True)),
+            ("accept-ranges", "bytes"),
+            # 需要登入才能下載：只允許瀏覽器快取，每次使用前都要重新驗證（回 304）
+            ("cache-control", "private, no-cache"),
+        ]
+
+    def _select(self, headers):
+        """依條件式標頭決定 (status, start, end)"""
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, self.etag):
+                return 304, 0, -1
+        elif "if-modified-since" in headers and not_modified_since(headers["if-modified-since"], self.mtime):
+            return 304, 0, -1
+
+        range_header = headers.get("range")
+        if range_header and self.size > 0:
+            if_range = headers.get("if-range")
+            # If-Range 只接受強 ETag 或與 Last-Modified 相同的日期，不符合時回完整檔案
+            if if_range is None or if_range.strip() == self.etag or (
+                not if_range.strip().startswith(('"', "W/"))
+                and if_range.strip() == formatdate(self.mtime, usegmt=True)
+            ):
+                selected = _parse_range(range_header, self.size)
+                if selected == "unsatisfiable":
+                    return 416, 0, -1
+                if selected is not None:
+                    return 206, *selected
+        return 200, 0, self.size - 1
+
+    async def __call__(self, scope, receive, send):
+        request_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        status, start, end = self._select(request_headers)
+        headers = self._base_headers()
+        length = end - start + 1
+
+        if status == 304:
+            body_length = 0
+        elif status == 416:
+            headers.append(("content-range", f"bytes */{self.size}"))
+            body_length = 0
+        else:
+            headers += [
+                ("content-type", self.media_type),
+                ("content-disposition", f"attachment; filename*=UTF-8''{quote(self.filename)}"),
+            ]
+            if status == 206:
+                headers.append(("content-range", f"bytes {start}-{end}/{self.size}"))
+            body_length = length
+        headers.append(("content-length", str(body_length)))
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        if scope["method"] == "HEAD" or body_length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": start,
+                    "count": length,
+                })
+                return
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
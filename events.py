@@ -0,0 +1,215 @@
+# events.py
+# 資料庫通知（LISTEN/NOTIFY）：每個 worker 只有一條 LISTEN 連線，收到的通知依頻道交給登記的處理函式
+# - cache.py：其他 worker 寫入時失效本程序的快取
+# - 使用者事件：投標、接受投標、上傳結案檔案、評價時在同一個交易中通知相關的使用者，
+#   commit 後每個 worker 把事件推送給自己的訂閱者（/events 的 Server-Sent Events），頁面不必一直重新整理
+#
+# SQLite 後端沒有 LISTEN/NOTIFY：pg_notify() 由 sqlite_backend 實作，commit 後只在本程序內送出
+# （多個 worker 時只有寫入的 worker 的訂閱者收得到）
+import asyncio
+import json
+import logging
+import os
+
+import psycopg
+
+import db
+import metrics
+import sqlite_backend
+
+logger = logging.getLogger(__name__)
+
+# 設為 0 時不送出使用者事件，/events 回 204（瀏覽器不再重新連線）
+LIVE_EVENTS = os.getenv("LIVE_EVENTS", "1") != "0"
+# 沒有事件時每隔幾秒送出註解，避免代理伺服器 / 瀏覽器因閒置而中斷連線
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", 15))
+# 每條串流最長的時間（秒），之後由瀏覽器自動重新連線（連線會重新分配到各個 worker）。
+# uvicorn 關閉時會等進行中的回應結束，串流最多讓關閉等這麼久（或以 --timeout-graceful-shutdown 限制）
+EVENTS_STREAM_TIMEOUT = float(os.getenv("EVENTS_STREAM_TIMEOUT", 60))
+# 每個訂閱者最多暫存的事件數，讀取太慢時改送 resync
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+
+USER_CHANNEL = "user_events"
+
+_NOTIFY = "SELECT pg_notify(%s, %s)"
+# 以一個語句送出多則通知（SQLite 的陣列參數以 JSON 傳入）
+_NOTIFY_MANY = "SELECT pg_notify(%s, payload.value) FROM unnest(%s::text[]) AS payload(value)"
+sqlite_backend.register("unnest(%s::text[]) AS payload(value)", "json_each(%s) AS payload")
+
+
+# ---------------------------------------------------------------- LISTEN
+
+_channels = {}  # 頻道 -> (handler(payload), on_connect())
+
+
+def on_notify(channel: str, handler, on_connect=None):
+    """
+    登記頻道的處理函式（在 listen() 開始前呼叫）。
+    on_connect 在每次（重新）連線後呼叫：中斷期間可能漏掉通知，由它處理
+    """
+    _channels[channel] = (handler, on_connect)
+
+
+def notify(cur, channel: str, payload: str):
+    """以 cur 在目前交易中送出 NOTIFY（commit 後才送出，rollback 則不會送出）"""
+    cur.execute(_NOTIFY, (channel, payload))
+
+
+async def anotify(cur, channel: str, payload: str):
+    """notify 的非同步版"""
+    await cur.execute(_NOTIFY, (channel, payload))
+
+
+def _dispatch(channel, payload):
+    entry = _channels.get(channel)
+    if entry is None:
+        return
+    try:
+        entry[0](payload)
+    except (ValueError, KeyError, TypeError):
+        logger.warning("ignoring malformed notification on %s: %r", channel, payload)
+
+
+def _connected():
+    for _, on_connect in _channels.values():
+        if on_connect is not None:
+            on_connect()
+
+
+async def listen(retry_delay: float = 1.0):
+    """以一條專用連線 LISTEN 所有登記的頻道（在 lifespan 中以背景 task 執行）"""
+    if not _channels:
+        return
+    if db.DB_BACKEND == "sqlite":
+        await _listen_local()
+        return
+    while True:
+        try:
+            conn = await psycopg.AsyncConnection.connect(**db._async_conn_kwargs(), autocommit=True)
+            async with conn:
+                for channel in _channels:
+                    await conn.execute(f"LISTEN {channel}")
+                _connected()
+                async for message in conn.notifies():
+                    _dispatch(message.channel, message.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("notification listener disconnected, retrying")
+            await asyncio.sleep(retry_delay)
+
+
+async def _listen_local():
+    # commit 在 SQLite 連線的執行緒中，交回 event loop 處理
+    loop = asyncio.get_running_loop()
+
+    def forward(channel, payload):
+        try:
+            loop.call_soon_threadsafe(_dispatch, channel, payload)
+        except RuntimeError:
+            pass  # event loop 已關閉
+
+    sqlite_backend.add_notify_listener(forward)
+    try:
+        await loop.create_future()  # 直到被取消
+    finally:
+        sqlite_backend.remove_notify_listener(forward)
+
+
+# ---------------------------------------------------------------- 使用者事件
+
+_subscribers = {}  # user_id -> {asyncio.Queue}（只在 event loop 中存取）
+
+# 重新連線 / 事件太多時送出：頁面應重新取得完整內容
+_RESYNC = "event: resync\ndata: {}\n\n"
+
+LIVE_EVENT_MESSAGES = metrics.Counter("live_events_total", "User events pushed to subscribers by outcome",
+                                      ("event", "outcome"))
+metrics.Callback("live_event_subscribers", "Open Server-Sent Events streams",
+                 lambda: {(): sum(len(queues) for queues in _subscribers.values())})
+
+
+def _event_payload(event, user_ids, data) -> str:
+    return json.dumps({"event": event, "users": sorted(set(user_ids)), "data": data})
+
+
+def publish(cur, event: str, user_ids, **data):
+    """在目前交易中送出給 user_ids 的事件（同步版；data 須可序列化成 JSON）"""
+    if LIVE_EVENTS and user_ids:
+        notify(cur, USER_CHANNEL, _event_payload(event, user_ids, data))
+
+
+async def apublish(cur, event: str, user_ids, **data):
+    """在目前交易中送出給 user_ids 的事件（非同步版）"""
+    if LIVE_EVENTS and user_ids:
+        await anotify(cur, USER_CHANNEL, _event_payload(event, user_ids, data))
+
+
+def publish_many(cur, messages):
+    """在目前交易中送出多則事件（[(event, user_ids, data)]，例如批次匯入），只需一次來回"""
+    payloads = [_event_payload(event, user_ids, data) for event, user_ids, data in messages if user_ids]
+    if LIVE_EVENTS and payloads:
+        cur.execute(_NOTIFY_MANY, (USER_CHANNEL, payloads))
+
+
+async def apublish_many(cur, messages):
+    """publish_many 的非同步版"""
+    payloads = [_event_payload(event, user_ids, data) for event, user_ids, data in messages if user_ids]
+    if LIVE_EVENTS and payloads:
+        await cur.execute(_NOTIFY_MANY, (USER_CHANNEL, payloads))
+
+
+def _offer(queue, message) -> bool:
+    try:
+        queue.put_nowait(message)
+        return True
+    except asyncio.QueueFull:
+        # 讀取太慢的連線：丟掉尚未送出的事件，改送 resync
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_RESYNC)
+        return False
+
+
+def _on_user_event(payload):
+    message = json.loads(payload)
+    event = message["event"]
+    text = f"event: {event}\ndata: {json.dumps(message['data'])}\n\n"
+    for user_id in message["users"]:
+        for queue in _subscribers.get(user_id, ()):
+            LIVE_EVENT_MESSAGES.inc(event, "delivered" if _offer(queue, text) else "dropped")
+
+
+def _resync_all():
+    for queues in _subscribers.values():
+        for queue in queues:
+            _offer(queue, _RESYNC)
+
+
+if LIVE_EVENTS:
+    on_notify(USER_CHANNEL, _on_user_event, on_connect=_resync_all)
+
+
+async def stream(user_id: int):
+    """使用者的事件串流（text/event-stream 的內容），連線中斷或超過 EVENTS_STREAM_TIMEOUT 時結束"""
+    queue = asyncio.Queue(EVENTS_QUEUE_SIZE)
+    _subscribers.setdefault(user_id, set()).add(queue)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EVENTS_STREAM_TIMEOUT
+    try:
+        # 瀏覽器重新連線前等待的毫秒數
+        yield "retry: 3000\n\n"
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                yield await asyncio.wait_for(queue.get(), min(EVENTS_KEEPALIVE, remaining))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        queues = _subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del _subscribers[user_id]
@@ -0,0 +1,63 @@
+# export.py
+# 匯出格式：將 ExportRepository.stream() 產生的批次轉成 NDJSON 或 CSV 文字區塊，
+# 每批輸出一個區塊，路由（StreamingResponse）與 CLI（manage.py export）共用
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _plain(value):
+    """datetime / Decimal 轉成 JSON 與 CSV 都能表示的值"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _format_batch(fmt: str, columns, rows, header: bool) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    return buf.getvalue()
+
+
+def format_export(batches, fmt: str):
+    """同步版：逐批產生文字區塊（fmt 為 FORMATS 的 key）"""
+    first = True
+    try:
+        for columns, rows in batches:
+            chunk = _format_batch(fmt, columns, rows, header=first)
+            first = False
+            if chunk:
+                yield chunk
+    finally:
+        # 提早停止時一併關閉 batches（釋放其中的 cursor 與連線）
+        batches.close()
+
+
+async def aformat_export(batches, fmt: str):
+    """非同步版：逐批產生 UTF-8 編碼的區塊，供 StreamingResponse 使用"""
+    first = True
+    try:
+        async for columns, rows in batches:
+            chunk = _format_batch(fmt, columns, rows, header=first)
+            first = False
+            if chunk:
+                yield chunk.encode("utf-8")
+    finally:
+        await batches.aclose()
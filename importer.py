@@ -0,0 +1,207 @@
+# importer.py
+# 批次匯入：逐列讀取 CSV / NDJSON 並驗證，通過驗證的資料列先以 COPY 文字格式寫入暫存檔（stage），
+# 之後才取得資料庫連線，由 ImportRepository 以 COPY 載入暫存表，
+# 全部沒有錯誤時才在同一個交易中合併進 projects / bids（任何一列有錯誤就不寫入任何資料）。
+# 路由（POST /import/{kind}）與 CLI（manage.py import）共用；欄位與 export.py 匯出的欄位同名，
+# 匯出的檔案可以直接匯入（其他欄位會被忽略）
+import asyncio
+import csv
+import json
+import os
+import re
+import tempfile
+
+import metrics
+
+FORMATS = ("csv", "ndjson")
+
+# 單一檔案的大小上限（POST /import/{kind}，由 UploadSizeLimitMiddleware 檢查）
+MAX_IMPORT_SIZE = int(os.getenv("MAX_IMPORT_SIZE", 50 * 1024 * 1024))
+# 單一檔案最多的資料列數
+MAX_IMPORT_ROWS = int(os.getenv("MAX_IMPORT_ROWS", 100000))
+# 回報中最多列出的錯誤列數（錯誤總數仍會完整計算）
+MAX_IMPORT_ERRORS = int(os.getenv("MAX_IMPORT_ERRORS", 100))
+
+# INTEGER 欄位的上限
+_MAX_INT = 2 ** 31 - 1
+
+IMPORTS = metrics.Counter("imports_total", "Bulk imports by kind and outcome", ("kind", "outcome"))
+IMPORT_ROWS = metrics.Counter("import_rows_total", "Rows merged by bulk imports", ("kind",))
+
+
+def _text(row, name, required=False, max_length=None):
+    value = row.get(name)
+    if value is None:
+        value = ""
+    if not isinstance(value, str):
+        raise ValueError(f"{name} 必須是文字")
+    if required and not value.strip():
+        raise ValueError(f"{name} 為必填")
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"{name} 超過 {max_length} 字")
+    if "\x00" in value:
+        raise ValueError(f"{name} 含有 NUL 字元")
+    return value
+
+
+def _integer(row, name, minimum=0):
+    value = row.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+        if value.lstrip("-").isdigit():
+            value = int(value)
+    if value is None or value == "":
+        raise ValueError(f"{name} 為必填")
+    if isinstance(value, bool) or not isinstance(value, int) or not minimum <= value <= _MAX_INT:
+        raise ValueError(f"{name} 必須是 {minimum} 到 {_MAX_INT} 的整數")
+    return value
+
+
+_COPY_ESCAPE = re.compile(r"[\\\t\n\r]")
+_COPY_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+
+
+def _copy_field(value) -> str:
+    """COPY 文字格式的一個欄位（None 為 \\N，反斜線與 tab / 換行跳脫）"""
+    if value is None:
+        return "\\N"
+    return _COPY_ESCAPE.sub(lambda m: _COPY_ESCAPES[m.group()], str(value))
+
+
+# 每種資料的欄位（第一個為必填的欄位名稱）與驗證函式：回傳暫存表的欄位值（不含行號）
+def _project(row):
+    return (
+        _text(row, "title", required=True, max_length=255),
+        _text(row, "description"),
+        _integer(row, "budget"),
+    )
+
+
+def _bid(row):
+    return (
+        _integer(row, "project_id", minimum=1),
+        _integer(row, "price"),
+        _text(row, "message"),
+    )
+
+
+KINDS = {
+    "projects": (("title", "budget"), _project),
+    "bids": (("project_id", "price"), _bid),
+}
+
+
+class ImportReader:
+    """
+    逐列讀取、驗證匯入檔（file 為文字檔，CSV 須有標題列）。
+    迭代時只產生通過驗證的資料列 (行號, 欄位值...)，錯誤記在 errors；
+    stage() 把通過驗證的資料列寫入暫存檔（path），ImportRepository 再由暫存檔 COPY。
+    error_count 不為 0 時不寫入任何資料，資料庫端的檢查（例如投標的專案不存在）也以 add_error 記錄
+    """
+
+    def __init__(self, kind: str, fmt: str, file, max_rows: int = MAX_IMPORT_ROWS,
+                 max_errors: int = MAX_IMPORT_ERRORS):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown import format: {fmt}")
+        self.kind = kind
+        self.required, self._validate = KINDS[kind]
+        self.fmt = fmt
+        self.file = file
+        self.max_rows = max_rows
+        self.max_errors = max_errors
+        self.rows = 0
+        self.errors = []
+        self.error_count = 0
+        self.path = None
+
+    def add_error(self, line: int, message: str):
+        self.error_count += 1
+        if self.errors and self.errors[-1]["line"] == line:
+            self.errors[-1]["errors"].append(message)
+        elif len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": [message]})
+
+    def _records(self):
+        """依序產生 (行號, dict)；無法解析的列產生 (行號, None) 並記錄錯誤"""
+        if self.fmt == "csv":
+            reader = csv.DictReader(self.file)
+            missing = [name for name in self.required if name not in (reader.fieldnames or ())]
+            if missing:
+                self.add_error(1, f"缺少欄位 {', '.join(missing)}")
+                return
+            for record in reader:
+                if None in record:
+                    self.add_error(reader.line_num, "欄位數比標題列多")
+                    yield reader.line_num, None
+                else:
+                    yield reader.line_num, record
+            return
+        for line, text in enumerate(self.file, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError:
+                self.add_error(line, "JSON 格式錯誤")
+                yield line, None
+                continue
+            if not isinstance(record, dict):
+                self.add_error(line, "每一列須為 JSON 物件")
+                yield line, None
+                continue
+            yield line, record
+
+    def __iter__(self):
+        line = 1
+        try:
+            for line, record in self._records():
+                self.rows += 1
+                if self.rows > self.max_rows:
+                    self.add_error(line, f"超過單次匯入上限 {self.max_rows} 列")
+                    return
+                if record is None:
+                    continue
+                try:
+                    values = self._validate(record)
+                except ValueError as exc:
+                    self.add_error(line, str(exc))
+                    continue
+                yield (line, *values)
+        except UnicodeDecodeError:
+            self.add_error(line + 1, "檔案不是 UTF-8 編碼")
+        except csv.Error as exc:
+            self.add_error(line + 1, f"CSV 格式錯誤：{exc}")
+
+    def stage(self):
+        """讀取、驗證整個檔案，通過驗證的資料列以 COPY 文字格式寫入暫存檔（self.path）"""
+        fd, self.path = tempfile.mkstemp(prefix="import-", suffix=".copy")
+        with open(fd, "w", encoding="utf-8", newline="") as out:
+            for row in self:
+                out.write("\t".join(map(_copy_field, row)) + "\n")
+
+    async def astage(self):
+        """非同步版：在執行緒中讀取、驗證並寫入暫存檔（不阻塞 event loop，也還沒有佔用資料庫連線）"""
+        await asyncio.to_thread(self.stage)
+
+    def discard(self):
+        """刪除暫存檔"""
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def report(self, imported: int) -> dict:
+        """匯入結果（路由回傳的 JSON、CLI 的輸出）"""
+        outcome = "rejected" if self.error_count else "imported"
+        IMPORTS.inc(self.kind, outcome)
+        if imported:
+            IMPORT_ROWS.inc(self.kind, amount=imported)
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "imported": imported,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
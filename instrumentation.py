@@ -0,0 +1,270 @@
+# instrumentation.py
+# 每個請求的資料庫統計：查詢數、DB 時間、取得連線的等待時間與樣板渲染時間，
+# 以 Server-Timing 標頭回傳（瀏覽器開發者工具的 Timing 分頁可直接看到）。
+# 超過 SLOW_QUERY_MS 的查詢以正規化後的 SQL 記錄；同一個語句形狀在一個請求內
+# 執行超過 REPEATED_QUERY_THRESHOLD 次時警告（迴圈內逐筆查詢的 N+1）
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+import jinja2
+import psycopg
+import psycopg2.extensions
+from starlette.datastructures import MutableHeaders
+
+import metrics
+from statements import PreparedStatement
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+REPEATED_QUERY_THRESHOLD = int(os.getenv("REPEATED_QUERY_THRESHOLD", 5))
+
+# 全程序累計（/metrics）；每個請求的數值在 RequestStats
+DB_QUERY_TIME = metrics.Histogram("db_query_duration_seconds", "Database statement execution time")
+DB_ROWS = metrics.Counter("db_rows_fetched_total", "Rows returned by database statements")
+DB_ACQUIRE_TIME = metrics.Histogram("db_connection_acquire_seconds", "Time spent waiting for a database connection")
+TEMPLATE_RENDER_TIME = metrics.Histogram("template_render_seconds", "Jinja2 template render time", ("template",))
+
+# 字串 / 數字常值與參數佔位符都換成 ?，只留下語句的形狀
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|\$\d+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """去掉常值與多餘空白的 SQL（慢查詢記錄與重複查詢偵測用）"""
+    return " ".join(_LITERALS.sub("?", sql).split())
+
+
+class RequestStats:
+    """一個請求內的資料庫與樣板統計（時間單位為秒）"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.acquire_time = 0.0
+        self.template_time = 0.0
+        self.shapes = Counter()
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing 標頭的值（毫秒）"""
+        return ", ".join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f"db-acquire;dur={self.acquire_time * 1000:.1f}",
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f"app;dur={total * 1000:.1f}",
+        ))
+
+    def repeated(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> list:
+        """[(語句形狀, 次數)]：執行超過 threshold 次的語句"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    """目前請求的統計；不在請求內（例如腳本）時為 None"""
+    return _current.get()
+
+
+@contextmanager
+def track():
+    """在這個 context 內統計查詢；已在統計中時沿用外層的（例如 bench.py 在同一個程序內呼叫 app）"""
+    stats = _current.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def record_query(sql, seconds: float, rows: int = 0):
+    DB_QUERY_TIME.observe(seconds)
+    if isinstance(sql, PreparedStatement):
+        sql.record(seconds)
+    if rows > 0:
+        DB_ROWS.inc(amount=rows)
+    stats = _current.get()
+    shape = None
+    if stats is not None:
+        shape = normalize_sql(str(sql))
+        stats.queries += 1
+        stats.db_time += seconds
+        stats.shapes[shape] += 1
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning("slow query (%.1f ms): %s", seconds * 1000, shape or normalize_sql(str(sql)))
+
+
+def record_acquire(seconds: float):
+    DB_ACQUIRE_TIME.observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.acquire_time += seconds
+
+
+def result_rows(cursor) -> int:
+    """查詢回傳的列數（server-side cursor 與不回傳資料的語句為 0）"""
+    return max(cursor.rowcount, 0) if cursor.description is not None else 0
+
+
+def run_after_commit(conn):
+    """交易已 commit：依序執行（並清空）連線的 after_commit 函式"""
+    callbacks, conn.after_commit = conn.after_commit, []
+    for callback in callbacks:
+        callback()
+
+
+class _InstrumentedCursorMixin:
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            # 預備語句以名稱執行（server-side cursor 的 DECLARE 不能接 EXECUTE，照常送出 SQL）
+            if isinstance(query, PreparedStatement) and self.name is None:
+                return super().execute(self.connection.prepare(query), vars)
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - start, result_rows(self))
+
+    def copy_expert(self, sql, file, size=8192):
+        # 整個 COPY 統計為一個查詢（含讀取 file 的時間）
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(sql, time.perf_counter() - start, max(self.rowcount, 0))
+
+
+@lru_cache(maxsize=None)
+def _instrumented_cursor(cursor_class):
+    return type(f"Instrumented{cursor_class.__name__}", (_InstrumentedCursorMixin, cursor_class), {})
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """
+    psycopg2 的 connection_factory：所有 cursor（包含 RealDictCursor）的 execute 都會被統計，
+    statements.PreparedStatement 在這條連線上準備一次後以名稱執行
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()  # 這條連線上已 PREPARE 的語句名稱（不受 rollback 影響）
+        self.after_commit = []  # 目前交易 commit 後才執行的函式（見 cache.invalidate）；rollback 時捨棄
+
+    def commit(self):
+        super().commit()
+        run_after_commit(self)
+
+    def rollback(self):
+        self.after_commit.clear()
+        super().rollback()
+
+    def cursor(self, *args, cursor_factory=None, **kwargs):
+        cursor_class = cursor_factory or self.cursor_factory or psycopg2.extensions.cursor
+        return super().cursor(*args, cursor_factory=_instrumented_cursor(cursor_class), **kwargs)
+
+    def prepare(self, statement: PreparedStatement) -> str:
+        """必要時 PREPARE statement，回傳以名稱執行的 EXECUTE 語句"""
+        if statement.name not in self.prepared:
+            with super().cursor() as cur:
+                cur.execute(statement.prepare_sql)
+            self.prepared.add(statement.name)
+        return statement.execute_sql
+
+
+class InstrumentedAsyncConnection(psycopg.AsyncConnection):
+    """psycopg 3 非同步連線：同 InstrumentedConnection，commit 後執行 after_commit 的函式"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.after_commit = []
+
+    async def commit(self):
+        await super().commit()
+        run_after_commit(self)
+
+    async def rollback(self):
+        self.after_commit.clear()
+        await super().rollback()
+
+
+class InstrumentedAsyncCursor(psycopg.AsyncCursor):
+    """psycopg 3 非同步連線池的 cursor_factory（PreparedStatement 在第一次執行時就準備）"""
+
+    async def execute(self, query, params=None, **kwargs):
+        if isinstance(query, PreparedStatement):
+            # 第一次執行就在這條連線上準備（psycopg 預設要執行 prepare_threshold 次之後才準備）
+            kwargs.setdefault("prepare", True)
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(query, time.perf_counter() - start, result_rows(self))
+
+    @asynccontextmanager
+    async def copy(self, statement, params=None, **kwargs):
+        # 整個 COPY（到區塊結束）統計為一個查詢
+        start = time.perf_counter()
+        try:
+            async with super().copy(statement, params, **kwargs) as copy:
+                yield copy
+        finally:
+            record_query(statement, time.perf_counter() - start, max(self.rowcount, 0))
+
+
+class TimedTemplate(jinja2.Template):
+    """統計 render 時間的樣板（見 instrument_templates）"""
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            TEMPLATE_RENDER_TIME.observe(elapsed, self.name or "<string>")
+            stats = _current.get()
+            if stats is not None:
+                stats.template_time += elapsed
+
+
+def instrument_templates(templates):
+    """讓 Jinja2Templates 的樣板渲染時間計入 Server-Timing（須在載入任何樣板之前呼叫）"""
+    templates.env.template_class = TimedTemplate
+    return templates
+
+
+class QueryInstrumentationMiddleware:
+    """統計每個請求並在回應加上 Server-Timing 標頭；結束時對重複執行的語句發出警告"""
+
+    def __init__(self, app, threshold: int = REPEATED_QUERY_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with track() as stats:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("server-timing", stats.server_timing(time.perf_counter() - start))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                for shape, n in stats.repeated(self.threshold):
+                    logger.warning("query ran %d times in %s %s (N+1?): %s",
+                                   n, scope["method"], scope["path"], shape)
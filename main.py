@@ -1,23 +1,77 @@
 # main.py
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse
 from starlette.middleware.sessions import SessionMiddleware
 
+import cache
+import db
+import events
+import metrics
+import statements
+import templating
+from importer import MAX_IMPORT_SIZE
+from instrumentation import QueryInstrumentationMiddleware
+from storage import UploadSizeLimitMiddleware
+
 # Routers
 from routes.auth import router as auth_router
 from routes.client import router as client_router
 from routes.contractor import router as contractor_router
+from routes.deliverable import router as deliverable_router
+from routes.export import router as export_router
+from routes.imports import router as import_router
+from routes.live import router as live_router
 from routes.review import router as review_router   # ⭐ 必須放在前面避免路徑衝突
+from routes.dependencies import require_internal
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 啟動時建立連線池，關閉時釋放所有連線
+    # 路由使用非同步連線池；同步連線池保留給同步的 repository / 腳本
+    if db.DB_BACKEND == "sqlite":
+        # 嵌入式資料庫沒有另外的部署步驟：啟動時建立 / 更新 schema
+        db.run_migrations()
+    db.init_pool()
+    await db.init_async_pool()
+    # 先編譯所有樣板（有 bytecode 快取時只是載入），第一個請求不必等編譯
+    await asyncio.to_thread(templating.precompile)
+    # 一條 LISTEN 連線：其他 worker 寫入時失效本程序的快取、把使用者事件推送給 /events 的訂閱者
+    listener = asyncio.create_task(events.listen())
+    # 多個 worker 時定期寫出本程序的指標快照，/metrics 合併所有 worker
+    flusher = asyncio.create_task(metrics.flush_periodically()) if metrics.METRICS_DIR else None
+    try:
+        yield
+    finally:
+        for task in (listener, flusher):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await db.close_async_pool()
+        db.close_pool()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # Session
 app.add_middleware(SessionMiddleware, secret_key="simple-session-key")
 
-# Serve uploaded files
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# 超過大小上限的上傳 / 匯入檔在解析表單前就回 413
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(UploadSizeLimitMiddleware, max_size=MAX_IMPORT_SIZE, path_prefix="/import/", path_suffix="")
+
+# 每個請求的查詢數 / DB 時間 / 樣板時間（Server-Timing 標頭），包含 session 與上傳大小檢查
+app.add_middleware(QueryInstrumentationMiddleware)
 
+# 每個路由的請求數 / 狀態碼 / 延遲分布（/metrics）
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Root redirect (依身分導向 dashboard)
 @app.get("/", response_class=HTMLResponse)
@@ -31,6 +85,36 @@ async def index(request: Request):
         return RedirectResponse("/contractor/dashboard", status_code=303)
 
 
+# 連線池狀態（使用中 / 閒置 / 等待中 / 等待時間）
+@app.get("/health/db", dependencies=[Depends(require_internal)])
+async def db_health():
+    return JSONResponse({"sync": db.get_pool_stats(), "async": db.get_async_pool_stats()})
+
+
+# 快取命中 / 未命中 / 淘汰計數
+@app.get("/health/cache", dependencies=[Depends(require_internal)])
+async def cache_health():
+    return JSONResponse(cache.cache_stats())
+
+
+# 預備語句的執行次數與累計 / 平均執行時間
+@app.get("/health/statements", dependencies=[Depends(require_internal)])
+async def statements_health():
+    return JSONResponse(statements.statement_stats())
+
+
+# Prometheus 抓取的指標（路由、資料庫、上傳、樣板、快取）
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal)])
+async def metrics_endpoint():
+    return PlainTextResponse(await metrics.exposition(), media_type=metrics.CONTENT_TYPE)
+
+
+# 連線池滿載 → 503，讓前端 / 負載平衡器稍後重試
+@app.exception_handler(db.PoolTimeout)
+async def pool_timeout_handler(request: Request, exc):
+    return JSONResponse({"detail": "database busy"}, status_code=503, headers={"Retry-After": "1"})
+
+
 # 404 → 導回首頁
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc):
@@ -44,3 +128,7 @@ app.include_router(review_router)
 app.include_router(auth_router)
 app.include_router(client_router)
 app.include_router(contractor_router)
+app.include_router(deliverable_router)
+app.include_router(export_router)
+app.include_router(import_router)
+app.include_router(live_router)
@@ -0,0 +1,206 @@
+# manage.py
+# 維運用命令列工具：python manage.py <command>
+import argparse
+import sys
+
+import db
+from models.review_repository import ReviewRepository
+
+
+def _ensure_schema():
+    """SQLite 後端沒有另外的部署步驟：需要資料時先建立 / 更新 schema"""
+    if db.DB_BACKEND == "sqlite":
+        db.run_migrations()
+
+
+def rebuild_ratings(args):
+    """由 reviews 重建 user_rating_summary"""
+    count = ReviewRepository.rebuild_rating_summary()
+    print(f"rebuilt rating summary for {count} users")
+
+
+def migrate(args):
+    """套用 migrations/ 中尚未執行的 schema 變更"""
+    applied = db.run_migrations()
+    print("applied: " + ", ".join(applied) if applied else "database is up to date")
+
+
+def seed(args):
+    """產生查詢計畫檢查 / 壓力測試用的資料"""
+    import seed as seeder
+
+    _ensure_schema()
+    if args.reset:
+        seeder.reset_seed_data()
+        print("seed data removed")
+        return
+    volumes = {k: getattr(args, k) for k in seeder.DEFAULT_VOLUMES if getattr(args, k) is not None}
+    counts = seeder.seed_database(volumes)
+    print(", ".join(f"{table}: {n}" for table, n in counts.items()))
+
+
+def check_plans(args):
+    """對 models/* 的查詢執行 EXPLAIN，大型資料表出現 Seq Scan 時以非 0 結束"""
+    import plan_check
+
+    if db.DB_BACKEND != "postgres":
+        sys.exit("check-plans reads PostgreSQL EXPLAIN output; run it with DB_BACKEND=postgres")
+    results, problems = plan_check.check_plans(args.threshold)
+    for name, status in results:
+        print(f"{name}: {status}")
+    if problems:
+        print(f"\n{len(problems)} problem(s):", file=sys.stderr)
+        for problem in problems:
+            print("  " + problem, file=sys.stderr)
+        sys.exit(1)
+
+
+def gc_blobs(args):
+    """清除沒有被引用的上傳檔案"""
+    import storage
+
+    counts = storage.collect_garbage(
+        grace_seconds=args.grace_minutes * 60,
+        include_legacy=args.legacy,
+        dry_run=args.dry_run,
+    )
+    prefix = "would remove" if args.dry_run else "removed"
+    print(f"{prefix} " + ", ".join(f"{kind}: {n}" for kind, n in counts.items()))
+
+
+def export(args):
+    """以 NDJSON / CSV 匯出資料（串流寫出，記憶體用量固定）"""
+    from datetime import date
+
+    from export import format_export
+    from models.export_repository import ExportRepository
+
+    batches = ExportRepository.stream(
+        args.kind,
+        status=args.status,
+        date_from=date.fromisoformat(args.date_from) if args.date_from else None,
+        date_to=date.fromisoformat(args.date_to) if args.date_to else None,
+        user_id=args.user_id,
+    )
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in format_export(batches, args.format):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+def import_data(args):
+    """匯入 CSV / NDJSON（COPY 到暫存表後合併）；任何一列有錯誤時不寫入並以非 0 結束"""
+    from importer import ImportReader
+    from models.import_repository import ImportRepository
+
+    import_rows = {"projects": ImportRepository.import_projects, "bids": ImportRepository.import_bids}[args.kind]
+    with open(args.file, encoding="utf-8-sig", newline="") as f:
+        rows = ImportReader(args.kind, args.format, f)
+        try:
+            rows.stage()
+            report = rows.report(import_rows(args.user_id, rows))
+        finally:
+            rows.discard()
+    print(f"rows: {report['rows']}, imported: {report['imported']}, errors: {report['error_count']}")
+    for error in report["errors"]:
+        print(f"  line {error['line']}: {'; '.join(error['errors'])}", file=sys.stderr)
+    if report["error_count"]:
+        sys.exit(1)
+
+
+def bench(args):
+    """端對端壓力測試；指定 --compare 時與基準結果比較，變慢時以非 0 結束"""
+    import asyncio
+    import json
+
+    import bench as benchmark
+    import seed as seeder
+
+    _ensure_schema()
+    if args.seed:
+        print(", ".join(f"{t}: {n}" for t, n in seeder.seed_database().items()))
+    report = asyncio.run(benchmark.run_benchmark(
+        routes=args.routes,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        warmup=args.warmup,
+        base_url=args.base_url,
+    ))
+    print(benchmark.format_results(report))
+    benchmark.save_results(report, args.output)
+    print(f"results saved to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = benchmark.compare(json.load(f), report, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="工作委託平台維運工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-ratings", help="由 reviews 重建評分摘要表")
+    p.set_defaults(func=rebuild_ratings)
+
+    p = sub.add_parser("migrate", help="套用 migrations/ 中的 schema 變更")
+    p.set_defaults(func=migrate)
+
+    p = sub.add_parser("seed", help="產生大量測試資料（seed_ 開頭的使用者）")
+    for table in ("users", "projects", "bids", "reviews"):
+        p.add_argument(f"--{table}", type=int, help=f"{table} 筆數")
+    p.add_argument("--reset", action="store_true", help="只刪除 seed 資料")
+    p.set_defaults(func=seed)
+
+    p = sub.add_parser("check-plans", help="檢查每個查詢的 EXPLAIN 是否在大型資料表上 Seq Scan")
+    p.add_argument("--threshold", type=int, default=10000, help="視為大型資料表的資料列數")
+    p.set_defaults(func=check_plans)
+
+    p = sub.add_parser("gc-blobs", help="清除沒有被引用的上傳檔案")
+    p.add_argument("--grace-minutes", type=int, default=60, help="只清除超過此時間未使用的檔案")
+    p.add_argument("--legacy", action="store_true", help="一併清除 uploads/ 下未被引用的舊式檔案")
+    p.add_argument("--dry-run", action="store_true", help="只列出數量，不刪除")
+    p.set_defaults(func=gc_blobs)
+
+    p = sub.add_parser("export", help="以 NDJSON / CSV 匯出資料")
+    p.add_argument("kind", choices=["projects", "bids", "deliverables", "reviews"])
+    p.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    p.add_argument("--status", action="append", help="只匯出此狀態（可重複指定）")
+    p.add_argument("--from", dest="date_from", help="起始日期 YYYY-MM-DD（含）")
+    p.add_argument("--to", dest="date_to", help="結束日期 YYYY-MM-DD（不含）")
+    p.add_argument("--user-id", type=int, help="只匯出與此使用者有關的資料")
+    p.add_argument("-o", "--output", help="輸出檔案（預設為標準輸出）")
+    p.set_defaults(func=export)
+
+    p = sub.add_parser("import", help="以 CSV / NDJSON 批次匯入專案或投標")
+    p.add_argument("kind", choices=["projects", "bids"])
+    p.add_argument("file", help="匯入檔（CSV 須有標題列）")
+    p.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    p.add_argument("--user-id", type=int, required=True, help="專案的委託人 / 投標的接案人")
+    p.set_defaults(func=import_data)
+
+    p = sub.add_parser("bench", help="端對端壓力測試（延遲百分位數、吞吐量、每個請求的查詢數）")
+    p.add_argument("--routes", nargs="+", help="只測試這些路由（預設全部）")
+    p.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 10, 50],
+                   help="並行數，以逗號分隔（預設 1,10,50）")
+    p.add_argument("--requests", type=int, default=200, help="每個路由、每個並行數的請求數")
+    p.add_argument("--warmup", type=int, default=10, help="每輪開始前的暖身請求數")
+    p.add_argument("--base-url", help="對執行中的伺服器測試（預設在程序內呼叫 main.app）")
+    p.add_argument("--seed", action="store_true", help="先重新產生 seed 資料")
+    p.add_argument("-o", "--output", default="bench_results.json", help="結果 JSON 檔")
+    p.add_argument("--compare", help="基準結果 JSON；p95 或查詢數變差時以非 0 結束")
+    p.add_argument("--tolerance", type=float, default=0.2, help="p95 允許變慢的比例")
+    p.set_defaults(func=bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# metrics.py
+# Prometheus 文字格式的 /metrics：程序內的 counter / histogram（加一次只需要一個鎖與一次 bisect），
+# 以及在讀取時才計算的 callback 指標（連線池、快取等本來就有統計的地方）。
+# 指標定義在資料所在的模組（db.py、cache.py、storage.py、instrumentation.py），這裡只負責登記與輸出。
+#
+# 多個 uvicorn worker：設定 METRICS_DIR（啟動前清空）時，每個 worker 每 METRICS_FLUSH_INTERVAL 秒
+# 把自己的快照寫到 METRICS_DIR/<pid>.json，/metrics 合併所有 worker 的快照：
+# counter / histogram 相加（已結束的 worker 也保留，數值不會倒退），gauge 只加總仍在執行的 worker。
+# 沒有設定時只輸出處理這次請求的 worker 的數值（單一 worker 時即為全部）
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+
+# 預設的延遲區間（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        if metric.name in _registry:
+            raise ValueError(f"duplicate metric: {metric.name}")
+        _registry[metric.name] = metric
+    return metric
+
+
+class Counter:
+    """只會增加的計數；labels 為標籤名稱，inc 時依序給標籤值"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+
+class Histogram:
+    """分布統計：各區間的次數（輸出時累加成 Prometheus 的 le 格式）、總和與次數"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                # [各區間次數..., 超過最大區間的次數, 總和]
+                entry = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[list(k), list(v)] for k, v in self._values.items()]
+
+
+class Callback:
+    """讀取時才計算的指標：func() 回傳 {標籤值 tuple: 數值}；kind 為 counter 或 gauge"""
+
+    def __init__(self, name: str, help: str, func, kind: str = "gauge", labels=()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = tuple(labels)
+        self.func = func
+        _register(self)
+
+    def samples(self) -> list:
+        try:
+            values = self.func()
+        except Exception:
+            logger.exception("metric callback %s failed", self.name)
+            return []
+        return [[list(k), v] for k, v in values.items()]
+
+
+def snapshot() -> dict:
+    """本程序所有指標的目前數值（可序列化成 JSON）"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {
+        "pid": os.getpid(),
+        "metrics": {
+            m.name: {
+                "type": m.kind,
+                "help": m.help,
+                "labels": list(m.labels),
+                "buckets": list(getattr(m, "buckets", ())),
+                "samples": m.samples(),
+            }
+            for m in metrics
+        },
+    }
+
+
+def _write_snapshot(data: dict, directory: str):
+    path = os.path.join(directory, f"{data['pid']}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_snapshots(directory: str, own: dict) -> list:
+    snapshots = [own]
+    for name in os.listdir(directory):
+        if not name.endswith(".json") or name == f"{own['pid']}.json":
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            # 正在被替換或已損毀的檔案：這次略過
+            continue
+    return snapshots
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots) -> dict:
+    """合併多個程序的快照：counter / histogram 相加，gauge 只加總仍在執行的程序"""
+    merged = {}
+    for data in snapshots:
+        live = data["pid"] == os.getpid() or _alive(data["pid"])
+        for name, metric in data["metrics"].items():
+            if metric["type"] == "gauge" and not live:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif isinstance(value, list):
+                    target["samples"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["samples"][key] = current + value
+    return merged
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _label_text(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{v}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(merged: dict) -> str:
+    """輸出 Prometheus 文字格式"""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labels"]
+        for labels, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_label_text(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"], value):
+                cumulative += count
+                le = (("le", _number(float(bound))),)
+                lines.append(f"{name}_bucket{_label_text(names, labels, le)} {cumulative}")
+            count = cumulative + value[-2]
+            lines.append(f"{name}_bucket{_label_text(names, labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_label_text(names, labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_label_text(names, labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _collect(own: dict, directory) -> str:
+    if directory is None:
+        return render(merge([own]))
+    _write_snapshot(own, directory)
+    return render(merge(_read_snapshots(directory, own)))
+
+
+async def exposition(directory=METRICS_DIR) -> str:
+    """/metrics 的內容；本程序的快照在 event loop 取得，讀寫其他 worker 的檔案在 thread pool 執行"""
+    own = snapshot()
+    if directory is None:
+        return _collect(own, None)
+    return await asyncio.to_thread(_collect, own, directory)
+
+
+async def flush_periodically(directory=METRICS_DIR, interval: float = METRICS_FLUSH_INTERVAL):
+    """定期寫出本程序的快照（由 main.py 的 lifespan 在設定 METRICS_DIR 時啟動），取消時再寫一次"""
+    os.makedirs(directory, exist_ok=True)
+    try:
+        while True:
+            await asyncio.to_thread(_write_snapshot, snapshot(), directory)
+            await asyncio.sleep(interval)
+    finally:
+        try:
+            _write_snapshot(snapshot(), directory)
+        except OSError:
+            logger.exception("failed to write final metrics snapshot")
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template, method and status",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response body is sent",
+    ("method", "route"),
+)
+
+
+class MetricsMiddleware:
+    """以路由樣板（/client/project/{project_id}/bids，而不是實際路徑）為標籤統計請求數與延遲"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route_template(self, scope) -> str:
+        if self._routes is None:
+            app = scope.get("app")
+            self._routes = {
+                r.endpoint: r.path for r in getattr(app, "routes", ()) if hasattr(r, "endpoint")
+            }
+        # 沒有對應的路由（404）歸在同一個標籤，避免任意路徑造成無限多個時間序列
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self._route_template(scope)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - start, scope["method"], route)
@@ -1,3 +1,6 @@
+-- 完整 schema 快照（對應 midterm_work_platform_SQL.png）
+-- 實際建立 / 升級資料庫請使用 migrations/：python manage.py migrate
+
 CREATE TABLE IF NOT EXISTS "users" (
 	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
 	"username" VARCHAR(255),
@@ -10,7 +13,7 @@ CREATE TABLE IF NOT EXISTS "users" (
 
 
 
-CREATE TABLE IF NOT EXISTS "project" (
+CREATE TABLE IF NOT EXISTS "projects" (
 	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
 	"client_id" INTEGER,
 	"contractor_id" INTEGER,
@@ -46,23 +49,82 @@ CREATE TABLE IF NOT EXISTS "deliverables" (
 	"file_path" VARCHAR(255),
 	"message" TEXT,
 	"uploaded_at" TIMESTAMP,
+	"file_size" BIGINT,
+	"checksum" VARCHAR(64),
+	PRIMARY KEY("id")
+);
+
+CREATE TABLE IF NOT EXISTS "blobs" (
+	"sha256" VARCHAR(64) PRIMARY KEY,
+	"size" BIGINT NOT NULL,
+	"ref_count" INTEGER NOT NULL DEFAULT 0,
+	"created_at" TIMESTAMP NOT NULL DEFAULT NOW(),
+	"updated_at" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+
+
+CREATE TABLE IF NOT EXISTS "reviews" (
+	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
+	"project_id" INTEGER,
+	"reviewer_id" INTEGER,
+	"target_id" INTEGER,
+	"dim1" INTEGER NOT NULL,
+	"dim2" INTEGER NOT NULL,
+	"dim3" INTEGER NOT NULL,
+	"comment" TEXT,
+	"created_at" TIMESTAMP NOT NULL DEFAULT NOW(),
 	PRIMARY KEY("id")
 );
 
 
 
-ALTER TABLE "project"
+ALTER TABLE "projects"
 ADD FOREIGN KEY("client_id") REFERENCES "users"("id")
 ON UPDATE NO ACTION ON DELETE NO ACTION;
-ALTER TABLE "project"
+ALTER TABLE "projects"
 ADD FOREIGN KEY("contractor_id") REFERENCES "users"("id")
 ON UPDATE NO ACTION ON DELETE NO ACTION;
 ALTER TABLE "bids"
-ADD FOREIGN KEY("project_id") REFERENCES "project"("id")
+ADD FOREIGN KEY("project_id") REFERENCES "projects"("id")
 ON UPDATE NO ACTION ON DELETE NO ACTION;
 ALTER TABLE "bids"
 ADD FOREIGN KEY("contractor_id") REFERENCES "users"("id")
 ON UPDATE NO ACTION ON DELETE NO ACTION;
 ALTER TABLE "deliverables"
-ADD FOREIGN KEY("project_id") REFERENCES "project"("id")
-ON UPDATE NO ACTION ON DELETE NO ACTION;
\ No newline at end of file
+ADD FOREIGN KEY("project_id") REFERENCES "projects"("id")
+ON UPDATE NO ACTION ON DELETE NO ACTION;
+ALTER TABLE "reviews"
+ADD FOREIGN KEY("project_id") REFERENCES "projects"("id")
+ON UPDATE NO ACTION ON DELETE NO ACTION;
+ALTER TABLE "reviews"
+ADD FOREIGN KEY("reviewer_id") REFERENCES "users"("id")
+ON UPDATE NO ACTION ON DELETE NO ACTION;
+ALTER TABLE "reviews"
+ADD FOREIGN KEY("target_id") REFERENCES "users"("id")
+ON UPDATE NO ACTION ON DELETE NO ACTION;
+
+
+
+-- 每位被評價者的評分摘要：由 ReviewRepository.create_review 在同一個交易內累加
+-- 重建：python manage.py rebuild-ratings
+CREATE TABLE IF NOT EXISTS "user_rating_summary" (
+	"user_id" INTEGER,
+	"review_count" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim1" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim2" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim3" INTEGER NOT NULL DEFAULT 0,
+	"avg_dim1" NUMERIC(10,2) GENERATED ALWAYS AS (ROUND("sum_dim1"::numeric / NULLIF("review_count", 0), 2)) STORED,
+	"avg_dim2" NUMERIC(10,2) GENERATED ALWAYS AS (ROUND("sum_dim2"::numeric / NULLIF("review_count", 0), 2)) STORED,
+	"avg_dim3" NUMERIC(10,2) GENERATED ALWAYS AS (ROUND("sum_dim3"::numeric / NULLIF("review_count", 0), 2)) STORED,
+	"updated_at" TIMESTAMP,
+	PRIMARY KEY("user_id")
+);
+
+ALTER TABLE "user_rating_summary"
+ADD FOREIGN KEY("user_id") REFERENCES "users"("id")
+ON UPDATE NO ACTION ON DELETE NO ACTION;
+
+
+-- 索引：見 migrations/0002_query_indexes.sql
+-- 全文搜尋（project_search 資料表與 trigger）：見 migrations/0005_project_search.sql
\ No newline at end of file
@@ -0,0 +1,78 @@
+-- 0001：與程式碼一致的基礎 schema
+-- 全部使用 IF NOT EXISTS，對已經手動建立資料表的既有資料庫是安全的 no-op
+
+CREATE TABLE IF NOT EXISTS "users" (
+	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
+	"username" VARCHAR(255),
+	"role" VARCHAR(255),
+	"password" VARCHAR(255),
+	"created_at" TIMESTAMP DEFAULT NOW(),
+	PRIMARY KEY("id")
+);
+
+CREATE TABLE IF NOT EXISTS "projects" (
+	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
+	"client_id" INTEGER REFERENCES "users"("id"),
+	"contractor_id" INTEGER REFERENCES "users"("id"),
+	"title" VARCHAR(255) NOT NULL,
+	"description" TEXT,
+	"budget" INTEGER,
+	"updated_at" TIMESTAMP NOT NULL DEFAULT NOW(),
+	"status" VARCHAR(255),
+	PRIMARY KEY("id")
+);
+
+CREATE TABLE IF NOT EXISTS "bids" (
+	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
+	"project_id" INTEGER REFERENCES "projects"("id"),
+	"contractor_id" INTEGER REFERENCES "users"("id"),
+	"price" INTEGER NOT NULL,
+	"message" TEXT,
+	"status" VARCHAR(255),
+	"updated_at" TIMESTAMP DEFAULT NOW(),
+	PRIMARY KEY("id")
+);
+
+CREATE TABLE IF NOT EXISTS "deliverables" (
+	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
+	"project_id" INTEGER REFERENCES "projects"("id"),
+	"file_name" VARCHAR(255) NOT NULL,
+	"file_path" VARCHAR(255),
+	"message" TEXT,
+	"uploaded_at" TIMESTAMP DEFAULT NOW(),
+	PRIMARY KEY("id")
+);
+
+CREATE TABLE IF NOT EXISTS "reviews" (
+	"id" INTEGER GENERATED BY DEFAULT AS IDENTITY,
+	"project_id" INTEGER REFERENCES "projects"("id"),
+	"reviewer_id" INTEGER REFERENCES "users"("id"),
+	"target_id" INTEGER REFERENCES "users"("id"),
+	"dim1" INTEGER NOT NULL,
+	"dim2" INTEGER NOT NULL,
+	"dim3" INTEGER NOT NULL,
+	"comment" TEXT,
+	"created_at" TIMESTAMP NOT NULL DEFAULT NOW(),
+	PRIMARY KEY("id")
+);
+
+-- 每位被評價者的評分摘要：由 ReviewRepository.create_review 在同一個交易內累加
+CREATE TABLE IF NOT EXISTS "user_rating_summary" (
+	"user_id" INTEGER REFERENCES "users"("id"),
+	"review_count" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim1" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim2" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim3" INTEGER NOT NULL DEFAULT 0,
+	"avg_dim1" NUMERIC(10,2) GENERATED ALWAYS AS (ROUND("sum_dim1"::numeric / NULLIF("review_count", 0), 2)) STORED,
+	"avg_dim2" NUMERIC(10,2) GENERATED ALWAYS AS (ROUND("sum_dim2"::numeric / NULLIF("review_count", 0), 2)) STORED,
+	"avg_dim3" NUMERIC(10,2) GENERATED ALWAYS AS (ROUND("sum_dim3"::numeric / NULLIF("review_count", 0), 2)) STORED,
+	"updated_at" TIMESTAMP,
+	PRIMARY KEY("user_id")
+);
+
+-- 既有資料庫第一次建立摘要表時由 reviews 回填
+INSERT INTO "user_rating_summary" (user_id, review_count, sum_dim1, sum_dim2, sum_dim3, updated_at)
+SELECT target_id, COUNT(*), SUM(dim1), SUM(dim2), SUM(dim3), NOW()
+FROM "reviews"
+GROUP BY target_id
+ON CONFLICT (user_id) DO NOTHING;
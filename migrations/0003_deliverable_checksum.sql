@@ -0,0 +1,3 @@
+-- 0003：結案檔案的大小與 SHA-256（上傳時邊寫邊算）
+ALTER TABLE deliverables ADD COLUMN IF NOT EXISTS file_size BIGINT;
+ALTER TABLE deliverables ADD COLUMN IF NOT EXISTS checksum VARCHAR(64);
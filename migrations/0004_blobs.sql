@@ -0,0 +1,15 @@
+-- 0004：以內容雜湊定址的上傳檔案（uploads/blobs/ab/cd/<sha256>）
+-- ref_count 由 DeliverableRepository.create / delete_by_project_id 在同一個交易內維護
+CREATE TABLE IF NOT EXISTS blobs (
+	"sha256" VARCHAR(64) PRIMARY KEY,
+	"size" BIGINT NOT NULL,
+	"ref_count" INTEGER NOT NULL DEFAULT 0,
+	"created_at" TIMESTAMP NOT NULL DEFAULT NOW(),
+	"updated_at" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- 垃圾回收：只掃描沒有被引用的 blob
+CREATE INDEX IF NOT EXISTS blobs_unreferenced_idx ON blobs (updated_at) WHERE ref_count <= 0;
+
+-- 垃圾回收：檢查舊式上傳檔案（uploads/{project_id}_{檔名}）是否仍被引用
+CREATE INDEX IF NOT EXISTS deliverables_file_path_idx ON deliverables (file_path);
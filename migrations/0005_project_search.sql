@@ -0,0 +1,35 @@
+-- 0005：專案全文搜尋（ProjectRepository.get_project_page(search=...)）
+-- tsvector 放在獨立的資料表，避免 SELECT p.* 的查詢多帶一欄大型資料；
+-- 由 trigger 維護，專案的新增 / 修改（包含 seed、批次匯入）都會同步更新
+-- 使用 'simple' 設定：不做字根處理，中英文混合的標題 / 描述都以原字詞比對
+CREATE TABLE IF NOT EXISTS project_search (
+	"project_id" INTEGER PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+	"document" TSVECTOR NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION project_search_document(title TEXT, description TEXT)
+RETURNS TSVECTOR LANGUAGE SQL IMMUTABLE AS $$
+	SELECT setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+	    || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+$$;
+
+CREATE OR REPLACE FUNCTION project_search_refresh() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+	INSERT INTO project_search (project_id, document)
+	VALUES (NEW.id, project_search_document(NEW.title, NEW.description))
+	ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document;
+	RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS projects_search_refresh ON projects;
+CREATE TRIGGER projects_search_refresh
+	AFTER INSERT OR UPDATE OF title, description ON projects
+	FOR EACH ROW EXECUTE FUNCTION project_search_refresh();
+
+-- 既有專案
+INSERT INTO project_search (project_id, document)
+SELECT id, project_search_document(title, description) FROM projects
+ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document;
+
+CREATE INDEX IF NOT EXISTS project_search_document_idx ON project_search USING GIN (document);
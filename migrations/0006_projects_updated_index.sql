@@ -0,0 +1,2 @@
+-- 0006：全部專案的最後修改時間（FreshnessRepository：接案人控制台的條件式 GET）
+CREATE INDEX IF NOT EXISTS projects_updated_idx ON projects (updated_at);
@@ -0,0 +1,59 @@
+-- 0007：資料表的版本（FreshnessRepository：頁面條件式 GET 的 ETag / Last-Modified）
+-- 不以 MAX(updated_at) 判斷資料是否變動：NOW() 是交易開始的時間，較晚提交的交易寫入的值
+-- 可能比讀者已經看到的 MAX 還小，帶著舊驗證值的瀏覽器會一直拿到 304。
+-- 改為每個資料表一個版本號，由 deferred constraint trigger 在交易提交時才遞增：
+-- 遞增時鎖住唯一的一列、直到提交才釋放，版本的順序就是提交的順序；
+-- 持有這個鎖的交易都已在提交階段、不會再等待其他鎖，不會 deadlock。
+-- 每個交易、每個資料表只遞增一次（以交易層級的設定值記錄），批次匯入不會逐列更新這一列。
+-- *_changed 為遞增時的 clock_timestamp()（Unix 秒數，與 session 時區無關），作為 Last-Modified
+CREATE TABLE IF NOT EXISTS data_versions (
+	"singleton" BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK ("singleton"),
+	"projects" BIGINT NOT NULL DEFAULT 0,
+	"projects_changed" DOUBLE PRECISION NOT NULL DEFAULT EXTRACT(EPOCH FROM clock_timestamp()),
+	"bids" BIGINT NOT NULL DEFAULT 0,
+	"bids_changed" DOUBLE PRECISION NOT NULL DEFAULT EXTRACT(EPOCH FROM clock_timestamp()),
+	"deliverables" BIGINT NOT NULL DEFAULT 0,
+	"deliverables_changed" DOUBLE PRECISION NOT NULL DEFAULT EXTRACT(EPOCH FROM clock_timestamp()),
+	"reviews" BIGINT NOT NULL DEFAULT 0,
+	"reviews_changed" DOUBLE PRECISION NOT NULL DEFAULT EXTRACT(EPOCH FROM clock_timestamp())
+);
+
+INSERT INTO data_versions DEFAULT VALUES ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION data_versions_bump() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+	bumped TEXT := 'data_versions.' || TG_TABLE_NAME;
+BEGIN
+	IF current_setting(bumped, true) = 'on' THEN
+		RETURN NULL;
+	END IF;
+	EXECUTE format('UPDATE data_versions SET %1$I = %1$I + 1, %2$I = EXTRACT(EPOCH FROM clock_timestamp())',
+	               TG_TABLE_NAME, TG_TABLE_NAME || '_changed');
+	PERFORM set_config(bumped, 'on', true);
+	RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS projects_data_version ON projects;
+CREATE CONSTRAINT TRIGGER projects_data_version
+	AFTER INSERT OR UPDATE OR DELETE ON projects
+	DEFERRABLE INITIALLY DEFERRED
+	FOR EACH ROW EXECUTE FUNCTION data_versions_bump();
+
+DROP TRIGGER IF EXISTS bids_data_version ON bids;
+CREATE CONSTRAINT TRIGGER bids_data_version
+	AFTER INSERT OR UPDATE OR DELETE ON bids
+	DEFERRABLE INITIALLY DEFERRED
+	FOR EACH ROW EXECUTE FUNCTION data_versions_bump();
+
+DROP TRIGGER IF EXISTS deliverables_data_version ON deliverables;
+CREATE CONSTRAINT TRIGGER deliverables_data_version
+	AFTER INSERT OR UPDATE OR DELETE ON deliverables
+	DEFERRABLE INITIALLY DEFERRED
+	FOR EACH ROW EXECUTE FUNCTION data_versions_bump();
+
+DROP TRIGGER IF EXISTS reviews_data_version ON reviews;
+CREATE CONSTRAINT TRIGGER reviews_data_version
+	AFTER INSERT OR UPDATE OR DELETE ON reviews
+	DEFERRABLE INITIALLY DEFERRED
+	FOR EACH ROW EXECUTE FUNCTION data_versions_bump();
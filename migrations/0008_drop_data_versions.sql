@@ -0,0 +1,9 @@
+-- 0008：移除 0007 的 data_versions
+-- 唯一的一列讓所有寫入交易在提交時排隊等同一個列鎖，而且任何寫入都會讓所有頁面的驗證值失效；
+-- FreshnessRepository 改為只讀取每個頁面用到的資料列
+DROP TRIGGER IF EXISTS projects_data_version ON projects;
+DROP TRIGGER IF EXISTS bids_data_version ON bids;
+DROP TRIGGER IF EXISTS deliverables_data_version ON deliverables;
+DROP TRIGGER IF EXISTS reviews_data_version ON reviews;
+DROP FUNCTION IF EXISTS data_versions_bump();
+DROP TABLE IF EXISTS data_versions;
@@ -0,0 +1,65 @@
+-- 0001：與 ../0001_initial_schema.sql 相同的基礎 schema（SQLite 版，DB_BACKEND=sqlite）
+-- 時間以 'YYYY-MM-DD HH:MM:SS.SSS'（本地時間）文字儲存，字串比較即為時間先後
+
+CREATE TABLE IF NOT EXISTS "users" (
+	"id" INTEGER PRIMARY KEY,
+	"username" VARCHAR(255),
+	"role" VARCHAR(255),
+	"password" VARCHAR(255),
+	"created_at" TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS "projects" (
+	"id" INTEGER PRIMARY KEY,
+	"client_id" INTEGER REFERENCES "users"("id"),
+	"contractor_id" INTEGER REFERENCES "users"("id"),
+	"title" VARCHAR(255) NOT NULL,
+	"description" TEXT,
+	"budget" INTEGER,
+	"updated_at" TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')),
+	"status" VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS "bids" (
+	"id" INTEGER PRIMARY KEY,
+	"project_id" INTEGER REFERENCES "projects"("id"),
+	"contractor_id" INTEGER REFERENCES "users"("id"),
+	"price" INTEGER NOT NULL,
+	"message" TEXT,
+	"status" VARCHAR(255),
+	"updated_at" TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS "deliverables" (
+	"id" INTEGER PRIMARY KEY,
+	"project_id" INTEGER REFERENCES "projects"("id"),
+	"file_name" VARCHAR(255) NOT NULL,
+	"file_path" VARCHAR(255),
+	"message" TEXT,
+	"uploaded_at" TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS "reviews" (
+	"id" INTEGER PRIMARY KEY,
+	"project_id" INTEGER REFERENCES "projects"("id"),
+	"reviewer_id" INTEGER REFERENCES "users"("id"),
+	"target_id" INTEGER REFERENCES "users"("id"),
+	"dim1" INTEGER NOT NULL,
+	"dim2" INTEGER NOT NULL,
+	"dim3" INTEGER NOT NULL,
+	"comment" TEXT,
+	"created_at" TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+-- 每位被評價者的評分摘要：由 ReviewRepository.create_review 在同一個交易內累加
+CREATE TABLE IF NOT EXISTS "user_rating_summary" (
+	"user_id" INTEGER PRIMARY KEY REFERENCES "users"("id"),
+	"review_count" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim1" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim2" INTEGER NOT NULL DEFAULT 0,
+	"sum_dim3" INTEGER NOT NULL DEFAULT 0,
+	"avg_dim1" NUMERIC GENERATED ALWAYS AS (ROUND(CAST("sum_dim1" AS REAL) / NULLIF("review_count", 0), 2)) STORED,
+	"avg_dim2" NUMERIC GENERATED ALWAYS AS (ROUND(CAST("sum_dim2" AS REAL) / NULLIF("review_count", 0), 2)) STORED,
+	"avg_dim3" NUMERIC GENERATED ALWAYS AS (ROUND(CAST("sum_dim3" AS REAL) / NULLIF("review_count", 0), 2)) STORED,
+	"updated_at" TIMESTAMP
+);
@@ -0,0 +1,28 @@
+-- 0002：與 ../0002_query_indexes.sql 相同的索引（SQLite 版）
+
+-- 登入 / 註冊：UserRepository.get_by_username
+CREATE INDEX IF NOT EXISTS users_username_idx ON users (username);
+
+-- 委託人 / 接案人的專案列表（keyset 分頁依 updated_at, id 由新到舊）
+CREATE INDEX IF NOT EXISTS projects_client_updated_idx
+    ON projects (client_id, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS projects_contractor_updated_idx
+    ON projects (contractor_id, updated_at DESC, id DESC);
+
+-- 可接案專案：只索引 status = 'open' 的列
+CREATE INDEX IF NOT EXISTS projects_open_updated_idx
+    ON projects (updated_at DESC, id DESC)
+    WHERE status = 'open';
+
+-- 專案的投標列表、接案人對某專案的投標
+CREATE INDEX IF NOT EXISTS bids_project_contractor_idx ON bids (project_id, contractor_id);
+CREATE INDEX IF NOT EXISTS bids_contractor_idx ON bids (contractor_id);
+
+-- 專案的結案檔案（最新一筆）
+CREATE INDEX IF NOT EXISTS deliverables_project_uploaded_idx
+    ON deliverables (project_id, uploaded_at DESC);
+
+-- 使用者收到的評價（由新到舊）、是否已評價
+CREATE INDEX IF NOT EXISTS reviews_target_created_idx ON reviews (target_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS reviews_project_reviewer_idx ON reviews (project_id, reviewer_id);
+CREATE INDEX IF NOT EXISTS reviews_reviewer_idx ON reviews (reviewer_id);
@@ -0,0 +1,3 @@
+-- 0003：結案檔案的大小與 SHA-256（SQLite 版）
+ALTER TABLE deliverables ADD COLUMN file_size BIGINT;
+ALTER TABLE deliverables ADD COLUMN checksum VARCHAR(64);
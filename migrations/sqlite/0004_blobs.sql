@@ -0,0 +1,14 @@
+-- 0004：以內容雜湊定址的上傳檔案（SQLite 版）
+CREATE TABLE IF NOT EXISTS blobs (
+	"sha256" VARCHAR(64) PRIMARY KEY,
+	"size" BIGINT NOT NULL,
+	"ref_count" INTEGER NOT NULL DEFAULT 0,
+	"created_at" TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')),
+	"updated_at" TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+-- 垃圾回收：只掃描沒有被引用的 blob
+CREATE INDEX IF NOT EXISTS blobs_unreferenced_idx ON blobs (updated_at) WHERE ref_count <= 0;
+
+-- 垃圾回收：檢查舊式上傳檔案是否仍被引用
+CREATE INDEX IF NOT EXISTS deliverables_file_path_idx ON deliverables (file_path);
@@ -0,0 +1,27 @@
+-- 0005：專案全文搜尋（SQLite 版）：以 projects 為內容來源的 FTS5 索引（不另存一份文字），
+-- 由 trigger 維護；標題的權重高於描述（對應 PostgreSQL 版的 setweight A / B）
+CREATE VIRTUAL TABLE IF NOT EXISTS project_search USING fts5(
+	title, description,
+	content = 'projects', content_rowid = 'id',
+	tokenize = 'unicode61 remove_diacritics 0'
+);
+
+INSERT INTO project_search (project_search, rank) VALUES ('rank', 'bm25(1.0, 0.4)');
+
+CREATE TRIGGER IF NOT EXISTS projects_search_insert AFTER INSERT ON projects BEGIN
+	INSERT INTO project_search (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_search_delete AFTER DELETE ON projects BEGIN
+	INSERT INTO project_search (project_search, rowid, title, description)
+	VALUES ('delete', OLD.id, OLD.title, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_search_update AFTER UPDATE OF title, description ON projects BEGIN
+	INSERT INTO project_search (project_search, rowid, title, description)
+	VALUES ('delete', OLD.id, OLD.title, OLD.description);
+	INSERT INTO project_search (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+
+-- 既有專案
+INSERT INTO project_search (project_search) VALUES ('rebuild');
@@ -0,0 +1,2 @@
+-- 0006：與 ../0006_projects_updated_index.sql 相同的索引（SQLite 版）
+CREATE INDEX IF NOT EXISTS projects_updated_idx ON projects (updated_at);
@@ -0,0 +1,64 @@
+-- 0007：與 ../0007_data_versions.sql 相同的資料表版本（SQLite 版）
+-- SQLite 的寫入交易依序執行（BEGIN IMMEDIATE），一般的 AFTER trigger 就依提交順序遞增；
+-- SQLite 沒有 deferred / statement 層級的 trigger，每一列變動都會遞增一次
+CREATE TABLE IF NOT EXISTS data_versions (
+	"singleton" BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK ("singleton"),
+	"projects" INTEGER NOT NULL DEFAULT 0,
+	"projects_changed" REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0),
+	"bids" INTEGER NOT NULL DEFAULT 0,
+	"bids_changed" REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0),
+	"deliverables" INTEGER NOT NULL DEFAULT 0,
+	"deliverables_changed" REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0),
+	"reviews" INTEGER NOT NULL DEFAULT 0,
+	"reviews_changed" REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+);
+
+INSERT OR IGNORE INTO data_versions DEFAULT VALUES;
+
+CREATE TRIGGER IF NOT EXISTS projects_data_version_insert AFTER INSERT ON projects BEGIN
+	UPDATE data_versions SET projects = projects + 1, projects_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_data_version_update AFTER UPDATE ON projects BEGIN
+	UPDATE data_versions SET projects = projects + 1, projects_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_data_version_delete AFTER DELETE ON projects BEGIN
+	UPDATE data_versions SET projects = projects + 1, projects_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS bids_data_version_insert AFTER INSERT ON bids BEGIN
+	UPDATE data_versions SET bids = bids + 1, bids_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS bids_data_version_update AFTER UPDATE ON bids BEGIN
+	UPDATE data_versions SET bids = bids + 1, bids_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS bids_data_version_delete AFTER DELETE ON bids BEGIN
+	UPDATE data_versions SET bids = bids + 1, bids_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS deliverables_data_version_insert AFTER INSERT ON deliverables BEGIN
+	UPDATE data_versions SET deliverables = deliverables + 1, deliverables_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS deliverables_data_version_update AFTER UPDATE ON deliverables BEGIN
+	UPDATE data_versions SET deliverables = deliverables + 1, deliverables_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS deliverables_data_version_delete AFTER DELETE ON deliverables BEGIN
+	UPDATE data_versions SET deliverables = deliverables + 1, deliverables_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reviews_data_version_insert AFTER INSERT ON reviews BEGIN
+	UPDATE data_versions SET reviews = reviews + 1, reviews_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reviews_data_version_update AFTER UPDATE ON reviews BEGIN
+	UPDATE data_versions SET reviews = reviews + 1, reviews_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reviews_data_version_delete AFTER DELETE ON reviews BEGIN
+	UPDATE data_versions SET reviews = reviews + 1, reviews_changed = (julianday('now') - 2440587.5) * 86400.0;
+END;
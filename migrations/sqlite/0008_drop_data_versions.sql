@@ -0,0 +1,14 @@
+-- 0008：與 ../0008_drop_data_versions.sql 相同，移除 data_versions（SQLite 版）
+DROP TRIGGER IF EXISTS projects_data_version_insert;
+DROP TRIGGER IF EXISTS projects_data_version_update;
+DROP TRIGGER IF EXISTS projects_data_version_delete;
+DROP TRIGGER IF EXISTS bids_data_version_insert;
+DROP TRIGGER IF EXISTS bids_data_version_update;
+DROP TRIGGER IF EXISTS bids_data_version_delete;
+DROP TRIGGER IF EXISTS deliverables_data_version_insert;
+DROP TRIGGER IF EXISTS deliverables_data_version_update;
+DROP TRIGGER IF EXISTS deliverables_data_version_delete;
+DROP TRIGGER IF EXISTS reviews_data_version_insert;
+DROP TRIGGER IF EXISTS reviews_data_version_update;
+DROP TRIGGER IF EXISTS reviews_data_version_delete;
+DROP TABLE IF EXISTS data_versions;
@@ -1,4 +1,4 @@
-from .bid_repository import BidRepository
-from .deliverable_repository import DeliverableRepository
-from .project_repository import ProjectRepository
-from .user_repository import UserRepository
\ No newline at end of file
+from .bid_repository import BidRepository, AsyncBidRepository
+from .deliverable_repository import DeliverableRepository, AsyncDeliverableRepository
+from .project_repository import ProjectRepository, AsyncProjectRepository
+from .user_repository import UserRepository, AsyncUserRepository
\ No newline at end of file
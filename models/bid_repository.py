@@ -1,87 +1,256 @@
 from typing import List, Optional
+from psycopg.rows import dict_row
 from psycopg2.extras import RealDictCursor
-from db import get_db
+from db import get_db, get_async_db
+from cache import invalidate, ainvalidate
+from events import publish, apublish
+from models.project_repository import _PROJECT_CACHES
+from models.rows import Row, fetch_rows, afetch_rows
+from sqlite_backend import register
+from statements import prepared
+
+# accept_bid 的結果
+ACCEPTED = "accepted"                  # 本次接受成功
+ALREADY_ACCEPTED = "already_accepted"  # 這個投標先前已被接受（重複送出）
+CONFLICT = "conflict"                  # 專案已不是 open（已接受其他投標、已退件或完成）
+
+# 同步與非同步版本共用的 SQL
+# 投標列表：只取列表顯示的欄位（投標說明是委託人選擇投標的依據，完整顯示）
+_GET_BY_PROJECT_ID = prepared("bids_by_project", """
+    SELECT b.id, b.project_id, b.contractor_id, b.price, b.message, b.status, b.updated_at,
+           u.username as contractor_name
+    FROM bids b
+    JOIN users u ON b.contractor_id = u.id
+    WHERE b.project_id = %s
+    ORDER BY b.updated_at ASC
+""")
+
+# 投標列表的資料列可另外附加的欄位（承包者的評價摘要與評論，見 routes/client.py）
+BID_LIST_EXTRA = ("rating", "reviews")
+
+_GET_BY_ID = """
+    SELECT b.*, p.client_id
+    FROM bids b
+    JOIN projects p ON b.project_id = p.id
+    WHERE b.id = %s
+"""
+
+# 同時回傳專案的委託人（通知委託人有新的投標）
+_CREATE = """
+    INSERT INTO bids (project_id, contractor_id, price, message, status, updated_at)
+    VALUES (%s, %s, %s, %s, 'pending', NOW())
+    RETURNING id, (SELECT client_id FROM projects WHERE id = bids.project_id) AS client_id
+"""
+
+# 接受投標：鎖定專案列（FOR UPDATE），只有專案仍為 open 時才
+# 指派接案人、接受此投標並拒絕其他投標，全部在同一個語句內完成。
+# 同時接受同一專案的請求會在鎖上排隊，取得鎖後讀到的是已更新的專案狀態
+# （只有被鎖定的專案列會重新讀取，所以重複送出的判斷依專案的接案人，而不是投標狀態）。
+# 查無投標（或不是該委託人的專案）時不回傳任何列
+_ACCEPT_BID = """
+    WITH target AS (
+        SELECT b.id, b.project_id, b.contractor_id,
+               p.status AS project_status, p.contractor_id AS assigned_contractor_id
+        FROM bids b
+        JOIN projects p ON b.project_id = p.id
+        WHERE b.id = %s AND p.client_id = %s
+        FOR UPDATE OF p
+    ), assigned AS (
+        UPDATE projects p
+        SET contractor_id = t.contractor_id, status = 'assigned', updated_at = NOW()
+        FROM target t
+        WHERE p.id = t.project_id AND t.project_status = 'open'
+        RETURNING p.id
+    ), accepted AS (
+        UPDATE bids b
+        SET status = 'accepted', updated_at = NOW()
+        FROM target t, assigned a
+        WHERE b.id = t.id
+    ), rejected AS (
+        UPDATE bids b
+        SET status = 'rejected', updated_at = NOW()
+        FROM target t, assigned a
+        WHERE b.project_id = a.id AND b.id <> t.id
+    )
+    SELECT t.project_id, t.contractor_id, t.project_status, t.assigned_contractor_id,
+           EXISTS (SELECT 1 FROM assigned) AS assigned
+    FROM target t
+"""
+
+
+# SQLite 沒有會寫入資料的 CTE：先取得寫入鎖（取代 FOR UPDATE），再依序執行，結果欄位相同
+@register(_ACCEPT_BID)
+def _accept_bid_sqlite(cur, params):
+    bid_id, client_id = params
+    cur.connection.begin_write()
+    lookup = cur.connection.cursor()
+    lookup.execute("""
+        SELECT b.project_id, b.contractor_id, p.status, p.contractor_id
+        FROM bids b
+        JOIN projects p ON b.project_id = p.id
+        WHERE b.id = %s AND p.client_id = %s
+    """, (bid_id, client_id))
+    target = lookup.fetchone() or (None, None, None, None)
+    project_id, contractor_id, project_status = target[:3]
+    assigned = project_status == "open"
+    if assigned:
+        lookup.execute("""
+            UPDATE projects SET contractor_id = %s, status = 'assigned', updated_at = NOW()
+            WHERE id = %s
+        """, (contractor_id, project_id))
+        lookup.execute("""
+            UPDATE bids
+            SET status = CASE WHEN id = %s THEN 'accepted' ELSE 'rejected' END, updated_at = NOW()
+            WHERE project_id = %s
+        """, (bid_id, project_id))
+    cur.execute("""
+        SELECT %s AS project_id, %s AS contractor_id, %s AS project_status,
+               %s AS assigned_contractor_id, %s AS assigned
+        WHERE %s
+    """, (*target, assigned, project_id is not None))
+
+# 接受投標後通知被拒絕的投標者
+_GET_REJECTED_CONTRACTORS = """
+    SELECT contractor_id FROM bids
+    WHERE project_id = %s AND contractor_id <> %s
+"""
+
+_GET_CONTRACTOR_BID = """
+    SELECT * FROM bids
+    WHERE project_id = %s AND contractor_id = %s
+"""
+
+
+def _accept_result(row) -> dict:
+    if row["assigned"]:
+        result = ACCEPTED
+    elif row["project_status"] == "assigned" and row["assigned_contractor_id"] == row["contractor_id"]:
+        result = ALREADY_ACCEPTED
+    else:
+        result = CONFLICT
+    return {"result": result, "project_id": row["project_id"], "contractor_id": row["contractor_id"]}
+
+
+def _publish_decision(cur, row):
+    # 通知得標者與其他投標者（在接受投標的交易中，commit 後才送出）
+    publish(cur, "bid_accepted", [row["contractor_id"]], project_id=row["project_id"])
+    cur.execute(_GET_REJECTED_CONTRACTORS, (row["project_id"], row["contractor_id"]))
+    rejected = [r["contractor_id"] for r in cur.fetchall()]
+    publish(cur, "bid_rejected", rejected, project_id=row["project_id"])
+
+
+async def _apublish_decision(cur, row):
+    await apublish(cur, "bid_accepted", [row["contractor_id"]], project_id=row["project_id"])
+    await cur.execute(_GET_REJECTED_CONTRACTORS, (row["project_id"], row["contractor_id"]))
+    rejected = [r["contractor_id"] for r in await cur.fetchall()]
+    await apublish(cur, "bid_rejected", rejected, project_id=row["project_id"])
+
 
 class BidRepository:
     """投標資料存取層"""
-    
+
     @staticmethod
-    def get_by_project_id(project_id: int) -> List[dict]:
-        """取得專案的所有投標"""
+    def get_by_project_id(project_id: int) -> List[Row]:
+        """取得專案的所有投標（列表欄位，可另外設定 BID_LIST_EXTRA 的欄位）"""
         with get_db() as conn:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT b.*, u.username as contractor_name, p.client_id
-                FROM bids b
-                JOIN users u ON b.contractor_id = u.id
-                JOIN projects p ON b.project_id = p.id
-                WHERE b.project_id = %s
-                ORDER BY b.updated_at ASC
-            """, (project_id,))
-            return cur.fetchall()
-    
+            cur = conn.cursor()
+            cur.execute(_GET_BY_PROJECT_ID, (project_id,))
+            return fetch_rows(cur, BID_LIST_EXTRA)
+
     @staticmethod
     def get_by_id(bid_id: int) -> Optional[dict]:
         """根據 ID 取得投標"""
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT b.*, p.client_id
-                FROM bids b
-                JOIN projects p ON b.project_id = p.id
-                WHERE b.id = %s
-            """, (bid_id,))
+            cur.execute(_GET_BY_ID, (bid_id,))
             return cur.fetchone()
-    
+
     @staticmethod
     def create(project_id: int, contractor_id: int, price: int, message: str) -> int:
         """建立投標"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO bids (project_id, contractor_id, price, message, status, updated_at)
-                VALUES (%s, %s, %s, %s, 'pending', NOW())
-                RETURNING id
-            """, (project_id, contractor_id, price, message))
-            bid_id = cur.fetchone()[0]
+            cur.execute(_CREATE, (project_id, contractor_id, price, message))
+            bid_id, client_id = cur.fetchone()
+            publish(cur, "bid_created", [client_id], project_id=project_id, bid_id=bid_id)
             conn.commit()
             return bid_id
-    
-    @staticmethod
-    def accept(bid_id: int) -> bool:
-        """接受投標"""
-        with get_db() as conn:
-            cur = conn.cursor()
-            cur.execute("""
-                UPDATE bids
-                SET status = 'accepted'
-                WHERE id = %s
-            """, (bid_id,))
-            changed = cur.rowcount > 0
-            conn.commit()
-            return changed
-    
+
     @staticmethod
-    def reject_others(project_id: int, accepted_bid_id: int) -> bool:
-        """拒絕其他投標"""
+    def accept_bid(bid_id: int, client_id: int) -> Optional[dict]:
+        """
+        委託人接受投標（指派接案人、拒絕其他投標）。
+        回傳 {"result": ACCEPTED / ALREADY_ACCEPTED / CONFLICT, "project_id", "contractor_id"}；
+        查無投標或不是該委託人的專案時回傳 None
+        """
         with get_db() as conn:
-            cur = conn.cursor()
-            cur.execute("""
-                UPDATE bids
-                SET status = 'rejected', updated_at = NOW()
-                WHERE project_id = %s AND id != %s
-            """, (project_id, accepted_bid_id))
-            changed = cur.rowcount > 0
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(_ACCEPT_BID, (bid_id, client_id))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            if row["assigned"]:
+                invalidate(cur, _PROJECT_CACHES, row["project_id"])
+                _publish_decision(cur, row)
             conn.commit()
-            return changed
-    
+            return _accept_result(row)
+
     @staticmethod
     def get_contractor_bid(project_id: int, contractor_id: int) -> Optional[dict]:
         """取得接案人對某專案的投標"""
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT * FROM bids
-                WHERE project_id = %s AND contractor_id = %s
-            """, (project_id, contractor_id))
-            return cur.fetchone()
\ No newline at end of file
+            cur.execute(_GET_CONTRACTOR_BID, (project_id, contractor_id))
+            return cur.fetchone()
+
+
+class AsyncBidRepository:
+    """投標資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def get_by_project_id(project_id: int) -> List[Row]:
+        """取得專案的所有投標（列表欄位，可另外設定 BID_LIST_EXTRA 的欄位）"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_GET_BY_PROJECT_ID, (project_id,))
+            return await afetch_rows(cur, BID_LIST_EXTRA)
+
+    @staticmethod
+    async def get_by_id(bid_id: int) -> Optional[dict]:
+        """根據 ID 取得投標"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_BY_ID, (bid_id,))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def create(project_id: int, contractor_id: int, price: int, message: str) -> int:
+        """建立投標"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CREATE, (project_id, contractor_id, price, message))
+            bid_id, client_id = await cur.fetchone()
+            await apublish(cur, "bid_created", [client_id], project_id=project_id, bid_id=bid_id)
+            return bid_id
+
+    @staticmethod
+    async def accept_bid(bid_id: int, client_id: int) -> Optional[dict]:
+        """委託人接受投標，回傳格式同 BidRepository.accept_bid"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_ACCEPT_BID, (bid_id, client_id))
+            row = await cur.fetchone()
+            if row is None:
+                return None
+            if row["assigned"]:
+                await ainvalidate(cur, _PROJECT_CACHES, row["project_id"])
+                await _apublish_decision(cur, row)
+            return _accept_result(row)
+
+    @staticmethod
+    async def get_contractor_bid(project_id: int, contractor_id: int) -> Optional[dict]:
+        """取得接案人對某專案的投標"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_CONTRACTOR_BID, (project_id, contractor_id))
+            return await cur.fetchone()
@@ -0,0 +1,65 @@
+from typing import Callable, Iterable, List, Set
+from db import get_db
+from sqlite_backend import register
+
+# 超過 %s 秒未被使用
+_IDLE_CUTOFF = "NOW() - make_interval(secs => %s)"
+register(_IDLE_CUTOFF, "strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now', 'localtime', -%s || ' seconds')")
+
+_DELETE_UNREFERENCED = f"""
+    DELETE FROM blobs
+    WHERE ref_count <= 0 AND updated_at < {_IDLE_CUTOFF}
+    RETURNING sha256
+"""
+
+_GET_UNREFERENCED = f"""
+    SELECT sha256 FROM blobs
+    WHERE ref_count <= 0 AND updated_at < {_IDLE_CUTOFF}
+"""
+
+_GET_KNOWN = "SELECT sha256 FROM blobs WHERE sha256 = ANY(%s)"
+
+_GET_REFERENCED_PATHS = "SELECT DISTINCT file_path FROM deliverables WHERE file_path = ANY(%s)"
+
+
+class BlobRepository:
+    """上傳檔案 blob 的資料存取層（垃圾回收用，僅同步版）"""
+
+    @staticmethod
+    def delete_unreferenced(older_than_seconds: float, on_delete: Callable[[str], None]) -> List[str]:
+        """
+        刪除 ref_count 為 0 且超過 older_than_seconds 未被使用的 blob 列。
+        on_delete(sha256) 會在 commit 前對每個 blob 呼叫（用來刪除實體檔案）：
+        被刪除的列在交易結束前保持鎖定，同時上傳相同內容的請求會等待，不會拿到已刪除的檔案。
+        """
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_DELETE_UNREFERENCED, (older_than_seconds,))
+            deleted = [row[0] for row in cur.fetchall()]
+            for sha256 in deleted:
+                on_delete(sha256)
+            return deleted
+
+    @staticmethod
+    def get_unreferenced(older_than_seconds: float) -> List[str]:
+        """ref_count 為 0 且超過 older_than_seconds 未被使用的 blob（不刪除，dry run 用）"""
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_GET_UNREFERENCED, (older_than_seconds,))
+            return [row[0] for row in cur.fetchall()]
+
+    @staticmethod
+    def get_known(sha256s: Iterable[str]) -> Set[str]:
+        """回傳資料庫中有記錄的 blob 雜湊"""
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_GET_KNOWN, (list(sha256s),))
+            return {row[0] for row in cur.fetchall()}
+
+    @staticmethod
+    def get_referenced_paths(paths: Iterable[str]) -> Set[str]:
+        """回傳仍被 deliverables.file_path 引用的路徑"""
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_GET_REFERENCED_PATHS, (list(paths),))
+            return {row[0] for row in cur.fetchall()}
\ No newline at end of file
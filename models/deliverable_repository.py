@@ -1,38 +1,167 @@
+from collections import Counter
 from typing import Optional
+from psycopg.rows import dict_row
 from psycopg2.extras import RealDictCursor
-from db import get_db
+from db import get_db, get_async_db
+from events import publish, apublish
+from sqlite_backend import register
+
+# 同步與非同步版本共用的 SQL
+_GET_BY_PROJECT_ID = "SELECT * FROM deliverables WHERE project_id = %s"
+
+# 下載授權用：結案檔案與專案的委託人 / 接案人
+_GET_WITH_PROJECT = """
+    SELECT d.*, p.client_id, p.contractor_id
+    FROM deliverables d
+    JOIN projects p ON d.project_id = p.id
+    WHERE d.id = %s
+"""
+
+# 有 checksum 時同一個語句內將 blobs.ref_count + 1（新內容則建立 blob 列並鎖定）；
+# 同時回傳專案的委託人（通知委託人有新的結案檔案）
+_CREATE = """
+    WITH blob AS (
+        INSERT INTO blobs (sha256, size, ref_count, created_at, updated_at)
+        SELECT %s, %s, 1, NOW(), NOW()
+        WHERE %s::varchar IS NOT NULL
+        ON CONFLICT (sha256) DO UPDATE
+        SET ref_count = blobs.ref_count + 1, updated_at = NOW()
+    )
+    INSERT INTO deliverables (project_id, file_name, file_path, message, file_size, checksum, uploaded_at)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+    RETURNING id, (SELECT client_id FROM projects WHERE id = deliverables.project_id) AS client_id
+"""
+
+
+# SQLite 沒有會寫入資料的 CTE：分成兩個語句（同一個交易）
+@register(_CREATE)
+def _create_sqlite(cur, params):
+    checksum, size = params[0], params[1]
+    if checksum is not None:
+        cur.execute("""
+            INSERT INTO blobs (sha256, size, ref_count, created_at, updated_at)
+            VALUES (%s, %s, 1, NOW(), NOW())
+            ON CONFLICT (sha256) DO UPDATE
+            SET ref_count = blobs.ref_count + 1, updated_at = NOW()
+        """, (checksum, size))
+    cur.execute("""
+        INSERT INTO deliverables (project_id, file_name, file_path, message, file_size, checksum, uploaded_at)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+        RETURNING id, (SELECT client_id FROM projects WHERE id = deliverables.project_id) AS client_id
+    """, params[3:])
+
+# 刪除結案檔案並將其 blob 的 ref_count 減回去
+_DELETE_BY_PROJECT_ID = """
+    WITH removed AS (
+        DELETE FROM deliverables WHERE project_id = %s
+        RETURNING checksum
+    ), released AS (
+        UPDATE blobs b
+        SET ref_count = b.ref_count - r.n, updated_at = NOW()
+        FROM (
+            SELECT checksum, COUNT(*) AS n FROM removed
+            WHERE checksum IS NOT NULL
+            GROUP BY checksum
+        ) r
+        WHERE b.sha256 = r.checksum
+    )
+    SELECT COUNT(*) FROM removed
+"""
+
+
+@register(_DELETE_BY_PROJECT_ID)
+def _delete_by_project_id_sqlite(cur, params):
+    lookup = cur.connection.cursor()
+    lookup.execute("DELETE FROM deliverables WHERE project_id = %s RETURNING checksum", params)
+    removed = [row[0] for row in lookup.fetchall()]
+    for checksum, n in Counter(c for c in removed if c is not None).items():
+        lookup.execute("""
+            UPDATE blobs SET ref_count = ref_count - %s, updated_at = NOW()
+            WHERE sha256 = %s
+        """, (n, checksum))
+    cur.execute("SELECT %s", (len(removed),))
+
 
 class DeliverableRepository:
     """結案檔案資料存取層"""
-    
+
     @staticmethod
     def get_by_project_id(project_id: int) -> Optional[dict]:
         """取得專案的結案檔案"""
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("SELECT * FROM deliverables WHERE project_id = %s", (project_id,))
+            cur.execute(_GET_BY_PROJECT_ID, (project_id,))
+            return cur.fetchone()
+
+    @staticmethod
+    def get_with_project(deliverable_id: int) -> Optional[dict]:
+        """取得結案檔案及所屬專案的 client_id / contractor_id"""
+        with get_db() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(_GET_WITH_PROJECT, (deliverable_id,))
             return cur.fetchone()
-    
+
     @staticmethod
-    def create(project_id: int, file_name: str, file_path: str, message: str) -> int:
-        """建立結案檔案"""
+    def create(project_id: int, file_name: str, file_path: str, message: str,
+               file_size: Optional[int] = None, checksum: Optional[str] = None) -> int:
+        """建立結案檔案（file_size / checksum 為上傳時計算的大小與 SHA-256）"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO deliverables (project_id, file_name, file_path, message, uploaded_at)
-                VALUES (%s, %s, %s, %s, NOW())
-                RETURNING id
-            """, (project_id, file_name, file_path, message))
-            deliverable_id = cur.fetchone()[0]
+            cur.execute(_CREATE, (checksum, file_size, checksum,
+                                  project_id, file_name, file_path, message, file_size, checksum))
+            deliverable_id, client_id = cur.fetchone()
+            publish(cur, "deliverable_uploaded", [client_id],
+                    project_id=project_id, deliverable_id=deliverable_id)
             conn.commit()
             return deliverable_id
-        
+
     @staticmethod
     def delete_by_project_id(project_id: int) -> bool:
         """刪除專案的結案檔案"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("DELETE FROM deliverables WHERE project_id = %s", (project_id,))
-            changed = cur.rowcount > 0
+            cur.execute(_DELETE_BY_PROJECT_ID, (project_id,))
+            changed = cur.fetchone()[0] > 0
             conn.commit()
-            return changed
\ No newline at end of file
+            return changed
+
+
+class AsyncDeliverableRepository:
+    """結案檔案資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def get_by_project_id(project_id: int) -> Optional[dict]:
+        """取得專案的結案檔案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_BY_PROJECT_ID, (project_id,))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def get_with_project(deliverable_id: int) -> Optional[dict]:
+        """取得結案檔案及所屬專案的 client_id / contractor_id"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_WITH_PROJECT, (deliverable_id,))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def create(project_id: int, file_name: str, file_path: str, message: str,
+                     file_size: Optional[int] = None, checksum: Optional[str] = None) -> int:
+        """建立結案檔案（file_size / checksum 為上傳時計算的大小與 SHA-256）"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CREATE, (checksum, file_size, checksum,
+                                        project_id, file_name, file_path, message, file_size, checksum))
+            deliverable_id, client_id = await cur.fetchone()
+            await apublish(cur, "deliverable_uploaded", [client_id],
+                           project_id=project_id, deliverable_id=deliverable_id)
+            return deliverable_id
+
+    @staticmethod
+    async def delete_by_project_id(project_id: int) -> bool:
+        """刪除專案的結案檔案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_DELETE_BY_PROJECT_ID, (project_id,))
+            return (await cur.fetchone())[0] > 0
@@ -0,0 +1,141 @@
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+from db import get_db, get_async_db
+
+# 匯出查詢：status / date_from / date_to（不含）/ user_id 為 None 時不篩選
+# user_id 只匯出與該使用者有關的資料（委託人或接案人）
+# deliverables / reviews 本身沒有狀態，status 篩選的是所屬專案的狀態
+_EXPORT_PROJECTS = """
+    SELECT p.id, p.title, p.description, p.budget, p.status,
+           p.client_id, uc.username AS client_name,
+           p.contractor_id, uo.username AS contractor_name,
+           p.updated_at
+    FROM projects p
+    JOIN users uc ON p.client_id = uc.id
+    LEFT JOIN users uo ON p.contractor_id = uo.id
+    WHERE (%(status)s::text[] IS NULL OR p.status = ANY(%(status)s::text[]))
+      AND (%(date_from)s::timestamp IS NULL OR p.updated_at >= %(date_from)s::timestamp)
+      AND (%(date_to)s::timestamp IS NULL OR p.updated_at < %(date_to)s::timestamp)
+      AND (%(user_id)s::int IS NULL OR p.client_id = %(user_id)s::int OR p.contractor_id = %(user_id)s::int)
+    ORDER BY p.id
+"""
+
+_EXPORT_BIDS = """
+    SELECT b.id, b.project_id, b.contractor_id, u.username AS contractor_name,
+           b.price, b.message, b.status, b.updated_at
+    FROM bids b
+    JOIN users u ON b.contractor_id = u.id
+    JOIN projects p ON b.project_id = p.id
+    WHERE (%(status)s::text[] IS NULL OR b.status = ANY(%(status)s::text[]))
+      AND (%(date_from)s::timestamp IS NULL OR b.updated_at >= %(date_from)s::timestamp)
+      AND (%(date_to)s::timestamp IS NULL OR b.updated_at < %(date_to)s::timestamp)
+      AND (%(user_id)s::int IS NULL OR b.contractor_id = %(user_id)s::int
+           OR b.project_id = ANY(ARRAY(SELECT id FROM projects WHERE client_id = %(user_id)s::int)))
+    ORDER BY b.id
+"""
+
+_EXPORT_DELIVERABLES = """
+    SELECT d.id, d.project_id, d.file_name, d.file_size, d.checksum, d.message, d.uploaded_at
+    FROM deliverables d
+    JOIN projects p ON d.project_id = p.id
+    WHERE (%(status)s::text[] IS NULL OR p.status = ANY(%(status)s::text[]))
+      AND (%(date_from)s::timestamp IS NULL OR d.uploaded_at >= %(date_from)s::timestamp)
+      AND (%(date_to)s::timestamp IS NULL OR d.uploaded_at < %(date_to)s::timestamp)
+      AND (%(user_id)s::int IS NULL OR p.client_id = %(user_id)s::int OR p.contractor_id = %(user_id)s::int)
+    ORDER BY d.id
+"""
+
+_EXPORT_REVIEWS = """
+    SELECT r.id, r.project_id, r.reviewer_id, r.target_id,
+           r.dim1, r.dim2, r.dim3, r.comment, r.created_at
+    FROM reviews r
+    JOIN projects p ON r.project_id = p.id
+    WHERE (%(status)s::text[] IS NULL OR p.status = ANY(%(status)s::text[]))
+      AND (%(date_from)s::timestamp IS NULL OR r.created_at >= %(date_from)s::timestamp)
+      AND (%(date_to)s::timestamp IS NULL OR r.created_at < %(date_to)s::timestamp)
+      AND (%(user_id)s::int IS NULL OR r.reviewer_id = %(user_id)s::int OR r.target_id = %(user_id)s::int)
+    ORDER BY r.id
+"""
+
+EXPORTS = {
+    "projects": _EXPORT_PROJECTS,
+    "bids": _EXPORT_BIDS,
+    "deliverables": _EXPORT_DELIVERABLES,
+    "reviews": _EXPORT_REVIEWS,
+}
+
+# 每次從 server-side cursor 取回的筆數（記憶體用量只與此值有關，與匯出總筆數無關）
+EXPORT_BATCH_SIZE = 2000
+
+
+def _export_params(status, date_from, date_to, user_id) -> dict:
+    if isinstance(status, str):
+        status = [status]
+    return {
+        "status": list(status) if status else None,
+        "date_from": date_from,
+        "date_to": date_to,
+        "user_id": user_id,
+    }
+
+
+class ExportRepository:
+    """匯出資料存取層：以 server-side（具名）cursor 分批讀取，不把整個結果載入記憶體"""
+
+    @staticmethod
+    def stream(
+        kind: str,
+        status: Optional[Sequence[str]] = None,
+        date_from=None,
+        date_to=None,
+        user_id: Optional[int] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[Tuple[List[str], list]]:
+        """
+        依序產生 (欄位名稱, 該批資料列 tuple)；沒有資料時仍會產生一次 (欄位名稱, [])。
+        kind 為 EXPORTS 的 key，未知的 kind 丟出 KeyError
+        """
+        sql = EXPORTS[kind]
+        with get_db() as conn:
+            cur = conn.cursor(name=f"export_{kind}")
+            # 呼叫端提早停止（close()）時也要關閉 cursor，連線才會結束交易並歸還連線池
+            try:
+                cur.execute(sql, _export_params(status, date_from, date_to, user_id))
+                rows = cur.fetchmany(batch_size)
+                columns = [c[0] for c in cur.description]
+                yield columns, rows
+                while len(rows) == batch_size:
+                    rows = cur.fetchmany(batch_size)
+                    if rows:
+                        yield columns, rows
+            finally:
+                cur.close()
+
+
+class AsyncExportRepository:
+    """匯出資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def stream(
+        kind: str,
+        status: Optional[Sequence[str]] = None,
+        date_from=None,
+        date_to=None,
+        user_id: Optional[int] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[Tuple[List[str], list]]:
+        """同 ExportRepository.stream"""
+        sql = EXPORTS[kind]
+        async with get_async_db() as conn:
+            cur = conn.cursor(name=f"export_{kind}")
+            # 用戶端斷線時路由會 aclose() 這個產生器，在這裡關閉 cursor 並歸還連線
+            try:
+                await cur.execute(sql, _export_params(status, date_from, date_to, user_id))
+                rows = await cur.fetchmany(batch_size)
+                columns = [c.name for c in cur.description]
+                yield columns, rows
+                while len(rows) == batch_size:
+                    rows = await cur.fetchmany(batch_size)
+                    if rows:
+                        yield columns, rows
+            finally:
+                await cur.close()
@@ -0,0 +1,114 @@
+from db import get_db, get_async_db
+
+# 頁面資料的最後修改時間（條件式 GET 的 ETag / Last-Modified，見 routes/conditional.py）
+# 每個查詢只讀取頁面實際用到的資料列：MAX(updated_at / uploaded_at) 涵蓋新增與修改，
+# 另加上筆數涵蓋刪除（例如重新上傳時刪除舊的結案檔案）；評價以被評價者的
+# user_rating_summary（與評價在同一個語句中更新）代表，不必掃描 reviews。
+# 時間轉成 timestamptz（以 session 時區解讀），Last-Modified 才與伺服器的時區無關
+
+# 委託人的專案列表：只與自己的專案有關
+_CLIENT_DASHBOARD = """
+    SELECT MAX(updated_at)::timestamptz AS projects_at, COUNT(*) AS projects
+    FROM projects
+    WHERE client_id = %s
+"""
+
+# 接案人的控制台：可接案列表包含所有人的專案（接受投標、結案都會讓專案離開列表），
+# 以全部專案的最後修改時間判斷；另加上自己專案的結案檔案
+_CONTRACTOR_DASHBOARD = """
+    SELECT (SELECT MAX(updated_at) FROM projects)::timestamptz AS projects_at,
+           MAX(d.uploaded_at)::timestamptz AS deliverables_at,
+           COUNT(d.id) AS deliverables
+    FROM projects p
+    JOIN deliverables d ON d.project_id = p.id
+    WHERE p.contractor_id = %s
+"""
+
+# 接案人看專案詳情：專案、自己的投標、甲方收到的評價（包含自己是否已評價）
+_CONTRACTOR_PROJECT = """
+    SELECT p.updated_at::timestamptz AS project_at,
+           (SELECT MAX(b.updated_at) FROM bids b
+            WHERE b.project_id = p.id AND b.contractor_id = %s)::timestamptz AS bid_at,
+           s.updated_at::timestamptz AS rating_at,
+           s.review_count
+    FROM projects p
+    LEFT JOIN user_rating_summary s ON s.user_id = p.client_id
+    WHERE p.id = %s
+"""
+
+# 委託人看結案檔案：專案、結案檔案、接案人收到的評價（包含自己是否已評價）
+_CLIENT_DELIVERABLE = """
+    SELECT p.updated_at::timestamptz AS project_at,
+           (SELECT MAX(d.uploaded_at) FROM deliverables d
+            WHERE d.project_id = p.id)::timestamptz AS deliverable_at,
+           (SELECT COUNT(*) FROM deliverables d WHERE d.project_id = p.id) AS deliverables,
+           s.updated_at::timestamptz AS rating_at,
+           s.review_count
+    FROM projects p
+    LEFT JOIN user_rating_summary s ON s.user_id = p.contractor_id
+    WHERE p.id = %s AND p.client_id = %s
+"""
+
+
+class FreshnessRepository:
+    """頁面資料的最後修改時間與筆數；回傳 tuple，專案不存在（或不屬於該使用者）時回傳 None"""
+
+    @staticmethod
+    def client_dashboard(client_id: int):
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_CLIENT_DASHBOARD, (client_id,))
+            return cur.fetchone()
+
+    @staticmethod
+    def contractor_dashboard(contractor_id: int):
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_CONTRACTOR_DASHBOARD, (contractor_id,))
+            return cur.fetchone()
+
+    @staticmethod
+    def contractor_project(project_id: int, contractor_id: int):
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_CONTRACTOR_PROJECT, (contractor_id, project_id))
+            return cur.fetchone()
+
+    @staticmethod
+    def client_deliverable(project_id: int, client_id: int):
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_CLIENT_DELIVERABLE, (project_id, client_id))
+            return cur.fetchone()
+
+
+class AsyncFreshnessRepository:
+    """頁面資料的最後修改時間（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def client_dashboard(client_id: int):
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CLIENT_DASHBOARD, (client_id,))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def contractor_dashboard(contractor_id: int):
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CONTRACTOR_DASHBOARD, (contractor_id,))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def contractor_project(project_id: int, contractor_id: int):
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CONTRACTOR_PROJECT, (contractor_id, project_id))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def client_deliverable(project_id: int, client_id: int):
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CLIENT_DELIVERABLE, (project_id, client_id))
+            return await cur.fetchone()
@@ -0,0 +1,201 @@
+import asyncio
+
+from db import get_db, get_async_db
+from events import publish_many, apublish_many
+from sqlite_backend import register
+
+# 批次匯入（見 importer.py）：ImportReader.stage() 寫好的暫存檔以 COPY 載入暫存表（交易結束時自動刪除），
+# 沒有任何錯誤時才以一個 INSERT ... SELECT 合併，整個匯入在同一個交易中完成。
+# 檔案格式有錯誤時不會取得資料庫連線；讀取、驗證檔案都在取得連線之前完成
+# 暫存表的 line 為匯入檔的行號，用來回報每一列的錯誤並保留檔案中的順序
+_CREATE_PROJECT_STAGING = """
+    CREATE TEMP TABLE import_projects (
+        line INTEGER NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        budget INTEGER NOT NULL
+    ) ON COMMIT DROP
+"""
+
+_COPY_PROJECTS = "COPY import_projects (line, title, description, budget) FROM STDIN"
+
+_MERGE_PROJECTS = """
+    INSERT INTO projects (title, description, budget, client_id, status, updated_at)
+    SELECT title, description, budget, %s, 'open', NOW()
+    FROM import_projects
+    ORDER BY line
+"""
+
+_CREATE_BID_STAGING = """
+    CREATE TEMP TABLE import_bids (
+        line INTEGER NOT NULL,
+        project_id INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        message TEXT
+    ) ON COMMIT DROP
+"""
+
+_COPY_BIDS = "COPY import_bids (line, project_id, price, message) FROM STDIN"
+
+# 暫存表沒有自動統計資訊：先 ANALYZE，檢查與合併才會依實際筆數選擇計畫
+_ANALYZE_BIDS = "ANALYZE import_bids"
+
+# 資料庫端的檢查：專案不存在 / 不接受投標、已投標過、檔案中重複的專案（保留第一列）。
+# 每列只回報第一個錯誤，total 為錯誤總數
+_BID_IMPORT_ERRORS = """
+    SELECT line, error, COUNT(*) OVER () AS total
+    FROM (
+        SELECT s.line,
+               CASE
+                   WHEN p.id IS NULL THEN 'project_not_found'
+                   WHEN p.status <> 'open' THEN 'project_not_open'
+                   WHEN EXISTS (SELECT 1 FROM bids b
+                                WHERE b.project_id = s.project_id AND b.contractor_id = %s)
+                       THEN 'already_bid'
+                   WHEN s.nth > 1 THEN 'duplicate_project'
+               END AS error
+        FROM (
+            SELECT line, project_id,
+                   ROW_NUMBER() OVER (PARTITION BY project_id ORDER BY line) AS nth
+            FROM import_bids
+        ) s
+        LEFT JOIN projects p ON p.id = s.project_id
+    ) checked
+    WHERE error IS NOT NULL
+    ORDER BY line
+    LIMIT %s
+"""
+
+_BID_ERRORS = {
+    "project_not_found": "專案不存在",
+    "project_not_open": "專案已不是開放狀態，無法接受投標",
+    "already_bid": "已對此專案投標過",
+    "duplicate_project": "檔案中已有此專案的投標",
+}
+
+_MERGE_BIDS = """
+    INSERT INTO bids (project_id, contractor_id, price, message, status, updated_at)
+    SELECT project_id, %s, price, message, 'pending', NOW()
+    FROM import_bids
+    ORDER BY line
+"""
+
+# 通知每個專案的委託人有新的投標
+_IMPORTED_BID_PROJECTS = """
+    SELECT p.id, p.client_id
+    FROM projects p
+    WHERE p.id IN (SELECT project_id FROM import_bids)
+"""
+
+
+# SQLite 沒有 ON COMMIT DROP：暫存表留在連線上，建立前先刪除上一次匯入留下的
+def _sqlite_staging(table, statement):
+    def create(cur, params):
+        cur.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        cur.execute(statement.replace(" ON COMMIT DROP", ""))
+    return create
+
+
+register(_CREATE_PROJECT_STAGING)(_sqlite_staging("import_projects", _CREATE_PROJECT_STAGING))
+register(_CREATE_BID_STAGING)(_sqlite_staging("import_bids", _CREATE_BID_STAGING))
+
+
+def _bid_errors(rows, errors):
+    for line, error, _ in errors:
+        rows.add_error(line, _BID_ERRORS[error])
+    if errors:
+        # 只取回前 max_errors 列，其餘只計入總數
+        rows.error_count += errors[0][2] - len(errors)
+
+
+class ImportRepository:
+    """批次匯入資料存取層（同步版，供 CLI 使用）；rows 為已 stage() 的 importer.ImportReader"""
+
+    @staticmethod
+    def import_projects(client_id: int, rows) -> int:
+        """匯入委託人的專案，回傳新增的專案數；有任何錯誤時不新增任何專案（回傳 0）"""
+        if rows.error_count:
+            return 0
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_CREATE_PROJECT_STAGING)
+            with open(rows.path, encoding="utf-8", newline="") as f:
+                cur.copy_expert(_COPY_PROJECTS, f)
+            cur.execute(_MERGE_PROJECTS, (client_id,))
+            imported = cur.rowcount
+            conn.commit()
+            return imported
+
+    @staticmethod
+    def import_bids(contractor_id: int, rows) -> int:
+        """匯入接案人的投標，回傳新增的投標數；有任何錯誤時不新增任何投標（回傳 0）"""
+        if rows.error_count:
+            return 0
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(_CREATE_BID_STAGING)
+            with open(rows.path, encoding="utf-8", newline="") as f:
+                cur.copy_expert(_COPY_BIDS, f)
+            cur.execute(_ANALYZE_BIDS)
+            cur.execute(_BID_IMPORT_ERRORS, (contractor_id, rows.max_errors))
+            _bid_errors(rows, cur.fetchall())
+            if rows.error_count:
+                conn.rollback()
+                return 0
+            cur.execute(_MERGE_BIDS, (contractor_id,))
+            imported = cur.rowcount
+            cur.execute(_IMPORTED_BID_PROJECTS)
+            publish_many(cur, [("bid_created", [client_id], {"project_id": project_id})
+                               for project_id, client_id in cur.fetchall()])
+            conn.commit()
+            return imported
+
+
+# 非同步版每次在執行緒中讀取暫存檔的字元數
+COPY_CHUNK_SIZE = 256 * 1024
+
+
+async def _acopy(cur, statement, path):
+    """psycopg 3 的 COPY：在執行緒中逐塊讀取暫存檔（已是 COPY 文字格式），寫入 COPY 串流"""
+    with open(path, encoding="utf-8", newline="") as f:
+        async with cur.copy(statement) as copy:
+            while chunk := await asyncio.to_thread(f.read, COPY_CHUNK_SIZE):
+                await copy.write(chunk)
+
+
+class AsyncImportRepository:
+    """批次匯入資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def import_projects(client_id: int, rows) -> int:
+        """同 ImportRepository.import_projects"""
+        if rows.error_count:
+            return 0
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CREATE_PROJECT_STAGING)
+            await _acopy(cur, _COPY_PROJECTS, rows.path)
+            await cur.execute(_MERGE_PROJECTS, (client_id,))
+            return cur.rowcount
+
+    @staticmethod
+    async def import_bids(contractor_id: int, rows) -> int:
+        """同 ImportRepository.import_bids"""
+        if rows.error_count:
+            return 0
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CREATE_BID_STAGING)
+            await _acopy(cur, _COPY_BIDS, rows.path)
+            await cur.execute(_ANALYZE_BIDS)
+            await cur.execute(_BID_IMPORT_ERRORS, (contractor_id, rows.max_errors))
+            _bid_errors(rows, await cur.fetchall())
+            if rows.error_count:
+                await conn.rollback()
+                return 0
+            await cur.execute(_MERGE_BIDS, (contractor_id,))
+            imported = cur.rowcount
+            await cur.execute(_IMPORTED_BID_PROJECTS)
+            await apublish_many(cur, [("bid_created", [client_id], {"project_id": project_id})
+                                      for project_id, client_id in await cur.fetchall()])
+            return imported
@@ -1,64 +1,306 @@
-from typing import List, Optional
+import base64
+from datetime import datetime
+from typing import List, Optional, Sequence, Union
+from psycopg.rows import dict_row
 from psycopg2.extras import RealDictCursor
-from db import get_db
+from db import get_db, get_async_db
+from cache import get_cache, invalidate, ainvalidate
+from sqlite_backend import register
+from statements import prepared
+from models.rows import Row, fetch_rows, afetch_rows
+
+# 列表顯示的說明長度（在資料庫端截斷，列表不傳送完整的 description）
+SNIPPET_LENGTH = 160
+
+# 列表用的欄位：不含 description，改為截斷後的 description_snippet；完整資料列只在詳情頁（get_by_id 等）取得
+_SNIPPET = f"LEFT(p.description, {SNIPPET_LENGTH})"
+_LIST_COLUMNS = f"""p.id, p.client_id, p.contractor_id, p.title, p.budget, p.status, p.updated_at,
+           CASE WHEN LENGTH(p.description) > {SNIPPET_LENGTH} THEN {_SNIPPET} || '…'
+                ELSE p.description END AS description_snippet"""
+
+# SQLite 沒有 LEFT()
+register(_SNIPPET, f"substr(p.description, 1, {SNIPPET_LENGTH})")
+
+# 同步與非同步版本共用的 SQL
+_GET_BY_CLIENT_ID = f"""
+    SELECT {_LIST_COLUMNS}, u.username as contractor_name
+    FROM projects p
+    LEFT JOIN users u ON p.contractor_id = u.id
+    WHERE p.client_id = %s
+    ORDER BY p.updated_at DESC
+"""
+
+# 幾乎每個專案頁面都會查：以預備語句執行（statements.py），每條連線只解析與規劃一次
+_GET_BY_ID = prepared("project_by_id", """
+    SELECT p.*,
+           uc.username as client_name,
+           uo.username as contractor_name
+    FROM projects p
+    JOIN users uc ON p.client_id = uc.id
+    LEFT JOIN users uo ON p.contractor_id = uo.id
+    WHERE p.id = %s
+""")
+
+_GET_AVAILABLE_PROJECTS = f"""
+    SELECT {_LIST_COLUMNS}, u.username as client_name
+    FROM projects p
+    JOIN users u ON p.client_id = u.id
+    WHERE p.status = 'open'
+    ORDER BY p.updated_at DESC
+"""
+
+_CREATE = """
+    INSERT INTO projects (title, description, budget, client_id, status, updated_at)
+    VALUES (%s, %s, %s, %s, 'open', NOW())
+    RETURNING id
+"""
+
+_UPDATE = """
+    UPDATE projects
+    SET title = %s, description = %s, budget = %s, updated_at = NOW()
+    WHERE id = %s AND client_id = %s
+"""
+
+_ASSIGN_CONTRACTOR = """
+    UPDATE projects
+    SET contractor_id = %s, status = 'assigned', updated_at = NOW()
+    WHERE id = %s
+"""
+
+_COMPLETE = """
+    UPDATE projects
+    SET status = 'completed', updated_at = NOW()
+    WHERE id = %s AND client_id = %s
+"""
+
+_REJECT = """
+    UPDATE projects
+    SET status = 'rejected', updated_at = NOW()
+    WHERE id = %s AND client_id = %s
+"""
+
+_GET_CONTRACTOR_PROJECTS = f"""
+    SELECT {_LIST_COLUMNS}, u.username as client_name
+    FROM projects p
+    JOIN users u ON p.client_id = u.id
+    WHERE p.contractor_id = %s
+    ORDER BY p.updated_at DESC
+"""
+
+# 列表模式：同一個查詢內附帶是否已上傳結案檔案與最後上傳時間
+_DELIVERABLE_COLUMNS = """,
+           d.id IS NOT NULL AS has_deliverable,
+           d.uploaded_at AS last_uploaded_at"""
+
+_DELIVERABLE_JOIN = """
+    LEFT JOIN LATERAL (
+        SELECT dl.id, dl.uploaded_at
+        FROM deliverables dl
+        WHERE dl.project_id = p.id
+        ORDER BY dl.uploaded_at DESC
+        LIMIT 1
+    ) d ON TRUE"""
+
+# SQLite 沒有 LATERAL：以相關子查詢取得（同樣使用 deliverables_project_uploaded_idx）
+register(_DELIVERABLE_COLUMNS, """,
+           EXISTS (SELECT 1 FROM deliverables dl WHERE dl.project_id = p.id) AS has_deliverable,
+           (SELECT MAX(dl.uploaded_at) FROM deliverables dl WHERE dl.project_id = p.id) AS last_uploaded_at""")
+register(_DELIVERABLE_JOIN, "")
+
+_GET_CONTRACTOR_PROJECTS_WITH_DELIVERABLES = f"""
+    SELECT {_LIST_COLUMNS}, u.username as client_name{_DELIVERABLE_COLUMNS}
+    FROM projects p
+    JOIN users u ON p.client_id = u.id{_DELIVERABLE_JOIN}
+    WHERE p.contractor_id = %s
+    ORDER BY p.updated_at DESC
+"""
+
+# 全文搜尋：project_search.document（migrations/0005）與使用者輸入的查詢字串
+_SEARCH_RANK = "ts_rank_cd(ps.document, q.query)"
+_SEARCH_MATCH = "ps.document @@ q.query"
+
+_SEARCH_COLUMNS = f""",
+           {_SEARCH_RANK} AS rank"""
+
+_SEARCH_JOIN = """
+    JOIN project_search ps ON ps.project_id = p.id
+    CROSS JOIN websearch_to_tsquery('simple', %s) AS q(query)"""
+
+# SQLite：project_search 為 FTS5 索引（migrations/sqlite/0005），rank 為 bm25（越小越相關，取負值）
+register(_SEARCH_JOIN, """
+    JOIN project_search ps ON ps.rowid = p.id AND ps.project_search MATCH fts_query(%s)""")
+register(_SEARCH_RANK, "(-ps.rank)")
+register(_SEARCH_MATCH, "TRUE")
+
+# 分頁列表：keyset 分頁（updated_at, id；搜尋時為 rank, id），篩選條件由 _build_page_query 組出
+_PROJECT_PAGE = """
+    SELECT {columns},
+           uc.username as client_name,
+           uo.username as contractor_name{extra_columns}
+    FROM projects p
+    JOIN users uc ON p.client_id = uc.id
+    LEFT JOIN users uo ON p.contractor_id = uo.id{extra_joins}
+    WHERE {where}
+    ORDER BY {sort_key} {order}, p.id {order}
+    LIMIT %s
+"""
+
+_GET_PROJECT_WITH_CLIENT = """
+    SELECT p.*, u.username as client_name
+    FROM projects p
+    JOIN users u ON p.client_id = u.id
+    WHERE p.id = %s
+"""
+
+# 接案人的權限檢查（上傳結案檔案前確認專案指派給自己）
+_GET_PROJECT_BY_CONTRACTOR = prepared("project_by_contractor", """
+    SELECT * FROM projects
+    WHERE id = %s AND contractor_id = %s
+""")
+
+
+# get_by_id / get_project_with_client 的快取（以專案 id 為 key），專案有寫入時一併失效
+_PROJECT_CACHES = ("project", "project_with_client")
+
+
+def encode_cursor(row: dict) -> str:
+    """將 (updated_at, id) 編碼成網址安全的分頁 cursor；搜尋結果則為 (rank, id)"""
+    if "rank" in row:
+        raw = f"rank:{row['rank']!r}|{row['id']}"
+    else:
+        raw = f"{row['updated_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """解析分頁 cursor，回傳 (updated_at 或 rank, id)；格式錯誤時丟出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        key, project_id = raw.split("|")
+        if key.startswith("rank:"):
+            return float(key[len("rank:"):]), int(project_id)
+        return datetime.fromisoformat(key), int(project_id)
+    except ValueError as exc:
+        raise ValueError(f"invalid cursor: {cursor!r}") from exc
+
+
+def _build_page_query(client_id=None, contractor_id=None, status=None, exclude_status=None,
+                      min_budget=None, max_budget=None, cursor=None, direction="next",
+                      limit=20, with_deliverables=False, search=None):
+    """
+    組出分頁查詢的 SQL 與參數；多取一筆用來判斷是否還有下一頁。
+    有 search 時只取符合全文搜尋的專案，依相關度（rank, id）排序
+    """
+    if direction not in ("next", "prev"):
+        raise ValueError(f"invalid direction: {direction!r}")
+    where, params = ["TRUE"], []
+    if search is not None:
+        # JOIN 中的 %s 在 WHERE 之前
+        where.append(_SEARCH_MATCH)
+        params.append(search)
+    if client_id is not None:
+        where.append("p.client_id = %s")
+        params.append(client_id)
+    if contractor_id is not None:
+        where.append("p.contractor_id = %s")
+        params.append(contractor_id)
+    # 單一狀態以 = / <> 比對：SQLite 只有在等號條件下才會使用 projects_open_updated_idx 這類部分索引
+    if isinstance(status, str):
+        where.append("p.status = %s")
+        params.append(status)
+    elif status is not None:
+        where.append("p.status = ANY(%s)")
+        params.append(list(status))
+    if isinstance(exclude_status, str):
+        where.append("p.status <> %s")
+        params.append(exclude_status)
+    elif exclude_status is not None:
+        where.append("p.status <> ALL(%s)")
+        params.append(list(exclude_status))
+    if min_budget is not None:
+        where.append("p.budget >= %s")
+        params.append(min_budget)
+    if max_budget is not None:
+        where.append("p.budget <= %s")
+        params.append(max_budget)
+    if cursor:
+        key, project_id = decode_cursor(cursor)
+        if isinstance(key, float) != (search is not None):
+            raise ValueError(f"cursor does not match the query: {cursor!r}")
+        # 新到舊（相關度高到低）排序：下一頁取排在 cursor 之後的，上一頁取排在之前的
+        # rank 為 real，參數也轉成 real 才能與 cursor 那一筆完全相等
+        sort_expr, placeholder = ((_SEARCH_RANK, "%s::real") if search is not None
+                                  else ("p.updated_at", "%s"))
+        op = ">" if direction == "prev" else "<"
+        where.append(f"({sort_expr}, p.id) {op} ({placeholder}, %s)")
+        params.extend((key, project_id))
+    params.append(limit + 1)
+    sql = _PROJECT_PAGE.format(
+        columns=_LIST_COLUMNS,
+        extra_columns=(_SEARCH_COLUMNS if search is not None else "")
+        + (_DELIVERABLE_COLUMNS if with_deliverables else ""),
+        extra_joins=(_SEARCH_JOIN if search is not None else "")
+        + (_DELIVERABLE_JOIN if with_deliverables else ""),
+        where=" AND ".join(where),
+        sort_key="rank" if search is not None else "p.updated_at",
+        order="ASC" if direction == "prev" else "DESC",
+    )
+    return sql, params
+
+
+def _to_page(rows, limit, cursor, direction) -> dict:
+    """{"items": [...], "next_cursor": ..., "prev_cursor": ...}，items 一律由新到舊"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_more else None
+    else:
+        next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0]) if rows and cursor else None
+    return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
 
 class ProjectRepository:
     """專案資料存取層"""
-    
+
     @staticmethod
-    def get_by_client_id(client_id: int) -> List[dict]:
+    def get_by_client_id(client_id: int) -> List[Row]:
         """取得委託人的所有專案"""
         with get_db() as conn:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT p.*, u.username as contractor_name
-                FROM projects p
-                LEFT JOIN users u ON p.contractor_id = u.id
-                WHERE p.client_id = %s
-                ORDER BY p.updated_at DESC
-            """, (client_id,))
-            return cur.fetchall()
-    
+            cur = conn.cursor()
+            cur.execute(_GET_BY_CLIENT_ID, (client_id,))
+            return fetch_rows(cur)
+
     @staticmethod
     def get_by_id(project_id: int) -> Optional[dict]:
         """根據 ID 取得專案"""
+        cached = get_cache("project").get(project_id)
+        if cached is not None:
+            return dict(cached)
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT p.*, 
-                       uc.username as client_name,
-                       uo.username as contractor_name
-                FROM projects p
-                JOIN users uc ON p.client_id = uc.id
-                LEFT JOIN users uo ON p.contractor_id = uo.id
-                WHERE p.id = %s
-            """, (project_id,))
-            return cur.fetchone()
-    
+            cur.execute(_GET_BY_ID, (project_id,))
+            row = cur.fetchone()
+        if row is not None:
+            get_cache("project").set(project_id, dict(row))
+        return row
+
     @staticmethod
-    def get_available_projects() -> List[dict]:
+    def get_available_projects() -> List[Row]:
         """取得所有可接案的專案"""
         with get_db() as conn:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT p.*, u.username as client_name
-                FROM projects p
-                JOIN users u ON p.client_id = u.id
-                WHERE p.status = 'open'
-                ORDER BY p.updated_at DESC
-            """)
-            return cur.fetchall()
-    
+            cur = conn.cursor()
+            cur.execute(_GET_AVAILABLE_PROJECTS)
+            return fetch_rows(cur)
+
     @staticmethod
     def create(title: str, description: str, budget: int, client_id: int) -> int:
         """建立新專案"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO projects (title, description, budget, client_id, status, updated_at)
-                VALUES (%s, %s, %s, %s, 'open', NOW())
-                RETURNING id
-            """, (title, description, budget, client_id))
+            cur.execute(_CREATE, (title, description, budget, client_id))
             project_id = cur.fetchone()[0]
             conn.commit()
             return project_id
@@ -68,12 +310,9 @@ class ProjectRepository:
         """更新專案"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                UPDATE projects
-                SET title = %s, description = %s, budget = %s, updated_at = NOW()
-                WHERE id = %s AND client_id = %s
-            """, (title, description, budget, project_id, client_id))
+            cur.execute(_UPDATE, (title, description, budget, project_id, client_id))
             changed = cur.rowcount > 0
+            invalidate(cur, _PROJECT_CACHES, project_id)
             conn.commit()
             return changed
 
@@ -82,12 +321,9 @@ class ProjectRepository:
         """指派接案人"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                UPDATE projects
-                SET contractor_id = %s, status = 'assigned', updated_at = NOW()
-                WHERE id = %s
-            """, (contractor_id, project_id))
+            cur.execute(_ASSIGN_CONTRACTOR, (contractor_id, project_id))
             changed = cur.rowcount > 0
+            invalidate(cur, _PROJECT_CACHES, project_id)
             conn.commit()
             return changed
 
@@ -96,12 +332,9 @@ class ProjectRepository:
         """完成專案"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                UPDATE projects
-                SET status = 'completed', updated_at = NOW()
-                WHERE id = %s AND client_id = %s
-            """, (project_id, client_id))
+            cur.execute(_COMPLETE, (project_id, client_id))
             changed = cur.rowcount > 0
+            invalidate(cur, _PROJECT_CACHES, project_id)
             conn.commit()
             return changed
 
@@ -110,49 +343,207 @@ class ProjectRepository:
         """退件"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                UPDATE projects
-                SET status = 'rejected', updated_at = NOW()
-                WHERE id = %s AND client_id = %s
-            """, (project_id, client_id))
+            cur.execute(_REJECT, (project_id, client_id))
             changed = cur.rowcount > 0
+            invalidate(cur, _PROJECT_CACHES, project_id)
             conn.commit()
             return changed
 
     @staticmethod
-    def get_contractor_projects(contractor_id: int) -> List[dict]:
-        """取得接案人的所有專案"""
+    def get_contractor_projects(contractor_id: int, with_deliverables: bool = False) -> List[Row]:
+        """取得接案人的所有專案；with_deliverables=True 時附帶 has_deliverable / last_uploaded_at"""
+        sql = _GET_CONTRACTOR_PROJECTS_WITH_DELIVERABLES if with_deliverables else _GET_CONTRACTOR_PROJECTS
         with get_db() as conn:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT p.*, u.username as client_name
-                FROM projects p
-                JOIN users u ON p.client_id = u.id
-                WHERE p.contractor_id = %s
-                ORDER BY p.updated_at DESC
-            """, (contractor_id,))
-            return cur.fetchall()
+            cur = conn.cursor()
+            cur.execute(sql, (contractor_id,))
+            return fetch_rows(cur)
 
     @staticmethod
     def get_project_with_client(project_id: int) -> Optional[dict]:
         """取得專案和委託人資訊"""
+        cached = get_cache("project_with_client").get(project_id)
+        if cached is not None:
+            return dict(cached)
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT p.*, u.username as client_name
-                FROM projects p
-                JOIN users u ON p.client_id = u.id
-                WHERE p.id = %s
-            """, (project_id,))
-            return cur.fetchone()
+            cur.execute(_GET_PROJECT_WITH_CLIENT, (project_id,))
+            row = cur.fetchone()
+        if row is not None:
+            get_cache("project_with_client").set(project_id, dict(row))
+        return row
 
     @staticmethod
     def get_project_by_contractor(project_id: int, contractor_id: int) -> Optional[dict]:
         """取得接案人的特定專案"""
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("""
-                SELECT * FROM projects
-                WHERE id = %s AND contractor_id = %s
-            """, (project_id, contractor_id))
-            return cur.fetchone()
\ No newline at end of file
+            cur.execute(_GET_PROJECT_BY_CONTRACTOR, (project_id, contractor_id))
+            return cur.fetchone()
+
+    @staticmethod
+    def get_project_page(
+        client_id: Optional[int] = None,
+        contractor_id: Optional[int] = None,
+        status: Union[str, Sequence[str], None] = None,
+        exclude_status: Union[str, Sequence[str], None] = None,
+        min_budget: Optional[int] = None,
+        max_budget: Optional[int] = None,
+        cursor: Optional[str] = None,
+        direction: str = "next",
+        limit: int = 20,
+        with_deliverables: bool = False,
+        search: Optional[str] = None,
+    ) -> dict:
+        """
+        以 keyset（updated_at, id）分頁取得專案，篩選條件都在 SQL 中處理：
+        - client_id / contractor_id / status / exclude_status / min_budget / max_budget
+        - search：全文搜尋標題與描述（websearch 語法），結果依相關度排序並附 rank
+        - cursor + direction（"next" / "prev"）取得下一頁或上一頁
+        回傳 {"items": [...], "next_cursor": str | None, "prev_cursor": str | None}，
+        items 為列表欄位的 Row（說明只有 description_snippet）
+        """
+        sql, params = _build_page_query(
+            client_id, contractor_id, status, exclude_status,
+            min_budget, max_budget, cursor, direction, limit, with_deliverables, search,
+        )
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            return _to_page(fetch_rows(cur), limit, cursor, direction)
+
+
+class AsyncProjectRepository:
+    """專案資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def get_by_client_id(client_id: int) -> List[Row]:
+        """取得委託人的所有專案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_GET_BY_CLIENT_ID, (client_id,))
+            return await afetch_rows(cur)
+
+    @staticmethod
+    async def get_by_id(project_id: int) -> Optional[dict]:
+        """根據 ID 取得專案"""
+        cached = get_cache("project").get(project_id)
+        if cached is not None:
+            return dict(cached)
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_BY_ID, (project_id,))
+            row = await cur.fetchone()
+        if row is not None:
+            get_cache("project").set(project_id, dict(row))
+        return row
+
+    @staticmethod
+    async def get_available_projects() -> List[Row]:
+        """取得所有可接案的專案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_GET_AVAILABLE_PROJECTS)
+            return await afetch_rows(cur)
+
+    @staticmethod
+    async def create(title: str, description: str, budget: int, client_id: int) -> int:
+        """建立新專案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CREATE, (title, description, budget, client_id))
+            return (await cur.fetchone())[0]
+
+    @staticmethod
+    async def update(project_id: int, title: str, description: str, budget: int, client_id: int) -> bool:
+        """更新專案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_UPDATE, (title, description, budget, project_id, client_id))
+            changed = cur.rowcount > 0
+            await ainvalidate(cur, _PROJECT_CACHES, project_id)
+            return changed
+
+    @staticmethod
+    async def assign_contractor(project_id: int, contractor_id: int) -> bool:
+        """指派接案人"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_ASSIGN_CONTRACTOR, (contractor_id, project_id))
+            changed = cur.rowcount > 0
+            await ainvalidate(cur, _PROJECT_CACHES, project_id)
+            return changed
+
+    @staticmethod
+    async def complete(project_id: int, client_id: int) -> bool:
+        """完成專案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_COMPLETE, (project_id, client_id))
+            changed = cur.rowcount > 0
+            await ainvalidate(cur, _PROJECT_CACHES, project_id)
+            return changed
+
+    @staticmethod
+    async def reject(project_id: int, client_id: int) -> bool:
+        """退件"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_REJECT, (project_id, client_id))
+            changed = cur.rowcount > 0
+            await ainvalidate(cur, _PROJECT_CACHES, project_id)
+            return changed
+
+    @staticmethod
+    async def get_contractor_projects(contractor_id: int, with_deliverables: bool = False) -> List[Row]:
+        """取得接案人的所有專案；with_deliverables=True 時附帶 has_deliverable / last_uploaded_at"""
+        sql = _GET_CONTRACTOR_PROJECTS_WITH_DELIVERABLES if with_deliverables else _GET_CONTRACTOR_PROJECTS
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(sql, (contractor_id,))
+            return await afetch_rows(cur)
+
+    @staticmethod
+    async def get_project_with_client(project_id: int) -> Optional[dict]:
+        """取得專案和委託人資訊"""
+        cached = get_cache("project_with_client").get(project_id)
+        if cached is not None:
+            return dict(cached)
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_PROJECT_WITH_CLIENT, (project_id,))
+            row = await cur.fetchone()
+        if row is not None:
+            get_cache("project_with_client").set(project_id, dict(row))
+        return row
+
+    @staticmethod
+    async def get_project_by_contractor(project_id: int, contractor_id: int) -> Optional[dict]:
+        """取得接案人的特定專案"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_PROJECT_BY_CONTRACTOR, (project_id, contractor_id))
+            return await cur.fetchone()
+
+    @staticmethod
+    async def get_project_page(
+        client_id: Optional[int] = None,
+        contractor_id: Optional[int] = None,
+        status: Union[str, Sequence[str], None] = None,
+        exclude_status: Union[str, Sequence[str], None] = None,
+        min_budget: Optional[int] = None,
+        max_budget: Optional[int] = None,
+        cursor: Optional[str] = None,
+        direction: str = "next",
+        limit: int = 20,
+        with_deliverables: bool = False,
+        search: Optional[str] = None,
+    ) -> dict:
+        """以 keyset 分頁取得專案，參數與回傳格式同 ProjectRepository.get_project_page"""
+        sql, params = _build_page_query(
+            client_id, contractor_id, status, exclude_status,
+            min_budget, max_budget, cursor, direction, limit, with_deliverables, search,
+        )
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(sql, params)
+            return _to_page(await afetch_rows(cur), limit, cursor, direction)
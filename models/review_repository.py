@@ -1,5 +1,138 @@
-from db import get_db
+from db import get_db, get_async_db
+from psycopg.rows import dict_row
 from psycopg2.extras import RealDictCursor
+from events import publish, apublish
+from sqlite_backend import register
+from statements import prepared
+
+# 同步與非同步版本共用的 SQL
+# 新增評價並在同一個語句內累加 user_rating_summary（平均值為 generated column）
+_CREATE_REVIEW = """
+    WITH new_review AS (
+        INSERT INTO reviews
+            (project_id, reviewer_id, target_id, dim1, dim2, dim3, comment)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING target_id, dim1, dim2, dim3
+    )
+    INSERT INTO user_rating_summary AS s
+        (user_id, review_count, sum_dim1, sum_dim2, sum_dim3, updated_at)
+    SELECT target_id, 1, dim1, dim2, dim3, NOW()
+    FROM new_review
+    ON CONFLICT (user_id) DO UPDATE
+    SET review_count = s.review_count + 1,
+        sum_dim1 = s.sum_dim1 + EXCLUDED.sum_dim1,
+        sum_dim2 = s.sum_dim2 + EXCLUDED.sum_dim2,
+        sum_dim3 = s.sum_dim3 + EXCLUDED.sum_dim3,
+        updated_at = NOW()
+"""
+
+
+# SQLite 沒有會寫入資料的 CTE：分成兩個語句（同一個交易）
+@register(_CREATE_REVIEW)
+def _create_review_sqlite(cur, params):
+    target_id, dim1, dim2, dim3 = params[2:6]
+    cur.execute("""
+        INSERT INTO reviews
+            (project_id, reviewer_id, target_id, dim1, dim2, dim3, comment)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, params)
+    cur.execute("""
+        INSERT INTO user_rating_summary AS s
+            (user_id, review_count, sum_dim1, sum_dim2, sum_dim3, updated_at)
+        VALUES (%s, 1, %s, %s, %s, NOW())
+        ON CONFLICT (user_id) DO UPDATE
+        SET review_count = s.review_count + 1,
+            sum_dim1 = s.sum_dim1 + EXCLUDED.sum_dim1,
+            sum_dim2 = s.sum_dim2 + EXCLUDED.sum_dim2,
+            sum_dim3 = s.sum_dim3 + EXCLUDED.sum_dim3,
+            updated_at = NOW()
+    """, (target_id, dim1, dim2, dim3))
+
+
+# 專案詳情 / 結案檔案頁面每次都會檢查（預備語句，見 statements.py）
+_HAS_REVIEWED = prepared("has_reviewed", """
+    SELECT 1
+    FROM reviews
+    WHERE project_id = %s AND reviewer_id = %s
+    LIMIT 1
+""")
+
+_GET_REVIEWS_FOR_USER = """
+    SELECT r.*, u.username AS reviewer_name
+    FROM reviews r
+    JOIN users u ON r.reviewer_id = u.id
+    WHERE r.target_id = %s
+    ORDER BY r.created_at DESC
+"""
+
+# 評分摘要直接以主鍵查詢 user_rating_summary，不再每次 AVG() 全部評價
+_GET_USER_AVG_SCORES = prepared("user_avg_scores", """
+    SELECT avg_dim1, avg_dim2, avg_dim3, review_count
+    FROM user_rating_summary
+    WHERE user_id = %s
+""")
+
+_GET_AVG_SCORES_FOR_USERS = prepared("avg_scores_for_users", """
+    SELECT user_id AS target_id, avg_dim1, avg_dim2, avg_dim3, review_count
+    FROM user_rating_summary
+    WHERE user_id = ANY(%s)
+""")
+
+# 由 reviews 重建整張摘要表（鎖住 reviews 避免重建期間有新評價寫入）
+_REBUILD_RATING_SUMMARY = (
+    "LOCK TABLE reviews IN SHARE MODE",
+    "DELETE FROM user_rating_summary",
+    """
+    INSERT INTO user_rating_summary
+        (user_id, review_count, sum_dim1, sum_dim2, sum_dim3, updated_at)
+    SELECT target_id, COUNT(*), SUM(dim1), SUM(dim2), SUM(dim3), NOW()
+    FROM reviews
+    GROUP BY target_id
+    """,
+)
+
+# 每位被評價者最多取 limit_per_user 筆（NULL 表示不限）
+_GET_REVIEWS_FOR_USERS = """
+    SELECT *
+    FROM (
+        SELECT r.*, u.username AS reviewer_name,
+               ROW_NUMBER() OVER (PARTITION BY r.target_id ORDER BY r.created_at DESC) AS rn
+        FROM reviews r
+        JOIN users u ON r.reviewer_id = u.id
+        WHERE r.target_id = ANY(%s)
+    ) t
+    WHERE %s::int IS NULL OR t.rn <= %s::int
+    ORDER BY t.target_id, t.created_at DESC
+"""
+
+
+def _with_overall_avg(row):
+    """補上 overall_avg；沒有評價時回傳 None"""
+    if not row or row["review_count"] == 0:
+        return None
+
+    avg1 = float(row["avg_dim1"])
+    avg2 = float(row["avg_dim2"])
+    avg3 = float(row["avg_dim3"])
+    row["overall_avg"] = round((avg1 + avg2 + avg3) / 3.0, 2)
+    return row
+
+
+def _avg_scores_by_user(rows):
+    """{target_id: 平均分數}；沒有評價的使用者不會出現在結果中"""
+    result = {}
+    for row in rows:
+        result[row.pop("target_id")] = _with_overall_avg(row)
+    return result
+
+
+def _reviews_by_user(user_ids, rows):
+    """{target_id: [評價...]}；每個查詢的使用者都有一個（可能為空的）列表"""
+    result = {uid: [] for uid in user_ids}
+    for row in rows:
+        row.pop("rn", None)
+        result.setdefault(row["target_id"], []).append(row)
+    return result
 
 
 class ReviewRepository:
@@ -10,28 +143,17 @@ class ReviewRepository:
         with get_db() as conn:
             cur = conn.cursor()
             cur.execute(
-                """
-                INSERT INTO reviews
-                    (project_id, reviewer_id, target_id, dim1, dim2, dim3, comment)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
+                _CREATE_REVIEW,
                 (project_id, reviewer_id, target_id, dim1, dim2, dim3, comment),
             )
+            publish(cur, "review_received", [target_id], project_id=project_id)
 
     @staticmethod
     def has_reviewed(project_id, reviewer_id) -> bool:
         """同一個人對同一個專案是否已經評價過"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT 1
-                FROM reviews
-                WHERE project_id = %s AND reviewer_id = %s
-                LIMIT 1
-                """,
-                (project_id, reviewer_id),
-            )
+            cur.execute(_HAS_REVIEWED, (project_id, reviewer_id))
             return cur.fetchone() is not None
 
     @staticmethod
@@ -39,16 +161,7 @@ class ReviewRepository:
         """取得某個被評價對象收到的所有評價（含評價者名稱）"""
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(
-                """
-                SELECT r.*, u.username AS reviewer_name
-                FROM reviews r
-                JOIN users u ON r.reviewer_id = u.id
-                WHERE r.target_id = %s
-                ORDER BY r.created_at DESC
-                """,
-                (user_id,),
-            )
+            cur.execute(_GET_REVIEWS_FOR_USER, (user_id,))
             return cur.fetchall()
 
     @staticmethod
@@ -62,25 +175,97 @@ class ReviewRepository:
         """
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(
-                """
-                SELECT
-                    AVG(dim1)::numeric(10,2) AS avg_dim1,
-                    AVG(dim2)::numeric(10,2) AS avg_dim2,
-                    AVG(dim3)::numeric(10,2) AS avg_dim3,
-                    COUNT(*)                AS review_count
-                FROM reviews
-                WHERE target_id = %s
-                """,
-                (user_id,),
+            cur.execute(_GET_USER_AVG_SCORES, (user_id,))
+            return _with_overall_avg(cur.fetchone())
+
+    @staticmethod
+    def get_avg_scores_for_users(user_ids) -> dict:
+        """一次取得多位使用者的平均分數：{user_id: 同 get_user_avg_scores 的格式}"""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+        with get_db() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(_GET_AVG_SCORES_FOR_USERS, (user_ids,))
+            return _avg_scores_by_user(cur.fetchall())
+
+    @staticmethod
+    def get_reviews_for_users(user_ids, limit_per_user=None) -> dict:
+        """一次取得多位使用者收到的評價：{user_id: [評價...]}，每人最多 limit_per_user 筆"""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+        with get_db() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(_GET_REVIEWS_FOR_USERS, (user_ids, limit_per_user, limit_per_user))
+            return _reviews_by_user(user_ids, cur.fetchall())
+
+    @staticmethod
+    def rebuild_rating_summary() -> int:
+        """由 reviews 重新計算 user_rating_summary，回傳重建的使用者數"""
+        with get_db() as conn:
+            cur = conn.cursor()
+            for sql in _REBUILD_RATING_SUMMARY:
+                cur.execute(sql)
+            return cur.rowcount
+
+
+class AsyncReviewRepository:
+    """評價資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def create_review(project_id, reviewer_id, target_id, dim1, dim2, dim3, comment):
+        """新增一筆評價"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(
+                _CREATE_REVIEW,
+                (project_id, reviewer_id, target_id, dim1, dim2, dim3, comment),
             )
-            row = cur.fetchone()
+            await apublish(cur, "review_received", [target_id], project_id=project_id)
 
-            if not row or row["review_count"] == 0:
-                return None
+    @staticmethod
+    async def has_reviewed(project_id, reviewer_id) -> bool:
+        """同一個人對同一個專案是否已經評價過"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_HAS_REVIEWED, (project_id, reviewer_id))
+            return await cur.fetchone() is not None
 
-            avg1 = float(row["avg_dim1"])
-            avg2 = float(row["avg_dim2"])
-            avg3 = float(row["avg_dim3"])
-            row["overall_avg"] = round((avg1 + avg2 + avg3) / 3.0, 2)
-            return row
+    @staticmethod
+    async def get_reviews_for_user(user_id):
+        """取得某個被評價對象收到的所有評價（含評價者名稱）"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_REVIEWS_FOR_USER, (user_id,))
+            return await cur.fetchall()
+
+    @staticmethod
+    async def get_user_avg_scores(user_id):
+        """取得某個被評價對象的平均分數，格式同 ReviewRepository.get_user_avg_scores"""
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_USER_AVG_SCORES, (user_id,))
+            return _with_overall_avg(await cur.fetchone())
+
+    @staticmethod
+    async def get_avg_scores_for_users(user_ids) -> dict:
+        """一次取得多位使用者的平均分數：{user_id: 同 get_user_avg_scores 的格式}"""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_AVG_SCORES_FOR_USERS, (user_ids,))
+            return _avg_scores_by_user(await cur.fetchall())
+
+    @staticmethod
+    async def get_reviews_for_users(user_ids, limit_per_user=None) -> dict:
+        """一次取得多位使用者收到的評價：{user_id: [評價...]}，每人最多 limit_per_user 筆"""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_REVIEWS_FOR_USERS, (user_ids, limit_per_user, limit_per_user))
+            return _reviews_by_user(user_ids, await cur.fetchall())
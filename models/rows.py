@@ -0,0 +1,90 @@
+# 列表查詢的資料列：以 cursor 回傳的 tuple 為內容、只有 __slots__ 的物件，
+# 不像 RealDictCursor / dict_row 每一列建一個 dict。欄位依 cursor.description 決定，同一組欄位只建立一次類別；
+# 樣板以屬性（row.title）、路由以 row["title"] 讀取（Jinja2 找不到屬性時同樣改用 row["..."]）
+from functools import lru_cache
+
+
+class Row:
+    """
+    唯讀的資料列；extra 欄位（row_type 的 extra，例如路由另外附加的評價）可以
+    row["rating"] = ... 設定，其他欄位不能修改
+    """
+
+    __slots__ = ("_values",)
+    _fields = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = values
+
+    def __getitem__(self, key):
+        index = self._index.get(key)
+        if index is not None:
+            return self._values[index]
+        if key in self.__slots__ and hasattr(self, key):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise TypeError(f"row field {key!r} is read-only")
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self._index or (key in self.__slots__ and hasattr(self, key))
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self._fields
+
+    def _asdict(self) -> dict:
+        data = dict(zip(self._fields, self._values))
+        data.update((name, getattr(self, name)) for name in self.__slots__ if hasattr(self, name))
+        return data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._asdict()!r})"
+
+
+def _getter(index):
+    return property(lambda self: self._values[index])
+
+
+@lru_cache(maxsize=None)
+def row_type(fields: tuple, extra: tuple = ()) -> type:
+    """欄位為 fields 的資料列類別；extra 為可另外設定的欄位"""
+    namespace = {
+        "__slots__": extra,
+        "_fields": fields,
+        "_index": {name: i for i, name in enumerate(fields)},
+    }
+    for i, name in enumerate(fields):
+        namespace[name] = _getter(i)
+    return type("Row", (Row,), namespace)
+
+
+def _row_type(cursor, extra) -> type:
+    return row_type(tuple(column.name for column in cursor.description), tuple(extra))
+
+
+def fetch_rows(cursor, extra=()) -> list:
+    """以 Row 取得 cursor（tuple 資料列）剩下的所有資料列"""
+    rows = cursor.fetchall()
+    return list(map(_row_type(cursor, extra), rows))
+
+
+async def afetch_rows(cursor, extra=()) -> list:
+    """fetch_rows 的非同步版"""
+    rows = await cursor.fetchall()
+    return list(map(_row_type(cursor, extra), rows))
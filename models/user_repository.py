@@ -1,28 +1,74 @@
 from typing import Optional
+from psycopg.rows import dict_row
 from psycopg2.extras import RealDictCursor
-from db import get_db
+from db import get_db, get_async_db
+from cache import get_cache, invalidate, ainvalidate
+
+# 同步與非同步版本共用的 SQL
+_GET_BY_USERNAME = "SELECT * FROM users WHERE username = %s"
+
+_CREATE = """
+    INSERT INTO users (username, password, role, created_at)
+    VALUES (%s, %s, %s, NOW())
+    RETURNING id
+"""
+
+# get_by_username 的快取（以使用者名稱為 key）
+_USER_CACHES = ("user",)
+
 
 class UserRepository:
     """使用者資料存取層"""
-    
+
     @staticmethod
     def get_by_username(username: str) -> Optional[dict]:
         """根據用戶名取得用戶"""
+        cached = get_cache("user").get(username)
+        if cached is not None:
+            return dict(cached)
         with get_db() as conn:
             cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("SELECT * FROM users WHERE username = %s", (username,))
-            return cur.fetchone()
-    
+            cur.execute(_GET_BY_USERNAME, (username,))
+            row = cur.fetchone()
+        if row is not None:
+            get_cache("user").set(username, dict(row))
+        return row
+
     @staticmethod
     def create(username: str, password: str, role: str) -> int:
         """創建新用戶"""
         with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO users (username, password, role, created_at)
-                VALUES (%s, %s, %s, NOW())
-                RETURNING id
-            """, (username, password, role))
+            cur.execute(_CREATE, (username, password, role))
             user_id = cur.fetchone()[0]
+            invalidate(cur, _USER_CACHES, username)
             conn.commit()
-            return user_id
\ No newline at end of file
+            return user_id
+
+
+class AsyncUserRepository:
+    """使用者資料存取層（非同步版，供 async 路由使用）"""
+
+    @staticmethod
+    async def get_by_username(username: str) -> Optional[dict]:
+        """根據用戶名取得用戶"""
+        cached = get_cache("user").get(username)
+        if cached is not None:
+            return dict(cached)
+        async with get_async_db() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(_GET_BY_USERNAME, (username,))
+            row = await cur.fetchone()
+        if row is not None:
+            get_cache("user").set(username, dict(row))
+        return row
+
+    @staticmethod
+    async def create(username: str, password: str, role: str) -> int:
+        """創建新用戶"""
+        async with get_async_db() as conn:
+            cur = conn.cursor()
+            await cur.execute(_CREATE, (username, password, role))
+            user_id = (await cur.fetchone())[0]
+            await ainvalidate(cur, _USER_CACHES, username)
+            return user_id
@@ -0,0 +1,207 @@
+# plan_check.py
+# 查詢計畫回歸檢查：對 models/* 的每個 SQL 常數執行 EXPLAIN，
+# 若在大型資料表上出現 Seq Scan 就視為失敗（python manage.py check-plans）
+import importlib
+import pkgutil
+
+import models
+from db import get_db
+from models.import_repository import _CREATE_BID_STAGING, _CREATE_PROJECT_STAGING
+from models.project_repository import _build_page_query, encode_cursor
+from seed import vacuum_analyze
+
+# 資料列數（pg_class.reltuples）超過此值的資料表不允許 Seq Scan
+LARGE_TABLE_ROWS = 10000
+
+def _export_sample(s, status):
+    """匯出路由的參數：只匯出與某位使用者有關、指定日期之後的資料"""
+    return {"status": status, "date_from": "2000-01-01", "date_to": None, "user_id": s["client_id"]}
+
+
+# 每個查詢的樣本參數；s 為 sample_values() 的結果
+PARAMS = {
+    "models.bid_repository._GET_BY_PROJECT_ID": lambda s: (s["project_id"],),
+    "models.bid_repository._GET_BY_ID": lambda s: (s["bid_id"],),
+    "models.bid_repository._CREATE": lambda s: (s["project_id"], s["contractor_id"], 100, "plan check"),
+    "models.bid_repository._ACCEPT_BID": lambda s: (s["bid_id"], s["client_id"]),
+    "models.bid_repository._GET_CONTRACTOR_BID": lambda s: (s["project_id"], s["contractor_id"]),
+    "models.bid_repository._GET_REJECTED_CONTRACTORS": lambda s: (s["project_id"], s["contractor_id"]),
+    "models.deliverable_repository._GET_BY_PROJECT_ID": lambda s: (s["project_id"],),
+    "models.deliverable_repository._GET_WITH_PROJECT": lambda s: (s["deliverable_id"],),
+    "models.deliverable_repository._CREATE": lambda s: ("0" * 64, 1, "0" * 64, s["project_id"], "a.zip",
+                                                         "uploads/a.zip", "plan check", 1, "0" * 64),
+    "models.deliverable_repository._DELETE_BY_PROJECT_ID": lambda s: (s["project_id"],),
+    "models.blob_repository._DELETE_UNREFERENCED": lambda s: (3600,),
+    "models.blob_repository._GET_UNREFERENCED": lambda s: (3600,),
+    "models.blob_repository._GET_KNOWN": lambda s: (["0" * 64],),
+    "models.blob_repository._GET_REFERENCED_PATHS": lambda s: (["uploads/seed.zip"],),
+    "models.freshness_repository._CLIENT_DASHBOARD": lambda s: (s["client_id"],),
+    "models.freshness_repository._CONTRACTOR_DASHBOARD": lambda s: (s["contractor_id"],),
+    "models.freshness_repository._CONTRACTOR_PROJECT": lambda s: (s["contractor_id"], s["project_id"]),
+    "models.freshness_repository._CLIENT_DELIVERABLE": lambda s: (s["project_id"], s["client_id"]),
+    "models.export_repository._EXPORT_PROJECTS": lambda s: _export_sample(s, ["open"]),
+    "models.export_repository._EXPORT_BIDS": lambda s: _export_sample(s, ["pending"]),
+    "models.export_repository._EXPORT_DELIVERABLES": lambda s: _export_sample(s, None),
+    "models.export_repository._EXPORT_REVIEWS": lambda s: _export_sample(s, ["completed"]),
+    "models.project_repository._GET_BY_CLIENT_ID": lambda s: (s["client_id"],),
+    "models.project_repository._GET_BY_ID": lambda s: (s["project_id"],),
+    "models.project_repository._GET_AVAILABLE_PROJECTS": lambda s: (),
+    "models.project_repository._CREATE": lambda s: ("plan check", "plan check", 100, s["client_id"]),
+    "models.project_repository._UPDATE": lambda s: ("plan check", "plan check", 100, s["project_id"], s["client_id"]),
+    "models.project_repository._ASSIGN_CONTRACTOR": lambda s: (s["contractor_id"], s["project_id"]),
+    "models.project_repository._COMPLETE": lambda s: (s["project_id"], s["client_id"]),
+    "models.project_repository._REJECT": lambda s: (s["project_id"], s["client_id"]),
+    "models.project_repository._GET_CONTRACTOR_PROJECTS": lambda s: (s["contractor_id"],),
+    "models.project_repository._GET_CONTRACTOR_PROJECTS_WITH_DELIVERABLES": lambda s: (s["contractor_id"],),
+    "models.project_repository._GET_PROJECT_WITH_CLIENT": lambda s: (s["project_id"],),
+    "models.project_repository._GET_PROJECT_BY_CONTRACTOR": lambda s: (s["project_id"], s["contractor_id"]),
+    "models.import_repository._MERGE_PROJECTS": lambda s: (s["client_id"],),
+    "models.import_repository._BID_IMPORT_ERRORS": lambda s: (s["contractor_id"], 100),
+    "models.import_repository._MERGE_BIDS": lambda s: (s["contractor_id"],),
+    "models.import_repository._IMPORTED_BID_PROJECTS": lambda s: (),
+    "models.review_repository._CREATE_REVIEW": lambda s: (s["project_id"], s["client_id"], s["contractor_id"], 5, 5, 5, "plan check"),
+    "models.review_repository._HAS_REVIEWED": lambda s: (s["project_id"], s["client_id"]),
+    "models.review_repository._GET_REVIEWS_FOR_USER": lambda s: (s["contractor_id"],),
+    "models.review_repository._GET_USER_AVG_SCORES": lambda s: (s["contractor_id"],),
+    "models.review_repository._GET_AVG_SCORES_FOR_USERS": lambda s: (s["user_ids"],),
+    "models.review_repository._GET_REVIEWS_FOR_USERS": lambda s: (s["user_ids"], 20, 20),
+    "models.user_repository._GET_BY_USERNAME": lambda s: (s["username"],),
+    "models.user_repository._CREATE": lambda s: ("plan_check_user", "p", "client"),
+}
+
+# 由函式組出的查詢：{SQL 樣板: [(名稱, 產生 (sql, params) 的函式)]}
+DERIVED = {
+    "models.project_repository._PROJECT_PAGE": [
+        ("client dashboard", lambda s: _build_page_query(client_id=s["client_id"], exclude_status="completed")),
+        ("client completed, next page", lambda s: _build_page_query(
+            client_id=s["client_id"], status="completed", cursor=s["cursor"])),
+        ("contractor dashboard", lambda s: _build_page_query(
+            contractor_id=s["contractor_id"], exclude_status="completed", with_deliverables=True)),
+        ("open feed", lambda s: _build_page_query(status="open")),
+        ("open feed, budget filter, prev page", lambda s: _build_page_query(
+            status="open", min_budget=1000, max_budget=20000, cursor=s["cursor"], direction="prev")),
+        ("open feed, client filter", lambda s: _build_page_query(status="open", client_id=s["client_id"])),
+        ("open feed, search", lambda s: _build_page_query(status="open", search="4240")),
+        ("open feed, search + budget, next page", lambda s: _build_page_query(
+            status="open", min_budget=1000, max_budget=20000, search="project 4240", cursor=s["search_cursor"])),
+    ],
+}
+
+# 允許 Seq Scan 的查詢與原因
+ALLOW_SEQ_SCAN = {
+    "models.import_repository._BID_IMPORT_ERRORS": "暫存表可能有數萬列，以 hash join 掃描一次 projects；筆數少時（已 ANALYZE）改用索引",
+    "models.project_repository._GET_AVAILABLE_PROJECTS": "未分頁的舊列表（同步版保留給腳本），路由已改用 get_project_page",
+}
+
+
+def discover_queries() -> dict:
+    """{"模組._常數": sql}：models/* 中所有模組層級的 SQL 常數"""
+    queries = {}
+    for info in pkgutil.iter_modules(models.__path__):
+        module = importlib.import_module(f"models.{info.name}")
+        for name, value in vars(module).items():
+            if not name.startswith("_") or not isinstance(value, str):
+                continue
+            words = value.split(None, 1)
+            if words and words[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+                queries[f"{module.__name__}.{name}"] = value
+    return queries
+
+
+def sample_values(cur) -> dict:
+    """從資料庫挑出查詢用的樣本 id（投標最多的專案、其委託人與投標者等）"""
+    cur.execute("""
+        SELECT b.project_id, p.client_id, MIN(b.id)
+        FROM bids b JOIN projects p ON b.project_id = p.id
+        GROUP BY b.project_id, p.client_id
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+    """)
+    row = cur.fetchone()
+    if row is None:
+        raise RuntimeError("database has no bids; run `python manage.py seed` first")
+    project_id, client_id, bid_id = row
+    cur.execute("""
+        SELECT contractor_id FROM projects
+        WHERE contractor_id IS NOT NULL
+        GROUP BY contractor_id
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+    """)
+    contractor_id = cur.fetchone()[0]
+    cur.execute("SELECT DISTINCT contractor_id FROM bids WHERE project_id = %s", (project_id,))
+    user_ids = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT username FROM users WHERE id = %s", (client_id,))
+    username = cur.fetchone()[0]
+    cur.execute("SELECT MAX(id) FROM deliverables")
+    deliverable_id = cur.fetchone()[0]
+    cur.execute("SELECT id, updated_at FROM projects ORDER BY updated_at DESC, id DESC OFFSET 100 LIMIT 1")
+    pid, updated_at = cur.fetchone()
+    return {
+        "project_id": project_id,
+        "client_id": client_id,
+        "bid_id": bid_id,
+        "deliverable_id": deliverable_id,
+        "contractor_id": contractor_id,
+        "user_ids": user_ids,
+        "username": username,
+        "cursor": encode_cursor({"id": pid, "updated_at": updated_at}),
+        "search_cursor": encode_cursor({"id": pid, "rank": 0.1}),
+    }
+
+
+def _seq_scans(plan):
+    """走訪計畫樹，回傳所有 Seq Scan 的資料表名稱"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def check_plans(threshold: int = LARGE_TABLE_ROWS):
+    """
+    對每個查詢執行 EXPLAIN。
+    回傳 (results, problems)：results 為 [(名稱, 狀態說明)]，problems 為失敗的說明列表；
+    沒有樣本參數的 SQL 常數也會列為失敗，新增查詢時必須一併加入 PARAMS / DERIVED。
+    """
+    queries = discover_queries()
+    results, problems = [], []
+    # 統計資訊與 GIN pending list 先更新，結果不受之前寫入的資料影響
+    vacuum_analyze()
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT relname, reltuples FROM pg_class
+            WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace
+        """)
+        table_rows = dict(cur.fetchall())
+        s = sample_values(cur)
+        # 匯入的暫存表（結束時 rollback 一併刪除）
+        cur.execute(_CREATE_PROJECT_STAGING)
+        cur.execute(_CREATE_BID_STAGING)
+
+        cases = []
+        for key, sql in sorted(queries.items()):
+            if key in PARAMS:
+                cases.append((key, sql, PARAMS[key](s)))
+            elif key in DERIVED:
+                for label, build in DERIVED[key]:
+                    cases.append((f"{key} [{label}]", *build(s)))
+            else:
+                problems.append(f"{key}: no sample parameters in plan_check.PARAMS / DERIVED")
+
+        for name, sql, params in cases:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cur.fetchone()[0][0]["Plan"]
+            big = sorted({t for t in _seq_scans(plan) if table_rows.get(t, 0) >= threshold})
+            base = name.split(" [")[0]
+            if big and base in ALLOW_SEQ_SCAN:
+                results.append((name, f"allowed seq scan on {', '.join(big)} ({ALLOW_SEQ_SCAN[base]})"))
+            elif big:
+                detail = ", ".join(f"{t} (~{int(table_rows[t])} rows)" for t in big)
+                results.append((name, f"SEQ SCAN on {detail}"))
+                problems.append(f"{name}: seq scan on {detail}")
+            else:
+                results.append((name, f"ok ({plan['Node Type']}, cost {plan['Total Cost']})"))
+        conn.rollback()
+    return results, problems
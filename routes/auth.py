@@ -1,24 +1,27 @@
-from fastapi import APIRouter, Request, Form, HTTPException
+from fastapi import APIRouter, Request, Form, HTTPException, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sql_repository import UserRepository
+from sql_repository import AsyncUserRepository as UserRepository
+from db import AsyncUnitOfWork
+from templating import templates
+from .dependencies import get_unit_of_work
 
-router = APIRouter(tags=["auth"])
+router = APIRouter(tags=["auth"], dependencies=[Depends(get_unit_of_work)])
 
-templates = Jinja2Templates(directory="templates")
 
 @router.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     return templates.TemplateResponse("register.html", {"request": request})
 
 @router.post("/register")
-async def register(request: Request, username: str = Form(...), password: str = Form(...), role: str = Form(...)):
-    if UserRepository.get_by_username(username):
+async def register(request: Request, username: str = Form(...), password: str = Form(...), role: str = Form(...),
+                   uow: AsyncUnitOfWork = Depends(get_unit_of_work)):
+    if await UserRepository.get_by_username(username):
         return templates.TemplateResponse("register.html", {
             "request": request,
             "error": "用戶名已存在"
         })
-    UserRepository.create(username, password, role)
+    await UserRepository.create(username, password, role)
+    await uow.commit()
     return RedirectResponse("/login", status_code=303)
 
 @router.get("/login", response_class=HTMLResponse)
@@ -27,7 +30,7 @@ async def login_page(request: Request):
 
 @router.post("/login")
 async def login(request: Request, username: str = Form(...), password: str = Form(...)):
-    user = UserRepository.get_by_username(username)
+    user = await UserRepository.get_by_username(username)
     if not user:
         return templates.TemplateResponse("login.html", {
             "request": request,
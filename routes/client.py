@@ -2,15 +2,31 @@
 
 from fastapi import APIRouter, Request, Depends, HTTPException, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 
-from sql_repository import ProjectRepository, BidRepository, DeliverableRepository
-from models.review_repository import ReviewRepository
-from .dependencies import require_auth
+from sql_repository import (
+    AsyncProjectRepository as ProjectRepository,
+    AsyncBidRepository as BidRepository,
+    AsyncDeliverableRepository as DeliverableRepository,
+)
+from models.review_repository import AsyncReviewRepository as ReviewRepository
+from models.bid_repository import CONFLICT
+from models.freshness_repository import AsyncFreshnessRepository as FreshnessRepository
+from db import AsyncUnitOfWork
+from templating import templates
+from .dependencies import require_auth, get_unit_of_work
+from .conditional import PageValidator
+from .pagination import fetch_project_page, query_int
 
 
-router = APIRouter(prefix="/client", tags=["client"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(prefix="/client", tags=["client"], dependencies=[Depends(get_unit_of_work)])
+
+# 投標列表每位承包者最多顯示的評論數
+BID_REVIEWS_PER_CONTRACTOR = 20
+
+# 投標列表的錯誤訊息（接受投標失敗時以 ?error= 導回列表）
+BID_LIST_ERRORS = {
+    "not_open": "專案已不是開放狀態，無法接受此投標",
+}
 
 
 # --------------------------------------------
@@ -21,13 +37,37 @@ async def client_dashboard(request: Request, user: dict = Depends(require_auth))
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    projects_all = ProjectRepository.get_by_client_id(user["user_id"])
-    active_projects = [p for p in projects_all if p["status"] != "completed"]
+    # 自己的專案都沒有變動時直接回 304
+    validator = PageValidator(request, user, await FreshnessRepository.client_dashboard(user["user_id"]))
+    not_modified = validator.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+
+    # 狀態與預算篩選在 SQL 中處理，每次只取一頁
+    status = request.query_params.get("status") or None
+    min_budget = query_int(request, "min_budget")
+    max_budget = query_int(request, "max_budget")
+    page = await fetch_project_page(
+        request,
+        client_id=user["user_id"],
+        status=status,
+        exclude_status=None if status else "completed",
+        min_budget=min_budget,
+        max_budget=max_budget,
+    )
 
-    return templates.TemplateResponse(
+    return validator.apply(templates.TemplateResponse(
         "client_dashboard.html",
-        {"request": request, "user": user, "projects": active_projects},
-    )
+        {
+            "request": request,
+            "user": user,
+            "projects": page["items"],
+            "page": page,
+            "status": status,
+            "min_budget": min_budget,
+            "max_budget": max_budget,
+        },
+    ))
 
 
 # --------------------------------------------
@@ -38,12 +78,11 @@ async def client_completed_projects(request: Request, user: dict = Depends(requi
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    projects = ProjectRepository.get_by_client_id(user["user_id"])
-    completed = [p for p in projects if p["status"] == "completed"]
+    page = await fetch_project_page(request, client_id=user["user_id"], status="completed")
 
     return templates.TemplateResponse(
         "client_completed.html",
-        {"request": request, "user": user, "completed_projects": completed},
+        {"request": request, "user": user, "completed_projects": page["items"], "page": page},
     )
 
 
@@ -71,11 +110,13 @@ async def create_project(
     description: str = Form(...),
     budget: int = Form(...),
     user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
 ):
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    ProjectRepository.create(title, description, budget, user["user_id"])
+    await ProjectRepository.create(title, description, budget, user["user_id"])
+    await uow.commit()
     return RedirectResponse("/client/dashboard", status_code=303)
 
 
@@ -87,7 +128,7 @@ async def edit_project_page(request: Request, project_id: int, user: dict = Depe
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    project = ProjectRepository.get_by_id(project_id)
+    project = await ProjectRepository.get_by_id(project_id)
     if not project or project["client_id"] != user["user_id"]:
         raise HTTPException(status_code=404)
 
@@ -108,11 +149,13 @@ async def update_project(
     description: str = Form(...),
     budget: int = Form(...),
     user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
 ):
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    ProjectRepository.update(project_id, title, description, budget, user["user_id"])
+    await ProjectRepository.update(project_id, title, description, budget, user["user_id"])
+    await uow.commit()
     return RedirectResponse("/client/dashboard", status_code=303)
 
 
@@ -124,21 +167,32 @@ async def view_bids(request: Request, project_id: int, user: dict = Depends(requ
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    project = ProjectRepository.get_by_id(project_id)
+    project = await ProjectRepository.get_by_id(project_id)
     if not project or project["client_id"] != user["user_id"]:
         raise HTTPException(status_code=404)
 
-    bids = BidRepository.get_by_project_id(project_id)
+    bids = await BidRepository.get_by_project_id(project_id)
 
-    # ⭐ 為每個承包者附加評價資料
+    # ⭐ 為每個承包者附加評價資料（一次查出所有承包者，避免 N+1 查詢）
+    contractor_ids = [b["contractor_id"] for b in bids]
+    ratings = await ReviewRepository.get_avg_scores_for_users(contractor_ids)
+    reviews = await ReviewRepository.get_reviews_for_users(
+        contractor_ids, limit_per_user=BID_REVIEWS_PER_CONTRACTOR
+    )
     for b in bids:
         cid = b["contractor_id"]
-        b["rating"] = ReviewRepository.get_user_avg_scores(cid)
-        b["reviews"] = ReviewRepository.get_reviews_for_user(cid)
+        b["rating"] = ratings.get(cid)
+        b["reviews"] = reviews.get(cid, [])
 
     return templates.TemplateResponse(
         "bids_list.html",
-        {"request": request, "user": user, "project": project, "bids": bids},
+        {
+            "request": request,
+            "user": user,
+            "project": project,
+            "bids": bids,
+            "error": BID_LIST_ERRORS.get(request.query_params.get("error")),
+        },
     )
 
 
@@ -146,19 +200,26 @@ async def view_bids(request: Request, project_id: int, user: dict = Depends(requ
 # 接受某一位乙方
 # --------------------------------------------
 @router.post("/bid/{bid_id}/accept")
-async def accept_bid(request: Request, bid_id: int, user: dict = Depends(require_auth)):
+async def accept_bid(
+    request: Request,
+    bid_id: int,
+    user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
+):
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    bid = BidRepository.get_by_id(bid_id)
-    if not bid or bid["client_id"] != user["user_id"]:
+    # 鎖定專案後一次完成：指派接案人、接受此投標、拒絕其他投標
+    outcome = await BidRepository.accept_bid(bid_id, user["user_id"])
+    if outcome is None:
         raise HTTPException(status_code=404)
+    if outcome["result"] == CONFLICT:
+        # 表單送出的請求：回到投標列表並顯示原因，而不是 JSON 錯誤頁
+        return RedirectResponse(f"/client/project/{outcome['project_id']}/bids?error=not_open", status_code=303)
+    await uow.commit()
 
-    BidRepository.accept(bid_id)
-    ProjectRepository.assign_contractor(bid["project_id"], bid["contractor_id"])
-    BidRepository.reject_others(bid["project_id"], bid_id)
-
-    return RedirectResponse(f"/client/project/{bid['project_id']}/bids", status_code=303)
+    # 重複送出（已接受過同一個投標）視為成功
+    return RedirectResponse(f"/client/project/{outcome['project_id']}/bids", status_code=303)
 
 
 # --------------------------------------------
@@ -169,19 +230,28 @@ async def view_deliverable(request: Request, project_id: int, user: dict = Depen
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    project = ProjectRepository.get_by_id(project_id)
+    # 專案、結案檔案與接案人的評價都沒有變動時直接回 304
+    freshness = await FreshnessRepository.client_deliverable(project_id, user["user_id"])
+    if freshness is None:
+        raise HTTPException(status_code=404)
+    validator = PageValidator(request, user, freshness)
+    not_modified = validator.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+
+    project = await ProjectRepository.get_by_id(project_id)
     if not project or project["client_id"] != user["user_id"]:
         raise HTTPException(status_code=404)
 
-    deliverable = DeliverableRepository.get_by_project_id(project_id)
+    deliverable = await DeliverableRepository.get_by_project_id(project_id)
 
     contractor_id = project.get("contractor_id")
 
-    rating = ReviewRepository.get_user_avg_scores(contractor_id)
-    reviews = ReviewRepository.get_reviews_for_user(contractor_id)
-    has_reviewed = ReviewRepository.has_reviewed(project_id, user["user_id"])
+    rating = await ReviewRepository.get_user_avg_scores(contractor_id)
+    reviews = await ReviewRepository.get_reviews_for_user(contractor_id)
+    has_reviewed = await ReviewRepository.has_reviewed(project_id, user["user_id"])
 
-    return templates.TemplateResponse(
+    return validator.apply(templates.TemplateResponse(
         "deliverable_review.html",
         {
             "request": request,
@@ -193,18 +263,24 @@ async def view_deliverable(request: Request, project_id: int, user: dict = Depen
             "has_reviewed": has_reviewed,
             "target_id": contractor_id,
         },
-    )
+    ))
 
 
 # --------------------------------------------
 # 結案（甲方）
 # --------------------------------------------
 @router.post("/project/{project_id}/complete")
-async def complete_project(request: Request, project_id: int, user: dict = Depends(require_auth)):
+async def complete_project(
+    request: Request,
+    project_id: int,
+    user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
+):
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    ProjectRepository.complete(project_id, user["user_id"])
+    await ProjectRepository.complete(project_id, user["user_id"])
+    await uow.commit()
     return RedirectResponse("/client/dashboard", status_code=303)
 
 
@@ -212,9 +288,15 @@ async def complete_project(request: Request, project_id: int, user: dict = Depen
 # 退件（甲方）
 # --------------------------------------------
 @router.post("/project/{project_id}/reject")
-async def reject_deliverable(request: Request, project_id: int, user: dict = Depends(require_auth)):
+async def reject_deliverable(
+    request: Request,
+    project_id: int,
+    user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
+):
     if user["role"] != "client":
         raise HTTPException(status_code=403)
 
-    ProjectRepository.reject(project_id, user["user_id"])
+    await ProjectRepository.reject(project_id, user["user_id"])
+    await uow.commit()
     return RedirectResponse("/client/dashboard", status_code=303)
@@ -0,0 +1,57 @@
+# 頁面的條件式 GET：由頁面資料的最後修改時間（models/freshness_repository.py）組出弱 ETag 與
+# Last-Modified，瀏覽器重新整理時帶著 If-None-Match / If-Modified-Since，資料沒有變動就回 304，
+# 不執行頁面本身的查詢、也不渲染樣板
+import hashlib
+from datetime import datetime
+from email.utils import formatdate
+
+from fastapi import Request
+from starlette.responses import Response
+
+from downloads import etag_matches, not_modified_since
+from templating import template_version
+
+
+class PageValidator:
+    """
+    一個頁面的驗證值。stamps 為頁面用到的資料的最後修改時間（可為 None）與筆數；
+    PostgreSQL 回傳帶時區的時間，SQLite 的時間是同一台主機寫入的本地時間，
+    .timestamp() 都換算成正確的 Unix 秒數。
+    ETag 另外包含網址（含查詢參數）、登入的使用者與樣板版本，同一個網址的不同使用者 / 篩選條件不會互相命中
+    """
+
+    def __init__(self, request: Request, user: dict, stamps):
+        times = [s.timestamp() for s in stamps if isinstance(s, datetime)]
+        self.last_modified = max(times) if times else None
+        token = repr((
+            request.url.path, request.url.query, sorted(user.items()), template_version(),
+            [s.timestamp() if isinstance(s, datetime) else s for s in stamps],
+        ))
+        self.etag = f'W/"{hashlib.sha1(token.encode()).hexdigest()[:24]}"'
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            "ETag": self.etag,
+            # 依登入者而不同：只允許瀏覽器快取，每次使用前都要重新驗證
+            "Cache-Control": "private, no-cache",
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        return headers
+
+    def not_modified(self, request: Request):
+        """請求的驗證值仍然有效時回傳 304 回應，否則回傳 None（If-None-Match 優先於 If-Modified-Since）"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            fresh = etag_matches(if_none_match, self.etag)
+        else:
+            if_modified_since = request.headers.get("if-modified-since")
+            fresh = (if_modified_since is not None and self.last_modified is not None
+                     and not_modified_since(if_modified_since, self.last_modified))
+        return Response(status_code=304, headers=self.headers) if fresh else None
+
+    def apply(self, response: Response) -> Response:
+        """在完整回應加上 ETag / Last-Modified / Cache-Control"""
+        response.headers.update(self.headers)
+        return response
@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sql_repository import ProjectRepository, BidRepository, DeliverableRepository
-from models.review_repository import ReviewRepository
-from .dependencies import require_auth
-import os
-
-router = APIRouter(prefix="/contractor", tags=["contractor"])
-templates = Jinja2Templates(directory="templates")
-
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from sql_repository import (
+    AsyncProjectRepository as ProjectRepository,
+    AsyncBidRepository as BidRepository,
+    AsyncDeliverableRepository as DeliverableRepository,
+)
+from models.review_repository import AsyncReviewRepository as ReviewRepository
+from models.freshness_repository import AsyncFreshnessRepository as FreshnessRepository
+from db import AsyncUnitOfWork
+from templating import templates
+from .dependencies import require_auth, get_unit_of_work
+from .conditional import PageValidator
+from .pagination import fetch_project_page, query_int, query_search
+from storage import MAX_UPLOAD_SIZE, UploadTooLarge, blob_path, discard_temp, store_blob, stream_to_temp
+
+router = APIRouter(prefix="/contractor", tags=["contractor"], dependencies=[Depends(get_unit_of_work)])
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
@@ -18,25 +23,81 @@ async def contractor_dashboard(request: Request, user: dict = Depends(require_au
     if user["role"] != "contractor":
         raise HTTPException(status_code=403)
 
-    my_projects = ProjectRepository.get_contractor_projects(user["user_id"])
-    for p in my_projects:
-        try:
-            deliverable = DeliverableRepository.get_by_project_id(p.get("id"))
-        except Exception:
-            deliverable = None
-        p["has_deliverable"] = bool(deliverable)
+    # 專案（包含其他人的可接案專案）與自己的結案檔案都沒有變動時直接回 304
+    validator = PageValidator(request, user, await FreshnessRepository.contractor_dashboard(user["user_id"]))
+    not_modified = validator.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+
+    # has_deliverable 直接由列表查詢算出，不再逐一查詢結案檔案
+    # 兩個列表各自分頁：我的專案用 my_cursor，可接案專案用 cursor
+    my_page = await fetch_project_page(
+        request,
+        prefix="my_",
+        contractor_id=user["user_id"],
+        exclude_status="completed",
+        with_deliverables=True,
+    )
 
-    available_projects = ProjectRepository.get_available_projects()
+    client_id = query_int(request, "client_id")
+    min_budget = query_int(request, "min_budget")
+    max_budget = query_int(request, "max_budget")
+    q = query_search(request)
+    # 有關鍵字時依相關度排序，否則由新到舊
+    available_page = await fetch_project_page(
+        request,
+        status="open",
+        client_id=client_id,
+        min_budget=min_budget,
+        max_budget=max_budget,
+        search=q,
+    )
 
-    return templates.TemplateResponse(
+    return validator.apply(templates.TemplateResponse(
         "contractor_dashboard.html",
         {
             "request": request,
             "user": user,
-            "my_projects": my_projects,
-            "available_projects": available_projects,
+            "my_projects": my_page["items"],
+            "my_page": my_page,
+            "available_projects": available_page["items"],
+            "available_page": available_page,
+            "client_id": client_id,
+            "min_budget": min_budget,
+            "max_budget": max_budget,
+            "q": q,
         },
+    ))
+
+
+# 搜尋 API：全文搜尋專案，依相關度排序，可搭配狀態 / 預算篩選與 cursor 分頁
+# 預設搜尋可接案的專案；其他狀態只搜尋自己承接的專案
+@router.get("/api/projects/search")
+async def search_projects(request: Request, user: dict = Depends(require_auth)):
+    if user["role"] != "contractor":
+        raise HTTPException(status_code=403)
+
+    q = query_search(request)
+    if q is None:
+        raise HTTPException(status_code=400, detail="missing q")
+    status = request.query_params.get("status") or "open"
+    page = await fetch_project_page(
+        request,
+        status=status,
+        contractor_id=None if status == "open" else user["user_id"],
+        min_budget=query_int(request, "min_budget"),
+        max_budget=query_int(request, "max_budget"),
+        search=q,
     )
+    items = [
+        {key: project[key] for key in ("id", "title", "budget", "status", "client_name", "updated_at", "rank")}
+        for project in page["items"]
+    ]
+    return JSONResponse(jsonable_encoder({
+        "items": items,
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+    }))
 
 
 # 專案詳情（乙方看到甲方需求＋甲方歷史評價）
@@ -45,22 +106,31 @@ async def view_project(request: Request, project_id: int, user: dict = Depends(r
     if user["role"] != "contractor":
         raise HTTPException(status_code=403)
 
-    project = ProjectRepository.get_project_with_client(project_id)
+    # 專案、自己的投標與甲方的評價都沒有變動時直接回 304
+    freshness = await FreshnessRepository.contractor_project(project_id, user["user_id"])
+    if freshness is None:
+        raise HTTPException(status_code=404)
+    validator = PageValidator(request, user, freshness)
+    not_modified = validator.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+
+    project = await ProjectRepository.get_project_with_client(project_id)
     if not project:
         raise HTTPException(status_code=404)
 
     user_id = user["user_id"]
-    my_bid = BidRepository.get_contractor_bid(project_id, user_id)
+    my_bid = await BidRepository.get_contractor_bid(project_id, user_id)
 
     # ⭐ 乙方在看甲方：顯示甲方過去收到的評價
     client_id = project["client_id"]
-    client_rating = ReviewRepository.get_user_avg_scores(client_id)
-    client_reviews = ReviewRepository.get_reviews_for_user(client_id)
+    client_rating = await ReviewRepository.get_user_avg_scores(client_id)
+    client_reviews = await ReviewRepository.get_reviews_for_user(client_id)
 
     # ⭐ 乙方是否已經對此專案評價過甲方
-    has_reviewed = ReviewRepository.has_reviewed(project_id, user_id)
+    has_reviewed = await ReviewRepository.has_reviewed(project_id, user_id)
 
-    return templates.TemplateResponse(
+    return validator.apply(templates.TemplateResponse(
         "project_detail.html",
         {
             "request": request,
@@ -72,7 +142,7 @@ async def view_project(request: Request, project_id: int, user: dict = Depends(r
             "has_reviewed": has_reviewed,
             "target_id": client_id,  # 評價對象：甲方
         },
-    )
+    ))
 
 
 @router.post("/project/{project_id}/bid")
@@ -82,11 +152,13 @@ async def submit_bid(
     price: int = Form(...),
     message: str = Form(...),
     user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
 ):
     if user["role"] != "contractor":
         raise HTTPException(status_code=403)
 
-    BidRepository.create(project_id, user["user_id"], price, message)
+    await BidRepository.create(project_id, user["user_id"], price, message)
+    await uow.commit()
     return RedirectResponse(f"/contractor/project/{project_id}", status_code=303)
 
 
@@ -95,11 +167,11 @@ async def upload_page(request: Request, project_id: int, user: dict = Depends(re
     if user["role"] != "contractor":
         raise HTTPException(status_code=403)
 
-    project = ProjectRepository.get_project_by_contractor(project_id, user["user_id"])
+    project = await ProjectRepository.get_project_by_contractor(project_id, user["user_id"])
     if not project:
         raise HTTPException(status_code=404)
 
-    deliverable = DeliverableRepository.get_by_project_id(project_id)
+    deliverable = await DeliverableRepository.get_by_project_id(project_id)
     return templates.TemplateResponse(
         "upload_deliverable.html",
         {
@@ -118,25 +190,33 @@ async def upload_deliverable(
     message: str = Form(...),
     file: UploadFile = File(...),
     user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
 ):
     if user["role"] != "contractor":
         raise HTTPException(status_code=403)
 
-    project = ProjectRepository.get_project_by_contractor(project_id, user["user_id"])
-    if not project:
-        raise HTTPException(status_code=404)
-
-    if DeliverableRepository.get_by_project_id(project_id):
-        DeliverableRepository.delete_by_project_id(project_id)
-
-    filename = f"{project_id}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-
-    DeliverableRepository.create(project_id, file.filename, file_path, message)
+    # 先完整寫入暫存檔，上傳失敗時舊的結案檔案保持不變。
+    # unit of work 在第一個查詢時才取得連線：寫入暫存檔之前不查詢，
+    # 上傳期間不佔用連線池的連線，交易（與 NOW()）也從檔案寫完之後才開始
+    try:
+        tmp_path, size, checksum = await stream_to_temp(file, MAX_UPLOAD_SIZE)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="檔案超過大小上限")
+
+    try:
+        project = await ProjectRepository.get_project_by_contractor(project_id, user["user_id"])
+        if not project:
+            raise HTTPException(status_code=404)
+
+        await DeliverableRepository.delete_by_project_id(project_id)
+        await DeliverableRepository.create(
+            project_id, file.filename, blob_path(checksum), message, file_size=size, checksum=checksum
+        )
+        # blob 列已在本交易中鎖定，放入檔案後才 commit
+        await store_blob(tmp_path, checksum)
+        await uow.commit()
+    finally:
+        discard_temp(tmp_path)
     return RedirectResponse("/contractor/dashboard", status_code=303)
 
 
@@ -145,14 +225,14 @@ async def completed_projects(request: Request, user: dict = Depends(require_auth
     if user["role"] != "contractor":
         raise HTTPException(status_code=403)
 
-    all_projects = ProjectRepository.get_contractor_projects(user["user_id"])
-    completed_projects = [p for p in all_projects if p["status"] == "completed"]
+    page = await fetch_project_page(request, contractor_id=user["user_id"], status="completed")
 
     return templates.TemplateResponse(
         "contractor_completed.html",
         {
             "request": request,
             "user": user,
-            "completed_projects": completed_projects,
+            "completed_projects": page["items"],
+            "page": page,
         },
     )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from sql_repository import AsyncDeliverableRepository as DeliverableRepository
+from downloads import FileDownloadResponse
+from .dependencies import require_auth
+
+# 不使用請求層級的 unit of work：查詢完立即歸還連線，傳送大型檔案時不佔用連線池
+router = APIRouter(prefix="/deliverables", tags=["deliverable"])
+
+
+# 下載結案檔案：只有專案的委託人與接案人可以下載
+# 支援 Range（續傳）、ETag / Last-Modified 條件式請求（304）
+@router.api_route("/{deliverable_id}/download", methods=["GET", "HEAD"])
+async def download_deliverable(deliverable_id: int, user: dict = Depends(require_auth)):
+    deliverable = await DeliverableRepository.get_with_project(deliverable_id)
+    if not deliverable:
+        raise HTTPException(status_code=404)
+
+    if user["user_id"] not in (deliverable["client_id"], deliverable["contractor_id"]):
+        raise HTTPException(status_code=403)
+
+    try:
+        # blob 以內容雜湊命名，checksum 即為強 ETag
+        return FileDownloadResponse(
+            deliverable["file_path"], deliverable["file_name"], etag=deliverable["checksum"]
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404)
\ No newline at end of file
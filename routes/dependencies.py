@@ -1,6 +1,21 @@
+import hmac
+import ipaddress
+import os
 from typing import Optional
 from fastapi import Request, HTTPException
 
+from db import unit_of_work
+
+# 監控端點（/metrics、/health/*）只開放給這些來源位址（逗號分隔的 IP / 網段，預設只有本機），
+# 或帶著 Authorization: Bearer <INTERNAL_TOKEN> 的請求（例如從其他主機抓取的 Prometheus）。
+# 放在反向代理後面時，來源位址取自 uvicorn 信任的 X-Forwarded-For（--forwarded-allow-ips）
+INTERNAL_NETWORKS = [
+    ipaddress.ip_network(n.strip())
+    for n in os.getenv("INTERNAL_NETWORKS", "127.0.0.1/32,::1/128").split(",")
+    if n.strip()
+]
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN") or None
+
 def get_current_user(request: Request) -> Optional[dict]:
     return request.session.get("user")
 
@@ -9,4 +24,24 @@ def require_auth(request: Request) -> dict:
     if not user:
         # 使用 303 Redirect 到 /login（保留你原本的行為）
         raise HTTPException(status_code=303, headers={"Location": "/login"})
-    return user
\ No newline at end of file
+    return user
+
+async def get_unit_of_work():
+    """每個請求一個 unit of work：同一條連線、同一個交易，請求結束時 commit / rollback"""
+    async with unit_of_work() as uow:
+        yield uow
+
+
+def require_internal(request: Request):
+    """監控端點只允許內部網段或帶著 INTERNAL_TOKEN 的請求，其他一律 403"""
+    if INTERNAL_TOKEN is not None:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), INTERNAL_TOKEN):
+            return
+    host = request.client.host if request.client else None
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        address = None
+    if address is None or not any(address in network for network in INTERNAL_NETWORKS):
+        raise HTTPException(status_code=403)
@@ -0,0 +1,51 @@
+import anyio
+from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from models.export_repository import AsyncExportRepository as ExportRepository, EXPORTS
+from export import FORMATS, aformat_export
+from .dependencies import require_auth
+from .pagination import query_date
+
+# 不使用請求層級的 unit of work：匯出以自己的連線與 server-side cursor 串流，
+# 回應送完時才結束交易
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+class ExportResponse(StreamingResponse):
+    """
+    StreamingResponse 在用戶端斷線時只會取消送出資料的工作，不會關閉 body_iterator，
+    產生器停在 yield 上、cursor 與連線要等到被回收時才釋放；這裡在回應結束時一律 aclose()
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+
+
+# 匯出與自己有關的專案 / 投標 / 結案檔案資訊 / 評價
+# GET /export/{kind}?format=ndjson|csv&status=...&from=YYYY-MM-DD&to=YYYY-MM-DD（to 不含）
+@router.get("/{kind}")
+async def export_data(request: Request, kind: str, user: dict = Depends(require_auth)):
+    if kind not in EXPORTS:
+        raise HTTPException(status_code=404)
+
+    fmt = request.query_params.get("format", "ndjson")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="invalid format")
+
+    batches = ExportRepository.stream(
+        kind,
+        status=request.query_params.getlist("status") or None,
+        date_from=query_date(request, "from"),
+        date_to=query_date(request, "to"),
+        user_id=user["user_id"],
+    )
+    return ExportResponse(
+        aformat_export(batches, fmt),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{fmt}"'},
+    )
\ No newline at end of file
@@ -0,0 +1,50 @@
+import io
+
+from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
+from fastapi.responses import JSONResponse
+
+from importer import FORMATS, ImportReader
+from models.import_repository import AsyncImportRepository as ImportRepository
+from .dependencies import require_auth
+
+# 不使用請求層級的 unit of work：檔案驗證完成後匯入才取得自己的連線，在一個交易內載入暫存表並合併
+router = APIRouter(prefix="/import", tags=["import"])
+
+# 每種資料可以匯入的角色與匯入函式
+IMPORTS = {
+    "projects": ("client", ImportRepository.import_projects),
+    "bids": ("contractor", ImportRepository.import_bids),
+}
+
+
+# 批次匯入：委託人匯入專案、接案人匯入投標（CSV 須有標題列；NDJSON 每列一個 JSON 物件）
+# POST /import/{kind}，multipart 表單：file、format=csv|ndjson
+# 全部成功時回 200，任何一列有錯誤時不寫入任何資料並回 422；兩者都回傳每一列的錯誤
+@router.post("/{kind}")
+async def import_data(
+    kind: str,
+    file: UploadFile = File(...),
+    format: str = Form("csv"),
+    user: dict = Depends(require_auth),
+):
+    if kind not in IMPORTS:
+        raise HTTPException(status_code=404)
+
+    role, import_rows = IMPORTS[kind]
+    if user["role"] != role:
+        raise HTTPException(status_code=403)
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="invalid format")
+
+    # utf-8-sig：略過試算表軟體匯出時加上的 BOM
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    rows = ImportReader(kind, format, text)
+    try:
+        # 先在執行緒中讀取、驗證整個檔案並寫入暫存檔，之後才取得資料庫連線
+        await rows.astage()
+        imported = await import_rows(user["user_id"], rows)
+    finally:
+        text.detach()
+        rows.discard()
+    report = rows.report(imported)
+    return JSONResponse(report, status_code=422 if report["error_count"] else 200)
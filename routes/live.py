@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response, StreamingResponse
+
+import events
+from .dependencies import require_auth
+
+# 不使用請求層級的 unit of work：串流期間不佔用資料庫連線，事件由 events.listen() 的 LISTEN 連線送來
+router = APIRouter(tags=["live"])
+
+
+# 登入使用者的即時事件（Server-Sent Events）：
+# bid_created / bid_accepted / bid_rejected / deliverable_uploaded / review_received，
+# 以及 resync（可能漏掉事件，頁面應重新取得完整內容）
+@router.get("/events")
+async def event_stream(user: dict = Depends(require_auth)):
+    if not events.LIVE_EVENTS:
+        # 204：EventSource 不再重新連線
+        return Response(status_code=204)
+
+    return StreamingResponse(
+        events.stream(user["user_id"]),
+        media_type="text/event-stream",
+        # 不快取、不讓反向代理緩衝（事件要立即送到瀏覽器）
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,61 @@
+from datetime import date
+
+from fastapi import Request, HTTPException
+
+from sql_repository import AsyncProjectRepository as ProjectRepository
+
+# 每頁顯示的專案數
+PAGE_SIZE = 20
+
+# 搜尋字串長度上限
+MAX_SEARCH_LENGTH = 200
+
+
+async def fetch_project_page(request: Request, prefix: str = "", **filters) -> dict:
+    """
+    依查詢參數 {prefix}cursor / {prefix}direction 取得一頁專案，
+    並附上保留其他查詢參數的 next_url / prev_url（同一頁有多個列表時用 prefix 區分）
+    """
+    cursor_key, direction_key = prefix + "cursor", prefix + "direction"
+    cursor = request.query_params.get(cursor_key) or None
+    direction = request.query_params.get(direction_key, "next")
+    try:
+        page = await ProjectRepository.get_project_page(
+            cursor=cursor, direction=direction, limit=PAGE_SIZE, **filters
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+    for name in ("next", "prev"):
+        token = page[f"{name}_cursor"]
+        url = request.url.include_query_params(**{cursor_key: token, direction_key: name})
+        page[f"{name}_url"] = f"{url.path}?{url.query}" if token else None
+    return page
+
+
+def query_search(request: Request, name: str = "q"):
+    """讀取全文搜尋字串；空白視為未提供，過長的輸入截斷"""
+    value = (request.query_params.get(name) or "").strip()
+    return value[:MAX_SEARCH_LENGTH] or None
+
+
+def query_int(request: Request, name: str):
+    """讀取選填的整數查詢參數；空字串（表單未填）視為未提供"""
+    value = request.query_params.get(name)
+    if value is None or value.strip() == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid {name}")
+
+
+def query_date(request: Request, name: str):
+    """讀取選填的日期查詢參數（YYYY-MM-DD）；空字串視為未提供"""
+    value = request.query_params.get(name)
+    if value is None or value.strip() == "":
+        return None
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid {name}")
\ No newline at end of file
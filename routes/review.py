@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
 
-from models.review_repository import ReviewRepository
-from sql_repository import ProjectRepository
-from .dependencies import require_auth
+from models.review_repository import AsyncReviewRepository as ReviewRepository
+from sql_repository import AsyncProjectRepository as ProjectRepository
+from db import AsyncUnitOfWork
+from templating import templates
+from .dependencies import require_auth, get_unit_of_work
 
-router = APIRouter(prefix="/review", tags=["review"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(prefix="/review", tags=["review"], dependencies=[Depends(get_unit_of_work)])
 
 
 # 顯示評價表單
@@ -22,7 +22,7 @@ async def review_form(
     role = user["role"]
 
     # 專案是否存在
-    project = ProjectRepository.get_by_id(project_id)
+    project = await ProjectRepository.get_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -31,7 +31,7 @@ async def review_form(
         raise HTTPException(status_code=403, detail="Not your project")
 
     # 已評價就直接導回
-    if ReviewRepository.has_reviewed(project_id, reviewer_id):
+    if await ReviewRepository.has_reviewed(project_id, reviewer_id):
         if role == "client":
             return RedirectResponse(
                 f"/client/project/{project_id}/deliverable", status_code=303
@@ -65,11 +65,12 @@ async def submit_review(
     dim3: int = Form(...),
     comment: str = Form(""),
     user: dict = Depends(require_auth),
+    uow: AsyncUnitOfWork = Depends(get_unit_of_work),
 ):
     reviewer_id = user["user_id"]
     role = user["role"]
 
-    if ReviewRepository.has_reviewed(project_id, reviewer_id):
+    if await ReviewRepository.has_reviewed(project_id, reviewer_id):
         # 已評過直接導回
         if role == "client":
             return RedirectResponse(
@@ -80,7 +81,7 @@ async def submit_review(
                 f"/contractor/project/{project_id}", status_code=303
             )
 
-    ReviewRepository.create_review(
+    await ReviewRepository.create_review(
         project_id=project_id,
         reviewer_id=reviewer_id,
         target_id=target_id,
@@ -89,6 +90,7 @@ async def submit_review(
         dim3=dim3,
         comment=comment,
     )
+    await uow.commit()
 
     # 根據身份導回對應畫面
     if role == "client":
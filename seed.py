@@ -0,0 +1,241 @@
+# seed.py
+# 在本機資料庫產生接近實際規模的測試資料（查詢計畫檢查、壓力測試用）
+# 所有資料的使用者名稱都以 SEED_PREFIX 開頭，可用 reset_seed_data() 清除
+from db import get_db
+from sqlite_backend import register
+
+SEED_PREFIX = "seed_"
+
+DEFAULT_VOLUMES = {
+    "users": 5000,
+    "projects": 50000,
+    "bids": 200000,
+    "reviews": 30000,
+}
+
+_SEED_USERS = """
+    INSERT INTO users (username, role, password, created_at)
+    SELECT %(prefix)s || g,
+           CASE WHEN g %% 2 = 0 THEN 'client' ELSE 'contractor' END,
+           'password',
+           NOW() - (g || ' minutes')::interval
+    FROM generate_series(1, %(users)s) g
+"""
+
+# 狀態分布：20% open、30% assigned、10% rejected、40% completed
+_SEED_PROJECTS = """
+    WITH c AS (
+        SELECT array_agg(id) AS ids FROM users
+        WHERE username LIKE %(pattern)s AND role = 'client'
+    ), k AS (
+        SELECT array_agg(id) AS ids FROM users
+        WHERE username LIKE %(pattern)s AND role = 'contractor'
+    ), s AS (
+        SELECT g,
+               CASE WHEN g %% 10 < 2 THEN 'open'
+                    WHEN g %% 10 < 5 THEN 'assigned'
+                    WHEN g %% 10 < 6 THEN 'rejected'
+                    ELSE 'completed' END AS status
+        FROM generate_series(1, %(projects)s) g
+    )
+    INSERT INTO projects (title, description, budget, client_id, contractor_id, status, updated_at)
+    SELECT 'Seed project ' || s.g,
+           repeat('Seed project description for load testing. ', 1 + s.g %% 20),
+           1000 + (s.g * 37) %% 50000,
+           c.ids[(1 + (s.g::bigint * 7919) %% array_length(c.ids, 1))::int],
+           CASE WHEN s.status = 'open' THEN NULL
+                ELSE k.ids[(1 + (s.g::bigint * 104729) %% array_length(k.ids, 1))::int] END,
+           s.status,
+           NOW() - ((s.g * 13) %% 525600 || ' minutes')::interval
+    FROM s, c, k
+"""
+
+_SEED_BIDS = """
+    WITH p AS (
+        SELECT array_agg(pr.id) AS ids FROM projects pr
+        JOIN users u ON pr.client_id = u.id
+        WHERE u.username LIKE %(pattern)s
+    ), k AS (
+        SELECT array_agg(id) AS ids FROM users
+        WHERE username LIKE %(pattern)s AND role = 'contractor'
+    )
+    INSERT INTO bids (project_id, contractor_id, price, message, status, updated_at)
+    SELECT p.ids[(1 + (g::bigint * 7907) %% array_length(p.ids, 1))::int],
+           k.ids[(1 + (g::bigint * 15485863) %% array_length(k.ids, 1))::int],
+           500 + (g * 31) %% 40000,
+           repeat('Seed bid message. ', 1 + g %% 10),
+           CASE WHEN g %% 5 = 0 THEN 'rejected' ELSE 'pending' END,
+           NOW() - ((g * 7) %% 525600 || ' minutes')::interval
+    FROM generate_series(1, %(bids)s) g, p, k
+"""
+
+# SQLite 版（DB_BACKEND=sqlite）：沒有 generate_series / 陣列 / interval，
+# 以遞迴 CTE 產生序號，依 ROW_NUMBER() 挑選使用者與專案；資料分布與上面相同
+_SEED_SERIES_SQLITE = "WITH RECURSIVE g(g) AS (SELECT 1 UNION ALL SELECT g + 1 FROM g WHERE g < %(n)s)"
+_MINUTES_AGO_SQLITE = "strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now', 'localtime', -({}) || ' minutes')"
+
+register(_SEED_USERS, f"""
+    INSERT INTO users (username, role, password, created_at)
+    {_SEED_SERIES_SQLITE.replace("%(n)s", "%(users)s")}
+    SELECT %(prefix)s || g,
+           CASE WHEN g %% 2 = 0 THEN 'client' ELSE 'contractor' END,
+           'password',
+           {_MINUTES_AGO_SQLITE.format("g")}
+    FROM g
+""")
+
+register(_SEED_PROJECTS, f"""
+    INSERT INTO projects (title, description, budget, client_id, contractor_id, status, updated_at)
+    {_SEED_SERIES_SQLITE.replace("%(n)s", "%(projects)s")},
+    c AS MATERIALIZED (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS i FROM users
+        WHERE username LIKE %(pattern)s AND role = 'client'
+    ), k AS MATERIALIZED (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS i FROM users
+        WHERE username LIKE %(pattern)s AND role = 'contractor'
+    ), s AS (
+        SELECT g,
+               CASE WHEN g %% 10 < 2 THEN 'open'
+                    WHEN g %% 10 < 5 THEN 'assigned'
+                    WHEN g %% 10 < 6 THEN 'rejected'
+                    ELSE 'completed' END AS status
+        FROM g
+    )
+    SELECT 'Seed project ' || s.g,
+           replace(hex(zeroblob(1 + s.g %% 20)), '00', 'Seed project description for load testing. '),
+           1000 + (s.g * 37) %% 50000,
+           c.id,
+           CASE WHEN s.status = 'open' THEN NULL ELSE k.id END,
+           s.status,
+           {_MINUTES_AGO_SQLITE.format("(s.g * 13) %% 525600")}
+    FROM s
+    JOIN c ON c.i = (s.g * 7919) %% (SELECT COUNT(*) FROM c)
+    JOIN k ON k.i = (s.g * 104729) %% (SELECT COUNT(*) FROM k)
+""")
+
+register(_SEED_BIDS, f"""
+    INSERT INTO bids (project_id, contractor_id, price, message, status, updated_at)
+    {_SEED_SERIES_SQLITE.replace("%(n)s", "%(bids)s")},
+    p AS MATERIALIZED (
+        SELECT pr.id, ROW_NUMBER() OVER (ORDER BY pr.id) - 1 AS i FROM projects pr
+        JOIN users u ON pr.client_id = u.id
+        WHERE u.username LIKE %(pattern)s
+    ), k AS MATERIALIZED (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS i FROM users
+        WHERE username LIKE %(pattern)s AND role = 'contractor'
+    )
+    SELECT p.id,
+           k.id,
+           500 + (g.g * 31) %% 40000,
+           replace(hex(zeroblob(1 + g.g %% 10)), '00', 'Seed bid message. '),
+           CASE WHEN g.g %% 5 = 0 THEN 'rejected' ELSE 'pending' END,
+           {_MINUTES_AGO_SQLITE.format("(g.g * 7) %% 525600")}
+    FROM g
+    JOIN p ON p.i = (g.g * 7907) %% (SELECT COUNT(*) FROM p)
+    JOIN k ON k.i = (g.g * 15485863) %% (SELECT COUNT(*) FROM k)
+""")
+
+_SEED_DELIVERABLES = """
+    INSERT INTO deliverables (project_id, file_name, file_path, message, uploaded_at)
+    SELECT pr.id, 'seed.zip', 'uploads/seed-' || pr.id || '.zip', 'seed deliverable', pr.updated_at
+    FROM projects pr
+    JOIN users u ON pr.client_id = u.id
+    WHERE u.username LIKE %(pattern)s
+      AND pr.status IN ('assigned', 'rejected', 'completed')
+      AND pr.id %% 2 = 0
+"""
+
+# 已完成的專案：委託人評價接案人
+_SEED_REVIEWS = """
+    INSERT INTO reviews (project_id, reviewer_id, target_id, dim1, dim2, dim3, comment, created_at)
+    SELECT pr.id, pr.client_id, pr.contractor_id,
+           1 + pr.id %% 5, 1 + (pr.id / 5) %% 5, 1 + (pr.id / 25) %% 5,
+           'Seed review', pr.updated_at
+    FROM projects pr
+    JOIN users u ON pr.client_id = u.id
+    WHERE u.username LIKE %(pattern)s AND pr.status = 'completed'
+    ORDER BY pr.id
+    LIMIT %(reviews)s
+"""
+
+_RESET = (
+    """DELETE FROM reviews WHERE project_id IN (
+           SELECT pr.id FROM projects pr JOIN users u ON pr.client_id = u.id
+           WHERE u.username LIKE %(pattern)s)""",
+    """DELETE FROM deliverables WHERE project_id IN (
+           SELECT pr.id FROM projects pr JOIN users u ON pr.client_id = u.id
+           WHERE u.username LIKE %(pattern)s)""",
+    """DELETE FROM bids WHERE project_id IN (
+           SELECT pr.id FROM projects pr JOIN users u ON pr.client_id = u.id
+           WHERE u.username LIKE %(pattern)s)
+       OR contractor_id IN (SELECT id FROM users WHERE username LIKE %(pattern)s)""",
+    """DELETE FROM projects WHERE client_id IN (
+           SELECT id FROM users WHERE username LIKE %(pattern)s)""",
+    """DELETE FROM user_rating_summary WHERE user_id IN (
+           SELECT id FROM users WHERE username LIKE %(pattern)s)""",
+    "DELETE FROM users WHERE username LIKE %(pattern)s",
+)
+
+
+# 更新統計資訊，讓查詢計畫反映實際資料量；VACUUM 同時清空 GIN 索引（project_search）的 pending list，
+# 否則剛寫入大量資料後的搜尋查詢會暫時改用 Seq Scan，查詢計畫檢查的結果不穩定
+_VACUUM_ANALYZE = "VACUUM ANALYZE users, projects, project_search, bids, deliverables, reviews, user_rating_summary"
+register(_VACUUM_ANALYZE, "ANALYZE")
+
+
+def _params(volumes=None) -> dict:
+    return {
+        **DEFAULT_VOLUMES,
+        **(volumes or {}),
+        "prefix": SEED_PREFIX,
+        "pattern": SEED_PREFIX.replace("_", r"\_") + "%",
+    }
+
+
+def vacuum_analyze():
+    """VACUUM ANALYZE 所有資料表（seed 之後、查詢計畫檢查之前）"""
+    with get_db() as conn:
+        # VACUUM 不能在交易中執行
+        conn.autocommit = True
+        try:
+            conn.cursor().execute(_VACUUM_ANALYZE)
+        finally:
+            conn.autocommit = False
+
+
+def reset_seed_data():
+    """刪除所有 seed 資料"""
+    params = _params()
+    with get_db() as conn:
+        cur = conn.cursor()
+        for sql in _RESET:
+            cur.execute(sql, params)
+
+
+def seed_database(volumes=None) -> dict:
+    """
+    產生 seed 資料（先清除舊的 seed 資料），並更新評分摘要與統計資訊。
+    volumes 可覆寫 DEFAULT_VOLUMES 中的 users / projects / bids / reviews 數量。
+    回傳各資料表實際新增的筆數。
+    """
+    from models.review_repository import ReviewRepository
+
+    params = _params(volumes)
+    reset_seed_data()
+    counts = {}
+    with get_db() as conn:
+        cur = conn.cursor()
+        for table, sql in (
+            ("users", _SEED_USERS),
+            ("projects", _SEED_PROJECTS),
+            ("bids", _SEED_BIDS),
+            ("deliverables", _SEED_DELIVERABLES),
+            ("reviews", _SEED_REVIEWS),
+        ):
+            cur.execute(sql, params)
+            counts[table] = cur.rowcount
+
+    ReviewRepository.rebuild_rating_summary()
+
+    vacuum_analyze()
+    return counts
@@ -1,12 +1,17 @@
 # 將原本大檔拆分到 models/，並保留相同名稱的匯出以維持相容
-from models.project_repository import ProjectRepository
-from models.bid_repository import BidRepository
-from models.user_repository import UserRepository
-from models.deliverable_repository import DeliverableRepository
+# Async* 為非同步版本（供 async 路由 await），同步版本保留給腳本使用
+from models.project_repository import ProjectRepository, AsyncProjectRepository
+from models.bid_repository import BidRepository, AsyncBidRepository
+from models.user_repository import UserRepository, AsyncUserRepository
+from models.deliverable_repository import DeliverableRepository, AsyncDeliverableRepository
 
 __all__ = [
     "ProjectRepository",
     "BidRepository",
     "UserRepository",
     "DeliverableRepository",
+    "AsyncProjectRepository",
+    "AsyncBidRepository",
+    "AsyncUserRepository",
+    "AsyncDeliverableRepository",
 ]
\ No newline at end of file
@@ -0,0 +1,689 @@
+# sqlite_backend.py
+# 嵌入式 SQLite 後端（DB_BACKEND=sqlite）：不需要另外的資料庫服務，整個 app 與壓力測試都在同一個程序內執行。
+# 連線 / cursor 模擬 psycopg2（同步）與 psycopg 3（非同步）的介面，repository 不需要修改：
+# - SQL 在第一次執行時由 PostgreSQL 語法轉成 SQLite 語法（結果依 SQL 文字快取），
+#   SQLite 沒有的語法由 models/* 以 register() 登記替代的片段或以多個語句實作的函式
+# - 每條連線保留已編譯的語句（cached_statements），同一個 SQL 常數只編譯一次
+# - WAL 模式：讀取不會被寫入阻塞；第一個寫入語句以 BEGIN IMMEDIATE 取得寫入鎖，
+#   寫入交易依序執行，取代 PostgreSQL 的 FOR UPDATE / LOCK TABLE
+import asyncio
+import contextvars
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import lru_cache
+
+import psycopg2.extensions
+
+import db
+import instrumentation
+
+# 與 migrations/sqlite/ 中的預設值相同的時間格式（字串比較即為時間先後）
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+# 每條連線保留的已編譯語句數
+STATEMENT_CACHE_SIZE = 256
+
+# COPY ... FROM STDIN 每次以 executemany 插入的資料列數
+COPY_BATCH_SIZE = 1000
+
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# 本程序內的 LISTEN（events.py）：pg_notify() 的通知在 commit 後以 callback(頻道, 內容) 送出
+_notify_listeners = []
+
+# cursor.description 的欄位：同時支援 psycopg2 的 c[0] 與 psycopg 3 的 c.name
+Column = namedtuple("Column", "name type_code display_size internal_size precision scale null_ok")
+
+
+# ---------------------------------------------------------------- SQL 轉換
+
+_REPLACEMENTS = {}  # PostgreSQL 片段 -> SQLite 片段
+_HANDLERS = {}      # PostgreSQL 語句 -> handler(cursor, params)
+
+
+def register(postgres_sql: str, sqlite_sql: str = None):
+    """
+    登記 SQLite 沒有對應語法的 SQL：
+    - register(片段, 替代片段)：轉換時以字串取代（可以是完整語句或其中一段）
+    - @register(語句)：以 handler(cursor, params) 取代整個語句，
+      handler 用同一條連線執行多個語句，最後一個語句的結果即為 cursor 的結果
+    """
+    if sqlite_sql is None:
+        def decorator(handler):
+            _HANDLERS[postgres_sql] = handler
+            return handler
+        return decorator
+    _REPLACEMENTS[postgres_sql] = sqlite_sql
+    _translate.cache_clear()
+    return None
+
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+_CAST = re.compile(r"::\w+(\[\])?")
+_ANY = re.compile(r"=\s*ANY\((\?|:\w+)\)", re.I)
+_ALL = re.compile(r"<>\s*ALL\((\?|:\w+)\)", re.I)
+_ANY_ARRAY = re.compile(r"=\s*ANY\(ARRAY\(", re.I)
+_LIKE = re.compile(r"\bLIKE\s+(\?|:\w+)", re.I)
+_WRITE = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|ANALYZE)\b", re.I)
+_LOCK = re.compile(r"^\s*LOCK\s+TABLE\b", re.I)
+
+Statement = namedtuple("Statement", "sql write lock")
+
+
+def _placeholder(match):
+    if match.group(1):
+        return ":" + match.group(1)
+    return "?" if match.group(0) == "%s" else "%"
+
+
+def _unwrap_any_array(sql: str) -> str:
+    """x = ANY(ARRAY(子查詢)) -> x IN (子查詢)"""
+    while True:
+        match = _ANY_ARRAY.search(sql)
+        if match is None:
+            return sql
+        depth, i = 2, match.end()
+        while depth:
+            depth += {"(": 1, ")": -1}.get(sql[i], 0)
+            i += 1
+        # sql[match.end():i - 2] 為子查詢，i - 2 / i - 1 為 ARRAY( 與 ANY( 的右括號
+        sql = f"{sql[:match.start()]}IN ({sql[match.end():i - 2]}){sql[i:]}"
+
+
+@lru_cache(maxsize=1024)
+def _translate(sql: str) -> Statement:
+    for postgres_sql in sorted(_REPLACEMENTS, key=len, reverse=True):
+        sql = sql.replace(postgres_sql, _REPLACEMENTS[postgres_sql])
+    sql = _CAST.sub("", sql)
+    sql = _PLACEHOLDER.sub(_placeholder, sql)
+    sql = sql.replace("NOW()", NOW)
+    sql = _unwrap_any_array(sql)
+    # 陣列參數以 JSON 傳入（見 _adapt）
+    sql = _ANY.sub(r"IN (SELECT value FROM json_each(\1))", sql)
+    sql = _ALL.sub(r"NOT IN (SELECT value FROM json_each(\1))", sql)
+    # PostgreSQL 的 LIKE 預設以 \ 跳脫
+    sql = _LIKE.sub(r"LIKE \1 ESCAPE '\\'", sql)
+    lock = bool(_LOCK.match(sql))
+    return Statement(sql, lock or bool(_WRITE.search(sql)), lock)
+
+
+_COPY = re.compile(r"^\s*COPY\s+(\w+)\s*\(([^)]*)\)\s+FROM\s+STDIN\s*$", re.I)
+_COPY_UNESCAPE = re.compile(r"\\(.)")
+_COPY_UNESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", "v": "\v"}
+
+
+@lru_cache(maxsize=64)
+def _copy_insert(sql: str) -> str:
+    """COPY 表 (欄位) FROM STDIN -> INSERT INTO 表 (欄位) VALUES (?, ...)（只支援這種形式）"""
+    match = _COPY.match(sql)
+    if match is None:
+        raise sqlite3.NotSupportedError(f"unsupported COPY statement: {sql}")
+    table, columns = match.group(1), match.group(2)
+    placeholders = ", ".join("?" * len(columns.split(",")))
+    return f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+
+
+def _copy_value(field: str):
+    """COPY 文字格式的一個欄位（\\N 為 NULL，反斜線跳脫）"""
+    if field == "\\N":
+        return None
+    if "\\" not in field:
+        return field
+    return _COPY_UNESCAPE.sub(lambda m: _COPY_UNESCAPES.get(m.group(1), m.group(1)), field)
+
+
+def _adapt(value):
+    if isinstance(value, datetime):
+        return value.isoformat(" ", timespec="milliseconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return json.dumps([_adapt(v) for v in value])
+    return value
+
+
+def _adapt_params(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return {k: _adapt(v) for k, v in params.items()}
+    return [_adapt(v) for v in params]
+
+
+def websearch_to_fts(text):
+    """
+    將 websearch_to_tsquery 的語法（空白為 AND、or、"片語"、-排除）轉成 FTS5 查詢；
+    沒有任何要比對的字詞時回傳 None（不會有符合的結果）
+    """
+    if text is None:
+        return None
+    groups, excluded, pending_or = [], [], False
+    for match in re.finditer(r'(-?)(?:"([^"]*)"?|(\S+))', text):
+        negate, phrase, word = match.groups()
+        if word is not None and not negate and word.lower() == "or":
+            pending_or = bool(groups)
+            continue
+        terms = re.findall(r"\w+", phrase if phrase is not None else word)
+        if not terms:
+            continue
+        term = '"' + " ".join(terms) + '"'
+        if negate:
+            excluded.append(term)
+        elif pending_or:
+            groups[-1].append(term)
+        else:
+            groups.append([term])
+        pending_or = False
+    if not groups:
+        return None
+    query = " AND ".join("(" + " OR ".join(g) + ")" if len(g) > 1 else g[0] for g in groups)
+    return query + "".join(f" NOT {t}" for t in excluded)
+
+
+# ---------------------------------------------------------------- 同步連線（psycopg2 介面）
+
+class _Info:
+    def __init__(self, conn):
+        self._conn = conn
+
+    @property
+    def transaction_status(self):
+        if self._conn.closed:
+            return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        if self._conn.raw.in_transaction:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class Cursor:
+    """
+    psycopg2 風格的 cursor。結果一次讀入（同 psycopg2 的 client-side cursor），
+    指定 name 時（server-side cursor）改為逐批讀取
+    """
+
+    def __init__(self, connection, dict_rows=False, name=None):
+        self.connection = connection
+        self.dict_rows = dict_rows
+        self.name = name
+        self.description = None
+        self.rowcount = -1
+        self._rows = deque()
+        self._stream = None
+        self._convert = ()
+        self._columns = ()
+
+    def execute(self, query, params=None):
+        handler = _HANDLERS.get(query)
+        if handler is not None:
+            handler(self, params)
+            return
+        # 處理函式內的各個語句分別統計；等待寫入鎖的時間也算在查詢時間內
+        start = time.perf_counter()
+        try:
+            self._execute(_translate(query), params)
+        finally:
+            instrumentation.record_query(query, time.perf_counter() - start, instrumentation.result_rows(self))
+
+    def _execute(self, statement, params):
+        if statement.write:
+            self.connection.begin_write()
+        if statement.lock:
+            # LOCK TABLE：寫入鎖已由 BEGIN IMMEDIATE 取得
+            self._set_result(None, [], -1)
+            return
+        raw = self.connection.raw.execute(statement.sql, _adapt_params(params))
+        if self.name is not None and raw.description is not None:
+            self._set_result(raw.description, [], -1)
+            self._stream = raw
+            return
+        rows = raw.fetchall()
+        self._set_result(raw.description, rows, raw.rowcount if raw.rowcount >= 0 else len(rows))
+
+    def _set_result(self, description, rows, rowcount):
+        self._stream = None
+        self.rowcount = rowcount
+        if description is None:
+            self.description = None
+            self._columns = ()
+            self._convert = ()
+        else:
+            self._columns = tuple(d[0] for d in description)
+            self.description = [Column(name, None, None, None, None, None, None) for name in self._columns]
+            # 時間欄位以文字儲存，讀出時轉回 datetime
+            self._convert = tuple(i for i, name in enumerate(self._columns) if name.endswith("_at"))
+        self._rows = deque(self._row(r) for r in rows)
+
+    def _row(self, row):
+        if self._convert:
+            row = list(row)
+            for i in self._convert:
+                if isinstance(row[i], str):
+                    row[i] = datetime.fromisoformat(row[i])
+        if self.dict_rows:
+            return dict(zip(self._columns, row))
+        return tuple(row)
+
+    def fetchone(self):
+        if self._stream is not None:
+            row = self._stream.fetchone()
+            return None if row is None else self._row(row)
+        return self._rows.popleft() if self._rows else None
+
+    def fetchmany(self, size=1):
+        if self._stream is not None:
+            return [self._row(r) for r in self._stream.fetchmany(size)]
+        return [self._rows.popleft() for _ in range(min(size, len(self._rows)))]
+
+    def fetchall(self):
+        if self._stream is not None:
+            return [self._row(r) for r in self._stream.fetchall()]
+        rows, self._rows = list(self._rows), deque()
+        return rows
+
+    def copy_expert(self, sql, file, size=8192):
+        """psycopg2 的 COPY ... FROM STDIN：讀取 COPY 文字格式，每 COPY_BATCH_SIZE 列以 executemany 插入"""
+        insert = _copy_insert(sql)
+        rows, rest, count = [], "", 0
+        # 整個 COPY 統計為一個查詢（含讀取 file 的時間，同 PostgreSQL）
+        start = time.perf_counter()
+        try:
+            while True:
+                data = file.read(size)
+                if not data:
+                    break
+                lines = (rest + data).split("\n")
+                rest = lines.pop()
+                rows.extend([_copy_value(field) for field in line.split("\t")] for line in lines)
+                if len(rows) >= COPY_BATCH_SIZE:
+                    count += self._insert_rows(insert, rows)
+                    rows = []
+            if rest:
+                rows.append([_copy_value(field) for field in rest.split("\t")])
+            count += self._insert_rows(insert, rows)
+        finally:
+            instrumentation.record_query(sql, time.perf_counter() - start, count)
+        self._set_result(None, [], count)
+
+    def _insert_rows(self, insert, rows) -> int:
+        if rows:
+            self.connection.begin_write()
+            self.connection.raw.executemany(insert, rows)
+        return len(rows)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self._rows = deque()
+
+
+class Connection:
+    """psycopg2 風格的 SQLite 連線（autocommit 讀取，第一個寫入語句開始交易）"""
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.raw = sqlite3.connect(
+            path,
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in _PRAGMAS:
+            self.raw.execute(pragma)
+        self.raw.create_function("fts_query", 1, websearch_to_fts, deterministic=True)
+        self.raw.create_function("pg_notify", 2, self._notify)
+        self.closed = 0
+        self.notifies = []
+        self.after_commit = []  # 同 instrumentation.InstrumentedConnection.after_commit
+        self.info = _Info(self)
+
+    def cursor(self, cursor_factory=None, name=None):
+        # cursor_factory 只會是 RealDictCursor（以 dict 回傳資料列）
+        return Cursor(self, dict_rows=cursor_factory is not None, name=name)
+
+    def begin_write(self):
+        """開始寫入交易（已在交易中時不做任何事）"""
+        if not self.raw.in_transaction:
+            self.raw.execute("BEGIN IMMEDIATE")
+
+    def _notify(self, channel, payload):
+        # 同 PostgreSQL：交易中的通知在 commit 後才送出，rollback 則捨棄
+        self.notifies.append((channel, payload))
+        if not self.raw.in_transaction:
+            self._deliver()
+
+    def _deliver(self):
+        notifies, self.notifies = self.notifies, []
+        for channel, payload in notifies:
+            for callback in list(_notify_listeners):
+                callback(channel, payload)
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+        self._deliver()
+        instrumentation.run_after_commit(self)
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+        self.notifies = []
+        self.after_commit = []
+
+    def close(self):
+        self.notifies = []
+        self.after_commit = []
+        if not self.closed:
+            self.raw.close()
+            self.closed = 1
+
+
+def add_notify_listener(callback):
+    _notify_listeners.append(callback)
+
+
+def remove_notify_listener(callback):
+    _notify_listeners.remove(callback)
+
+
+def connect(path, busy_timeout=5.0) -> Connection:
+    return Connection(path, busy_timeout)
+
+
+def run_migrations(directory, path, busy_timeout=5.0) -> list:
+    """依序套用 directory/*.sql（SQLite 版的 schema），每個檔案一個交易；回傳本次套用的版本"""
+    applied = []
+    conn = connect(path, busy_timeout)
+    try:
+        raw = conn.raw
+        raw.execute(f"""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(255) PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT ({NOW})
+            )
+        """)
+        for name in sorted(f for f in os.listdir(directory) if f.endswith(".sql")):
+            version = name[:-len(".sql")]
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                script = f.read()
+            # 寫入鎖同時避免多個程序同時執行 migration
+            conn.begin_write()
+            try:
+                if raw.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                    conn.rollback()
+                    continue
+                statement = ""
+                for line in script.splitlines(keepends=True):
+                    statement += line
+                    if sqlite3.complete_statement(statement):
+                        raw.execute(statement)
+                        statement = ""
+                raw.execute("INSERT INTO schema_migrations (version) VALUES (?)", (version,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+    finally:
+        conn.close()
+    return applied
+
+
+# ---------------------------------------------------------------- 非同步連線（psycopg 3 介面）
+
+class AsyncCursor:
+    """psycopg 3 風格的 cursor：語句在連線專用的執行緒上執行，不阻塞 event loop"""
+
+    def __init__(self, connection, row_factory=None, name=None):
+        self.connection = connection
+        self._cursor = Cursor(connection.sync, dict_rows=row_factory is not None, name=name)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    async def execute(self, query, params=None):
+        await self.connection.run(self._cursor.execute, query, params)
+        return self
+
+    async def fetchone(self):
+        if self._cursor._stream is not None:
+            return await self.connection.run(self._cursor.fetchone)
+        return self._cursor.fetchone()
+
+    async def fetchmany(self, size=1):
+        if self._cursor._stream is not None:
+            return await self.connection.run(self._cursor.fetchmany, size)
+        return self._cursor.fetchmany(size)
+
+    async def fetchall(self):
+        if self._cursor._stream is not None:
+            return await self.connection.run(self._cursor.fetchall)
+        return self._cursor.fetchall()
+
+    @asynccontextmanager
+    async def copy(self, statement):
+        """psycopg 3 的 cursor.copy()（COPY ... FROM STDIN）：write_row 的資料列分批插入"""
+        copy = _AsyncCopy(self, _copy_insert(statement))
+        start = time.perf_counter()
+        try:
+            yield copy
+            copy.end()
+            await copy.flush()
+        finally:
+            instrumentation.record_query(statement, time.perf_counter() - start, copy.count)
+
+    async def close(self):
+        await self.connection.run(self._cursor.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class _AsyncCopy:
+    def __init__(self, cursor: AsyncCursor, insert: str):
+        self._cursor = cursor
+        self._insert = insert
+        self._rows = []
+        self._rest = ""
+        self.count = 0
+
+    async def write_row(self, row):
+        self._rows.append([_adapt(value) for value in row])
+        if len(self._rows) >= COPY_BATCH_SIZE:
+            await self.flush()
+
+    async def write(self, data: str):
+        """COPY 文字格式的資料（可以在任意位置分段，未完成的一列留到下一次）"""
+        lines = (self._rest + data).split("\n")
+        self._rest = lines.pop()
+        self._rows.extend([_copy_value(field) for field in line.split("\t")] for line in lines)
+        if len(self._rows) >= COPY_BATCH_SIZE:
+            await self.flush()
+
+    def end(self):
+        if self._rest:
+            self._rows.append([_copy_value(field) for field in self._rest.split("\t")])
+            self._rest = ""
+
+    async def flush(self):
+        rows, self._rows = self._rows, []
+        self.count += await self._cursor.connection.run(self._cursor._cursor._insert_rows, self._insert, rows)
+
+
+class AsyncConnection:
+    """
+    非同步版連線：包裝同步的 Connection，每條連線有一個專用執行緒，
+    等待寫入鎖（busy_timeout）的連線不會佔用其他連線的執行緒
+    """
+
+    def __init__(self, sync: Connection, executor: ThreadPoolExecutor, cursor_factory=None):
+        self.sync = sync
+        self.cursor_factory = cursor_factory or AsyncCursor
+        self._executor = executor
+
+    @property
+    def closed(self):
+        return self.sync.closed
+
+    @property
+    def in_transaction(self):
+        return not self.sync.closed and self.sync.raw.in_transaction
+
+    @property
+    def after_commit(self):
+        return self.sync.after_commit
+
+    async def run(self, func, *args):
+        # 帶著呼叫端的 context 執行（請求的查詢統計在 contextvar 中）
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, context.run, func, *args)
+
+    def cursor(self, row_factory=None, name=None):
+        # row_factory 只會是 dict_row（以 dict 回傳資料列）
+        return self.cursor_factory(self, row_factory=row_factory, name=name)
+
+    async def commit(self):
+        await self.run(self.sync.commit)
+
+    async def rollback(self):
+        await self.run(self.sync.rollback)
+
+    async def close(self):
+        try:
+            await self.run(self.sync.close)
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+
+async def aconnect(path, busy_timeout=5.0, cursor_factory=None) -> AsyncConnection:
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+    try:
+        sync = await asyncio.get_running_loop().run_in_executor(executor, connect, path, busy_timeout)
+    except Exception:
+        executor.shutdown(wait=False)
+        raise
+    return AsyncConnection(sync, executor, cursor_factory)
+
+
+class AsyncConnectionPool:
+    """非同步連線池（介面同 psycopg_pool.AsyncConnectionPool 中用到的部分）"""
+
+    def __init__(self, path, busy_timeout=5.0, min_size=2, max_size=10, timeout=5.0,
+                 cursor_factory=None):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cursor_factory = cursor_factory
+        self._idle = deque()
+        self._size = 0
+        self._cond = asyncio.Condition()
+        self._closed = False
+        self._stats = {"connections_num": 0, "requests_num": 0, "requests_waiting": 0,
+                       "requests_wait_ms": 0, "requests_errors": 0}
+
+    async def _connect(self) -> AsyncConnection:
+        conn = await aconnect(self.path, self.busy_timeout, self.cursor_factory)
+        self._stats["connections_num"] += 1
+        return conn
+
+    async def open(self):
+        for _ in range(self.min_size):
+            self._idle.append(await self._connect())
+            self._size += 1
+
+    async def getconn(self, timeout=None) -> AsyncConnection:
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async with self._cond:
+            self._stats["requests_num"] += 1
+            self._stats["requests_waiting"] += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self._closed or self._idle or self._size < self.max_size),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                self._stats["requests_errors"] += 1
+                raise db.PoolTimeout(f"no connection available within {timeout}s") from None
+            finally:
+                self._stats["requests_waiting"] -= 1
+            if self._closed:
+                raise db.PoolTimeout("connection pool is closed")
+            self._stats["requests_wait_ms"] += int((loop.time() - start) * 1000)
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+        try:
+            return await self._connect()
+        except Exception:
+            async with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    async def putconn(self, conn: AsyncConnection):
+        """歸還連線；交易未結束時先 rollback"""
+        discard = conn.closed or self._closed
+        if not discard and conn.in_transaction:
+            try:
+                await conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        if discard:
+            await conn.close()
+        async with self._cond:
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.getconn()
+        try:
+            yield conn
+        finally:
+            await self.putconn(conn)
+
+    def get_stats(self) -> dict:
+        return {
+            "pool_min": self.min_size,
+            "pool_max": self.max_size,
+            "pool_size": self._size,
+            "pool_available": len(self._idle),
+            **self._stats,
+        }
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            await conn.close()
@@ -0,0 +1,82 @@
+# statements.py
+# 具名的預備語句（prepared statement）：熱門的 repository 查詢以 prepared(name, sql) 登記，
+# 每條連線第一次執行時準備一次，之後只送出名稱與參數，PostgreSQL 不必每次重新解析與規劃。
+# - psycopg2（同步連線池）：instrumentation.InstrumentedConnection 以 PREPARE name AS ... 準備，之後 EXECUTE name (...)
+# - psycopg 3（非同步連線池）：instrumentation.InstrumentedAsyncCursor 以 execute(..., prepare=True) 交給 psycopg 準備
+# - SQLite：sqlite3 本來就依 SQL 文字保留已編譯的語句（cached_statements），照常執行
+# 每個語句的執行次數與累計執行時間由 instrumentation.record_query 累計（/health/statements、/metrics）
+import re
+import threading
+
+import metrics
+
+_PLACEHOLDER = re.compile(r"%s|%%")
+
+
+class PreparedStatement(str):
+    """
+    SQL 文字本身（可照常當作 str 傳給 cursor.execute，plan_check / sqlite_backend.register 不受影響），
+    另帶語句名稱與執行統計。只支援 %s 參數
+    """
+
+    def __new__(cls, name: str, sql: str):
+        if "%(" in sql:
+            raise ValueError(f"prepared statement {name} uses named parameters")
+        self = super().__new__(cls, sql)
+        self.name = name
+        count = 0
+
+        def number(match):
+            nonlocal count
+            if match.group() == "%%":
+                return "%"
+            count += 1
+            return f"${count}"
+
+        body = _PLACEHOLDER.sub(number, sql)
+        self.prepare_sql = f"PREPARE {name} AS {body}"
+        self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * count)})" if count else f"EXECUTE {name}"
+        self.calls = 0
+        self.total_time = 0.0
+        self._lock = threading.Lock()
+        return self
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.total_time += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls, total = self.calls, self.total_time
+        return {
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total * 1000 / calls, 3) if calls else None,
+        }
+
+
+_statements = {}
+
+
+def prepared(name: str, sql: str) -> PreparedStatement:
+    """登記名為 name 的預備語句（模組載入時呼叫，名稱須為 SQL 識別字且不可重複）"""
+    if not name.isidentifier():
+        raise ValueError(f"invalid prepared statement name: {name!r}")
+    if name in _statements:
+        raise ValueError(f"prepared statement {name} is already registered")
+    statement = _statements[name] = PreparedStatement(name, sql)
+    return statement
+
+
+def statement_stats() -> dict:
+    """{語句名稱: 執行次數 / 累計與平均執行時間}"""
+    return {name: s.stats() for name, s in _statements.items()}
+
+
+metrics.Callback("db_prepared_statement_calls_total", "Executions of each prepared statement",
+                 lambda: {(name,): s.calls for name, s in _statements.items()},
+                 kind="counter", labels=("statement",))
+metrics.Callback("db_prepared_statement_seconds_total", "Cumulative execution time of each prepared statement",
+                 lambda: {(name,): s.total_time for name, s in _statements.items()},
+                 kind="counter", labels=("statement",))
@@ -0,0 +1,217 @@
+# storage.py
+# 上傳檔案的儲存：分塊寫入、大小上限、邊寫邊算 checksum、暫存檔 + 原子 rename
+# 檔案以內容雜湊定址（uploads/blobs/ab/cd/<sha256>），相同內容只存一份，
+# 引用數記在 blobs.ref_count，沒有被引用的 blob 由 collect_garbage() 清除
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+
+import metrics
+
+UPLOAD_DIR = "uploads"
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+TMP_DIR = os.path.join(UPLOAD_DIR, "tmp")
+
+# 單一檔案大小上限與每次讀寫的區塊大小（可用環境變數覆寫）
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 500 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+# multipart 表單中除了檔案之外的欄位與邊界所需的額外空間
+_FORM_OVERHEAD = 1024 * 1024
+
+UPLOAD_BYTES = metrics.Counter("upload_bytes_total", "Bytes received in file uploads")
+UPLOADS = metrics.Counter("uploads_total", "File uploads by outcome", ("outcome",))
+
+os.makedirs(BLOB_DIR, exist_ok=True)
+os.makedirs(TMP_DIR, exist_ok=True)
+
+
+class UploadTooLarge(Exception):
+    """上傳檔案超過大小上限"""
+
+
+def blob_path(sha256: str) -> str:
+    """內容雜湊對應的 blob 路徑：uploads/blobs/ab/cd/<sha256>"""
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def discard_temp(tmp_path: str):
+    """刪除暫存檔（已被 store_blob 移走時不做任何事）"""
+    try:
+        os.unlink(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def stream_to_temp(upload, max_size: int = MAX_UPLOAD_SIZE, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """
+    將 UploadFile 分塊串流到 uploads/tmp 下的暫存檔，同時計算 SHA-256；
+    檔案寫入與 fsync 都在 thread pool 執行，不阻塞 event loop。
+    回傳 (暫存檔路徑, 檔案大小, sha256 hex)；呼叫端負責 store_blob 或 discard_temp
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, prefix="upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+
+    def write_chunk(out, chunk):
+        digest.update(chunk)
+        out.write(chunk)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                UPLOAD_BYTES.inc(amount=len(chunk))
+                if size > max_size:
+                    UPLOADS.inc("too_large")
+                    raise UploadTooLarge(f"file exceeds {max_size} bytes")
+                await asyncio.to_thread(write_chunk, out, chunk)
+            await asyncio.to_thread(out.flush)
+            await asyncio.to_thread(os.fsync, out.fileno())
+        # mkstemp 建立的檔案權限為 0600，改成一般上傳檔案的權限
+        os.chmod(tmp_path, 0o644)
+    except BaseException:
+        discard_temp(tmp_path)
+        raise
+    UPLOADS.inc("stored")
+    return tmp_path, size, digest.hexdigest()
+
+
+async def store_blob(tmp_path: str, sha256: str) -> str:
+    """
+    將暫存檔放到 blob 路徑；相同內容的 blob 已存在時直接丟棄暫存檔（去重）。
+    必須在 DeliverableRepository.create 之後、commit 之前呼叫：
+    此時 blob 列已被本交易鎖定，垃圾回收不會同時刪除同一個 blob。
+    回傳 blob 路徑
+    """
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        discard_temp(tmp_path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    await asyncio.to_thread(os.replace, tmp_path, path)
+    return path
+
+
+def _remove(path: str, dry_run: bool):
+    if dry_run:
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _stale_files(directory: str, cutoff: float):
+    """directory 底下（遞迴）修改時間早於 cutoff 的檔案"""
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    yield path
+            except FileNotFoundError:
+                continue
+
+
+def collect_garbage(grace_seconds: float = 3600, include_legacy: bool = False,
+                    dry_run: bool = False, batch_size: int = 1000) -> dict:
+    """
+    清除沒有被引用的上傳檔案（python manage.py gc-blobs）：
+    - ref_count 為 0 且超過 grace_seconds 的 blob（資料庫列與實體檔案）
+    - blob 目錄中沒有資料庫記錄的檔案，以及殘留的暫存檔
+    - include_legacy 時，也清除 uploads/ 下不再被 deliverables.file_path 引用的舊式檔案
+    只處理超過 grace_seconds 的檔案，避免刪到仍在上傳中、尚未 commit 的內容。
+    回傳各類別刪除（dry_run 時為將刪除）的檔案數。
+    """
+    from models.blob_repository import BlobRepository
+
+    cutoff = time.time() - grace_seconds
+    counts = {"unreferenced": 0, "untracked": 0, "temp": 0, "legacy": 0}
+
+    if dry_run:
+        counts["unreferenced"] = len(BlobRepository.get_unreferenced(grace_seconds))
+    else:
+        counts["unreferenced"] = len(BlobRepository.delete_unreferenced(
+            grace_seconds, lambda sha256: _remove(blob_path(sha256), False)
+        ))
+
+    def sweep(files, referenced, key):
+        """files 為 {資料庫中的鍵: 檔案路徑}，分批查詢後刪除沒有被引用的檔案"""
+        keys = sorted(files)
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            keep = referenced(batch)
+            for k in batch:
+                if k not in keep:
+                    _remove(files[k], dry_run)
+                    counts[key] += 1
+
+    # blob 檔名即為雜湊
+    sweep({os.path.basename(p): p for p in _stale_files(BLOB_DIR, cutoff)},
+          BlobRepository.get_known, "untracked")
+
+    for path in _stale_files(TMP_DIR, cutoff):
+        _remove(path, dry_run)
+        counts["temp"] += 1
+
+    if include_legacy:
+        # deliverables.file_path 記錄的是 "uploads/檔名"
+        legacy = {
+            f"{UPLOAD_DIR}/{entry.name}": entry.path
+            for entry in os.scandir(UPLOAD_DIR)
+            if entry.is_file() and entry.stat().st_mtime < cutoff
+        }
+        sweep(legacy, BlobRepository.get_referenced_paths, "legacy")
+    return counts
+
+
+class UploadSizeLimitMiddleware:
+    """
+    上傳路徑（POST .../upload）的請求內容超過上限時直接回 413，
+    在解析 multipart 表單、把檔案寫進暫存之前就拒絕：有 Content-Length 時直接檢查標頭，
+    沒有（chunked）時一邊接收一邊計算，超過上限就中止，不會先把整個請求寫進暫存檔。
+    path_prefix / path_suffix 決定檢查的路徑，其他上傳路徑（例如批次匯入）以另一個實例使用自己的上限
+    """
+
+    def __init__(self, app, max_size: int = MAX_UPLOAD_SIZE, path_suffix: str = "/upload",
+                 path_prefix: str = ""):
+        self.app = app
+        self.max_body = max_size + _FORM_OVERHEAD
+        self.path_suffix = path_suffix
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if not (scope["type"] == "http" and scope["method"] == "POST"
+                and scope["path"].startswith(self.path_prefix)
+                and scope["path"].endswith(self.path_suffix)):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_body:
+                response = PlainTextResponse("Upload too large", status_code=413)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # 在解析表單時拋出：FastAPI 會原樣轉成 413 回應（其他例外會被當成 400）
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
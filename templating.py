@@ -0,0 +1,63 @@
+# templating.py
+# 所有路由共用的 Jinja2 環境：只有一份已編譯樣板的快取，
+# 編譯結果另存成 bytecode（FileSystemBytecodeCache），重新部署 / 新的 worker 不必重新編譯；
+# 啟動時由 main.py 的 lifespan 呼叫 precompile() 先載入所有樣板，第一個請求不必等編譯
+#
+# 預設載入後不再檢查樣板檔的修改時間（修改樣板需要重新啟動）；
+# 開發時設定 TEMPLATE_AUTO_RELOAD=1，每次使用樣板前都檢查修改時間並重新編譯
+import hashlib
+import os
+from functools import lru_cache
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+from instrumentation import instrument_templates
+
+TEMPLATE_DIR = "templates"
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "0") == "1"
+# 未設定時使用 Jinja2 預設的暫存目錄（每個使用者一個，權限 0700）
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR") or None
+
+if TEMPLATE_CACHE_DIR:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+
+env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+    # 不淘汰已載入的樣板（樣板數量固定且很少）
+    cache_size=-1,
+)
+
+templates = instrument_templates(Jinja2Templates(env=env))
+
+
+def precompile() -> int:
+    """載入（必要時編譯）所有樣板並計算樣板版本，回傳樣板數"""
+    names = env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        env.get_template(name)
+    template_version()
+    return len(names)
+
+
+@lru_cache(maxsize=1)
+def _content_hash(stamp) -> str:
+    digest = hashlib.sha1()
+    for name in env.list_templates():
+        source, _, _ = env.loader.get_source(env, name)
+        digest.update(name.encode())
+        digest.update(source.encode())
+    return digest.hexdigest()[:12]
+
+
+def template_version() -> str:
+    """所有樣板內容的雜湊（頁面 ETag 的一部分：部署新樣板後舊的快取不再有效）"""
+    if TEMPLATE_AUTO_RELOAD:
+        # 開發時樣板隨時會改：每次都檢查修改時間，任何樣板改變才重新計算
+        stamp = tuple(os.stat(os.path.join(TEMPLATE_DIR, name)).st_mtime_ns for name in env.list_templates())
+        return _content_hash(stamp)
+    # 樣板不會改變：precompile() 時計算一次，之後直接使用快取的結果
+    return _content_hash(None)
@@ -0,0 +1,82 @@
+# 測試使用與應用程式相同的資料庫設定（db.py：DB_BACKEND、DATABASE_CONFIG / SQLITE_PATH），
+# 連不上資料庫時略過需要資料庫的測試
+import os
+import sys
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import db  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def database():
+    """套用 migrations 後的資料庫（任一後端）"""
+    try:
+        db.run_migrations()
+    except db._DRIVER_ERRORS as exc:
+        pytest.skip(f"database not available: {exc}")
+    return db.DB_BACKEND
+
+
+@pytest.fixture(scope="session")
+def postgres(database):
+    """只在 PostgreSQL 後端執行的測試（EXPLAIN、伺服器端 cursor 等）"""
+    if database != "postgres":
+        pytest.skip("requires DB_BACKEND=postgres")
+    return database
+
+
+class Session:
+    """同一個 TestClient 上的一位登入使用者：每次請求前換上自己的 cookie"""
+
+    def __init__(self, client, username: str, user_id: int):
+        self.client = client
+        self.username = username
+        self.user_id = user_id
+        self.cookies = {}
+
+    def request(self, method: str, url: str, **kwargs):
+        self.client.cookies.clear()
+        self.client.cookies.update(self.cookies)
+        response = self.client.request(method, url, **kwargs)
+        self.cookies.update(response.cookies)
+        return response
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    """整個測試共用一個 TestClient（連線池綁定在它的 event loop 上）"""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app, follow_redirects=False) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def login(client):
+    """login("client") / login("contractor")：註冊並登入一位新使用者，回傳 Session"""
+    def create(role: str) -> Session:
+        username = f"test_{role}_{uuid.uuid4().hex[:10]}"
+        session = Session(client, username, 0)
+        session.post("/register", data={"username": username, "password": "pw", "role": role})
+        response = session.post("/login", data={"username": username, "password": "pw"})
+        assert response.status_code == 303
+        with db.get_db() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id FROM users WHERE username = %s", (username,))
+            session.user_id = cur.fetchone()[0]
+        return session
+    return create
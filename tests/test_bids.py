@@ -0,0 +1,88 @@
+# 接受投標（BidRepository.accept_bid）：鎖定專案後一次指派接案人、接受此投標並拒絕其他投標
+import uuid
+
+import pytest
+
+from db import get_db
+from models.bid_repository import ACCEPTED, ALREADY_ACCEPTED, CONFLICT, BidRepository
+from models.project_repository import ProjectRepository
+from models.user_repository import UserRepository
+
+
+def _user(role):
+    return UserRepository.create(f"test_{role}_{uuid.uuid4().hex[:10]}", "pw", role)
+
+
+def _state(project_id):
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT status, contractor_id FROM projects WHERE id = %s", (project_id,))
+        project = cur.fetchone()
+        cur.execute("SELECT id, status FROM bids WHERE project_id = %s ORDER BY id", (project_id,))
+        return project, dict(cur.fetchall())
+
+
+@pytest.fixture
+def project(database):
+    """一個 open 專案與兩位接案人的投標：(client_id, project_id, [(bid_id, contractor_id), ...])"""
+    client_id = _user("client")
+    project_id = ProjectRepository.create("accept test", "d", 100, client_id)
+    bids = []
+    for price in (90, 80):
+        contractor_id = _user("contractor")
+        bids.append((BidRepository.create(project_id, contractor_id, price, "m"), contractor_id))
+    return client_id, project_id, bids
+
+
+def test_accept_assigns_contractor_and_rejects_other_bids(project):
+    client_id, project_id, [(bid_id, contractor_id), (other_id, _)] = project
+
+    outcome = BidRepository.accept_bid(bid_id, client_id)
+
+    assert outcome == {"result": ACCEPTED, "project_id": project_id, "contractor_id": contractor_id}
+    assert _state(project_id) == (("assigned", contractor_id), {bid_id: "accepted", other_id: "rejected"})
+
+
+def test_accepting_the_same_bid_again_is_already_accepted(project):
+    client_id, project_id, [(bid_id, contractor_id), _] = project
+    BidRepository.accept_bid(bid_id, client_id)
+    before = _state(project_id)
+
+    outcome = BidRepository.accept_bid(bid_id, client_id)
+
+    assert outcome["result"] == ALREADY_ACCEPTED
+    assert _state(project_id) == before
+
+
+def test_accepting_another_bid_after_one_was_accepted_conflicts(project):
+    client_id, project_id, [(bid_id, contractor_id), (other_id, _)] = project
+    BidRepository.accept_bid(bid_id, client_id)
+    before = _state(project_id)
+
+    outcome = BidRepository.accept_bid(other_id, client_id)
+
+    assert outcome["result"] == CONFLICT
+    assert _state(project_id) == before
+
+
+def test_accept_requires_the_project_owner(project):
+    _, project_id, [(bid_id, _), _] = project
+
+    assert BidRepository.accept_bid(bid_id, _user("client")) is None
+    assert _state(project_id)[0] == ("open", None)
+
+
+def test_conflicting_accept_redirects_back_with_a_message(login):
+    client, first, second = login("client"), login("contractor"), login("contractor")
+    project_id = ProjectRepository.create("accept route test", "d", 100, client.user_id)
+    bid_id = BidRepository.create(project_id, first.user_id, 90, "m")
+    other_id = BidRepository.create(project_id, second.user_id, 80, "m")
+    assert client.post(f"/client/bid/{bid_id}/accept").status_code == 303
+
+    response = client.post(f"/client/bid/{other_id}/accept")
+
+    assert response.status_code == 303
+    assert response.headers["location"] == f"/client/project/{project_id}/bids?error=not_open"
+    page = client.get(response.headers["location"])
+    assert page.status_code == 200
+    assert "專案已不是開放狀態，無法接受此投標" in page.text
@@ -0,0 +1,79 @@
+# 串流匯出（GET /export/{kind}）：用戶端中途斷線時，server-side cursor 要關閉、連線要立刻還給連線池
+import asyncio
+
+import db
+from models.project_repository import ProjectRepository
+
+
+def _in_use() -> int:
+    stats = db.get_async_pool_stats()
+    return stats.get("pool_size", 0) - stats.get("pool_available", 0)
+
+
+async def _disconnect_after_first_chunk(app, session, path):
+    """直接呼叫 ASGI app：收到第一個資料區塊後不再讀取，並送出 http.disconnect"""
+    first_chunk = asyncio.Event()
+    messages = []
+    cookie = "; ".join(f"{k}={v}" for k, v in session.cookies.items())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"format=csv",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_chunk.set()
+            # 慢速用戶端：之後的區塊永遠送不出去
+            await asyncio.Event().wait()
+
+    await app(scope, receive, send)
+    # app 回傳的當下（不再讓出 event loop）就必須已經歸還連線
+    return messages, _in_use()
+
+
+def test_disconnect_releases_the_export_connection(login, client):
+    import main
+
+    owner = login("client")
+    for i in range(3):
+        ProjectRepository.create(f"export {i}", "d", 10, owner.user_id)
+    assert _in_use() == 0
+
+    messages, in_use = client.portal.call(_disconnect_after_first_chunk, main.app, owner, "/export/projects")
+
+    assert messages[0]["status"] == 200
+    assert messages[1]["body"].startswith(b"id,title,")
+    assert in_use == 0
+
+
+def test_export_streams_every_row(login):
+    owner = login("client")
+    ids = [ProjectRepository.create(f"export {i}", "d", 10, owner.user_id) for i in range(3)]
+
+    response = owner.get("/export/projects", params={"format": "csv"})
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0].startswith("id,title,")
+    assert [int(line.split(",")[0]) for line in lines[1:]] == ids
+    assert _in_use() == 0
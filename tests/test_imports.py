@@ -0,0 +1,79 @@
+# 批次匯入（POST /import/{kind}）：任何一列有錯誤時回 422、不寫入任何資料，並回報每一列的錯誤
+import glob
+import os
+import tempfile
+
+from db import get_db
+
+
+def _count(sql, params):
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        return cur.fetchone()[0]
+
+
+def _import(session, kind, body, fmt="csv"):
+    return session.post(f"/import/{kind}", data={"format": fmt}, files={"file": (f"{kind}.{fmt}", body)})
+
+
+def _staged_files():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "import-*.copy")))
+
+
+def test_project_import_reports_every_invalid_row(login):
+    client = login("client")
+    before = _staged_files()
+    body = "title,description,budget\nok,d,10\n,d,10\nbad budget,d,-1\nbad both,d,x\n"
+
+    response = _import(client, "projects", body)
+
+    assert response.status_code == 422
+    report = response.json()
+    assert report["rows"] == 4
+    assert report["imported"] == 0
+    assert report["error_count"] == 3
+    assert [e["line"] for e in report["errors"]] == [3, 4, 5]
+    assert report["errors"][0]["errors"] == ["title 為必填"]
+    assert _count("SELECT COUNT(*) FROM projects WHERE client_id = %s", (client.user_id,)) == 0
+    assert _staged_files() == before
+
+
+def test_project_import_keeps_special_characters(login):
+    client = login("client")
+    body = '{"title": "tab\\tand\\\\slash", "description": "line\\nbreak", "budget": 5}\n'
+
+    response = _import(client, "projects", body, fmt="ndjson")
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT title, description FROM projects WHERE client_id = %s", (client.user_id,))
+        assert cur.fetchall() == [("tab\tand\\slash", "line\nbreak")]
+
+
+def test_bid_import_rolls_back_on_database_errors(login):
+    client, contractor = login("client"), login("contractor")
+    assert _import(client, "projects", "title,budget\nfirst,10\nsecond,20\n").status_code == 200
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM projects WHERE client_id = %s ORDER BY id", (client.user_id,))
+        first, second = [row[0] for row in cur.fetchall()]
+
+    # 第一列有效，其他列在資料庫端才會發現錯誤：整個匯入都不能寫入
+    body = f"project_id,price\n{first},100\n{second},100\n{second},90\n999999999,10\n"
+    response = _import(contractor, "bids", body)
+
+    assert response.status_code == 422
+    report = response.json()
+    assert report["imported"] == 0
+    assert report["errors"] == [
+        {"line": 4, "errors": ["檔案中已有此專案的投標"]},
+        {"line": 5, "errors": ["專案不存在"]},
+    ]
+    assert _count("SELECT COUNT(*) FROM bids WHERE contractor_id = %s", (contractor.user_id,)) == 0
+
+    response = _import(contractor, "bids", f"project_id,price\n{first},100\n{second},100\n")
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
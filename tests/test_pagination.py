@@ -0,0 +1,124 @@
+# 專案列表的 keyset 分頁（models/project_repository.py）：cursor 編碼、上一頁 / 下一頁、相同排序值的 tie-break
+import base64
+import uuid
+from datetime import datetime
+
+import pytest
+
+from db import get_db
+from models.project_repository import ProjectRepository, _build_page_query, decode_cursor, encode_cursor
+from models.user_repository import UserRepository
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_updated_at_cursor_round_trip():
+    updated_at = datetime(2026, 1, 2, 3, 4, 5, 678901)
+    assert decode_cursor(encode_cursor({"id": 42, "updated_at": updated_at})) == (updated_at, 42)
+
+
+def test_rank_cursor_round_trip_keeps_the_exact_float():
+    rank = 0.1 + 0.2
+    key, project_id = decode_cursor(encode_cursor({"id": 7, "rank": rank, "updated_at": datetime.now()}))
+    assert (key, project_id) == (rank, 7)
+    assert isinstance(key, float)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _b64(b"\xff\xfe"),
+    _b64(b"no separator"),
+    _b64(b"2026-01-01T00:00:00|1|2"),
+    _b64(b"yesterday|1"),
+    _b64(b"2026-01-01T00:00:00|one"),
+    _b64(b"rank:high|1"),
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_must_match_the_query():
+    rank_cursor = encode_cursor({"id": 1, "rank": 0.5})
+    time_cursor = encode_cursor({"id": 1, "updated_at": datetime(2026, 1, 1)})
+    with pytest.raises(ValueError):
+        _build_page_query(cursor=rank_cursor)
+    with pytest.raises(ValueError):
+        _build_page_query(cursor=time_cursor, search="logo")
+    with pytest.raises(ValueError):
+        _build_page_query(direction="sideways")
+
+
+def _walk(limit, **filters):
+    """依 next_cursor 走完所有頁，回傳每一頁的 id 與 cursor"""
+    pages, cursor = [], None
+    while True:
+        page = ProjectRepository.get_project_page(cursor=cursor, limit=limit, **filters)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def _ids(page):
+    return [p["id"] for p in page["items"]]
+
+
+def _assert_round_trips(pages, limit, **filters):
+    # 下一頁依序涵蓋全部、不重複；每一頁的 prev_cursor 取回的正好是前一頁
+    assert [len(_ids(p)) for p in pages[:-1]] == [limit] * (len(pages) - 1)
+    assert pages[0]["prev_cursor"] is None
+    for before, page in zip(pages, pages[1:]):
+        previous = ProjectRepository.get_project_page(
+            cursor=page["prev_cursor"], direction="prev", limit=limit, **filters
+        )
+        assert _ids(previous) == _ids(before)
+        assert previous["next_cursor"] is not None
+
+
+@pytest.fixture
+def client_id(database):
+    return UserRepository.create(f"test_client_{uuid.uuid4().hex[:10]}", "pw", "client")
+
+
+def test_pages_break_ties_on_equal_updated_at(client_id):
+    ids = [ProjectRepository.create(f"page {i}", "d", 10, client_id) for i in range(7)]
+    # 中間五筆的 updated_at 完全相同，只能靠 id 排序
+    with get_db() as conn:
+        conn.cursor().execute(
+            "UPDATE projects SET updated_at = %s WHERE id = ANY(%s)",
+            (datetime(2026, 1, 1, 12, 0, 0), ids[1:6]),
+        )
+        conn.cursor().execute("UPDATE projects SET updated_at = %s WHERE id = %s", (datetime(2026, 1, 1, 13), ids[0]))
+        conn.cursor().execute("UPDATE projects SET updated_at = %s WHERE id = %s", (datetime(2026, 1, 1, 11), ids[6]))
+
+    pages = _walk(3, client_id=client_id)
+
+    expected = [ids[0], *sorted(ids[1:6], reverse=True), ids[6]]
+    assert [i for page in pages for i in _ids(page)] == expected
+    _assert_round_trips(pages, 3, client_id=client_id)
+
+
+def test_search_pages_use_rank_cursors(client_id):
+    word = "kw" + uuid.uuid4().hex[:12]
+    # 相同內容的專案相關度相同（依 id 排序），重複關鍵字的相關度較高
+    for i in range(4):
+        ProjectRepository.create(f"{word} logo", "same", 10, client_id)
+    for i in range(3):
+        ProjectRepository.create(f"{word} {word} {word}", f"{word} {word}", 10, client_id)
+
+    everything = ProjectRepository.get_project_page(search=word, limit=100)
+    pages = _walk(2, search=word)
+
+    assert len(_ids(everything)) == 7
+    assert [i for page in pages for i in _ids(page)] == _ids(everything)
+    assert decode_cursor(pages[0]["next_cursor"])[0] == pytest.approx(everything["items"][1]["rank"])
+    _assert_round_trips(pages, 2, search=word)
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", _b64(b"2026-01-01T00:00:00|x"), _b64(b"rank:0.5|1")])
+def test_invalid_cursor_is_a_bad_request(login, cursor):
+    contractor = login("contractor")
+    assert contractor.get("/contractor/dashboard", params={"cursor": cursor}).status_code == 400
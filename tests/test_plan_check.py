@@ -0,0 +1,29 @@
+# 查詢計畫回歸測試：models/* 的每個查詢在 seed 資料上都不能對大型資料表 Seq Scan（見 plan_check.py）
+import pytest
+
+import plan_check
+import seed
+from db import get_db
+
+
+@pytest.fixture(scope="module")
+def seeded(postgres):
+    """沒有 seed 資料時先產生（只會刪除 / 新增 seed_ 開頭的使用者與其資料）"""
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM users WHERE username LIKE %s LIMIT 1", (seed.SEED_PREFIX + "%",))
+        has_seed = cur.fetchone() is not None
+    if not has_seed:
+        seed.seed_database()
+
+
+def test_no_seq_scan_on_large_tables(seeded):
+    results, problems = plan_check.check_plans()
+    assert results
+    assert problems == []
+
+
+def test_every_query_has_sample_parameters():
+    queries = plan_check.discover_queries()
+    missing = [name for name in queries if name not in plan_check.PARAMS and name not in plan_check.DERIVED]
+    assert missing == []